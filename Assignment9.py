@@ -1,186 +1,3734 @@
 import sys
-from typing import List
+import bz2
+import gzip
+import hashlib
+import heapq
+import importlib
+import importlib.util
+import itertools
+import json
+import lzma
+import mmap
+import os
+import re
+import shutil
+import threading
+import time
+import uuid
+from array import array
+from bisect import bisect_right
+from collections import OrderedDict, deque
+from contextlib import nullcontext
+from typing import TYPE_CHECKING, List
 
+if TYPE_CHECKING:
+    from concurrent.futures import Executor
 
-class Alignment():    
+# asyncio, concurrent.futures, multiprocessing and numpy are imported when they are first used, a short run on a
+# single thread imports none of them
+
+class _LazyModule():
+    def __init__(self, name:str):
+        """Stands for a module which is imported only when one of its attributes is first used, so that importing this
+        module (e.g. to align a few short queries from the command line) does not pay for the heavy ones.
+
+        Args:
+            name (str): the name of the module
+        """
+        self.__name = name
+    
+    
+    def __getattr__(self, attribute:str):
+        # the attributes are copied over, so the later lookups never get here
+        module = importlib.import_module(self.__name)
+        self.__dict__.update(vars(module))
+        return getattr(module, attribute)
+
+
+def _isArray(value)->bool:
+    """True for a numpy array, without importing numpy when nothing has imported it yet"""
+    return 'numpy' in sys.modules and isinstance(value, sys.modules['numpy'].ndarray)
+
+
+np = _LazyModule('numpy') if importlib.util.find_spec('numpy') is not None else None
+
+
+def _threadPool(*args, **kwargs)->'Executor':
+    """creates a concurrent.futures.ThreadPoolExecutor, concurrent.futures being imported by the first one"""
+    from concurrent.futures import ThreadPoolExecutor
+    return ThreadPoolExecutor(*args, **kwargs)
+
+
+def _processPool(*args, **kwargs)->'Executor':
+    """creates a concurrent.futures.ProcessPoolExecutor, multiprocessing being imported by the first one"""
+    from concurrent.futures import ProcessPoolExecutor
+    return ProcessPoolExecutor(*args, **kwargs)
+
+
+## PACKED SEQUENCE ----------------------------------------------------------------------------------------------
+
+_PACK_CODES = bytes.maketrans(b'ACGTX-', bytes([0, 1, 2, 3, 0, 1]))
+_PACK_MASK = bytes.maketrans(b'ACGTX-', bytes([0, 0, 0, 0, 1, 1]))
+_UNPACK_SYMBOLS = bytes.maketrans(bytes(range(8)), b'ACGTX-XX')
+
+
+def _packFields(values:bytes, width:int)->bytes:
+    """packs values of width bits each (1, 2, 4 or 8) into bytes, the first value goes in the lowest bits
+
+    Args:
+        values (bytes): the values to be packed, each one must fit in width bits
+        width (int): the number of bits per value
+
+    Returns:
+        packed (bytes): the packed values
+    """
+    
+    perByte = 8 // width
+    size = -(-len(values) // perByte)
+    packed = 0
+    
+    # every value is shifted inside its own byte, so whole strides can be combined as big integers
+    for k in range(perByte):
+        packed |= int.from_bytes(values[k::perByte].ljust(size, b'\0'), 'little') << (k*width)
+    
+    return packed.to_bytes(size, 'little')
+
+
+def _unpackFields(data:bytes, width:int, start:int, length:int)->bytes:
+    """unpacks length values of width bits starting from the start-th one, only the bytes holding them are read
+
+    Args:
+        data (bytes): the packed values
+        width (int): the number of bits per value
+        start (int): the index of the first value to be unpacked
+        length (int): the number of values to be unpacked
+
+    Returns:
+        values (bytes): one byte per value
+    """
+    
+    perByte = 8 // width
+    first, last = start // perByte, -(-(start+length) // perByte)
+    chunk = int.from_bytes(data[first:last], 'little')
+    fieldMask = int.from_bytes(bytes([(1 << width) - 1]) * (last-first), 'little')
+    values = bytearray((last-first) * perByte)
+    
+    for k in range(perByte):
+        values[k::perByte] = ((chunk >> (k*width)) & fieldMask).to_bytes(last-first, 'little')
+    
+    start -= first * perByte
+    return bytes(values[start:start+length])
+
+
+class PackedSequence():
+    def __init__(self, sequence:str):
+        """Stores a sequence in a compact form: A, C, G and T take 2 bits each and a side bit mask flags the 
+        X and - positions (their 2 bit code tells which of the two it is), i.e. 3 bits per base instead of 8.
+        
+        Slicing with a unit step returns a view sharing the packed data, no base is copied until the view 
+        is converted back to a string via str().
+
+        Args:
+            sequence (str | bytes): the sequence (or its ascii codes) to be packed, only A, C, G, T, X and - are allowed
+
+        Raises:
+            ValueError: if the sequence contains a character different from A, C, G, T, X and -
+        """
+        
+        encoded = bytes(sequence) if isinstance(sequence, (bytes, bytearray)) else sequence.encode('ascii', errors='replace')
+        if encoded.translate(None, b'ACGTX-'):
+            raise ValueError('Invalid sequence, only A, C, G, T, X and - can be packed')
+        
+        self.__codes = _packFields(encoded.translate(_PACK_CODES), 2)
+        self.__mask = _packFields(encoded.translate(_PACK_MASK), 1)
+        self.__start = 0
+        self.__length = len(encoded)
+    
+    
+    def __view(self, start:int, length:int)->'PackedSequence':
+        """returns a view over a portion of the sequence which shares the packed data"""
+        
+        view = PackedSequence.__new__(PackedSequence)
+        view.__codes, view.__mask = self.__codes, self.__mask
+        view.__start, view.__length = self.__start + start, length
+        return view
+    
+    
+    def __len__(self)->int:
+        return self.__length
+    
+    
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            start, stop, step = key.indices(self.__length)
+            if step != 1:
+                return PackedSequence(str(self)[key])
+            return self.__view(start, max(stop - start, 0))
+        
+        if key < 0:
+            key += self.__length
+        if not 0 <= key < self.__length:
+            raise IndexError('PackedSequence index out of range')
+        
+        key += self.__start
+        code = (self.__codes[key >> 2] >> 2*(key & 3)) & 3
+        masked = (self.__mask[key >> 3] >> (key & 7)) & 1
+        return 'ACGTX-'[code + 4*masked]
+    
+    
+    def encode(self, encoding:str='ascii')->bytes:
+        """returns the sequence as ascii bytes (one byte per base), the same of str(self).encode()
+
+        Args:
+            encoding (str): kept for compatibility with str.encode, the bases are always ascii
+
+        Returns:
+            sequence (bytes): the unpacked sequence
+        """
+        
+        if not self.__length:
+            return b''
+        
+        codes = _unpackFields(self.__codes, 2, self.__start, self.__length)
+        mask = _unpackFields(self.__mask, 1, self.__start, self.__length)
+        merged = int.from_bytes(codes, 'little') | int.from_bytes(mask, 'little') << 2
+        
+        return merged.to_bytes(self.__length, 'little').translate(_UNPACK_SYMBOLS)
+    
+    
+    def __str__(self)->str:
+        return self.encode().decode('ascii')
+    
+    
+    def __repr__(self)->str:
+        return f'PackedSequence({str(self)!r})'
+    
+    
+    def __eq__(self, other)->bool:
+        if other is self:
+            return True
+        if isinstance(other, PackedSequence):
+            return len(self) == len(other) and self.encode() == other.encode()
+        if isinstance(other, str):
+            return len(self) == len(other) and str(self) == other
+        return NotImplemented
+    
+    
+    __hash__ = None
+    
+    
+    def nbytes(self)->int:
+        """returns the number of bytes used by the packed data (shared by every view)
+
+        Returns:
+            size (int): the size of the packed bases plus the size of the X/- mask
+        """
+        return len(self.__codes) + len(self.__mask)
+
+
+## MAPPED SEQUENCE ----------------------------------------------------------------------------------------------
+
+# the content of a line without its leading and trailing whitespaces
+_LINE_CONTENT = re.compile(rb'[^\s](?:[^\r\n]*[^\s])?')
+
+
+class MappedSequence():
+    def __init__(self, path:str):
+        """Gives access to the sequence stored in a text file without loading it in memory.
+        
+        The file is memory mapped and an index holding where the content of every line starts in the file and 
+        in the sequence is built, so that any portion of the sequence can be read back touching only the lines 
+        overlapping it. The sequence is the same returned by Alignment.readSequence, i.e. the stripped lines joined
+        together and uppercased.
+
+        Args:
+            path (str): the path to the txt file holding the sequence
+
+        Raises:
+            ValueError: if the file is compressed or it holds FASTA or FASTQ records, and so it cannot be memory mapped
+        """
+        
+        if compressionOf(path) is not None:
+            raise ValueError(f'{path} is compressed and cannot be memory mapped, it should be read in memory')
+        if recordFormatOf(path) is not None:
+            raise ValueError(f'{path} holds FASTA or FASTQ records and cannot be memory mapped, it should be read in memory')
+        
+        self.path = path
+        self.__file = open(path, 'rb')
+        self.__map = mmap.mmap(self.__file.fileno(), 0, access=mmap.ACCESS_READ) if self.__file.seek(0, 2) else b''
+        self.__sequenceStarts = array('q')
+        self.__fileStarts = array('q')
+        self.__length = 0
+        
+        for match in _LINE_CONTENT.finditer(self.__map):
+            self.__sequenceStarts.append(self.__length)
+            self.__fileStarts.append(match.start())
+            self.__length += match.end() - match.start()
+    
+    
+    def __len__(self)->int:
+        return self.__length
+    
+    
+    def __getitem__(self, key):
+        if not isinstance(key, slice):
+            if key < 0:
+                key += self.__length
+            if not 0 <= key < self.__length:
+                raise IndexError('MappedSequence index out of range')
+            return self[key:key+1]
+        
+        start, stop, step = key.indices(self.__length)
+        if step != 1:
+            indices = range(start, stop, step)
+            if not indices:
+                return ''
+            low = min(indices[0], indices[-1])
+            return self[low:max(indices[0], indices[-1])+1][indices[0]-low::step]
+        
+        pieces = []
+        line = bisect_right(self.__sequenceStarts, start) - 1
+        
+        while start < stop:
+            lineEnd = self.__sequenceStarts[line+1] if line+1 < len(self.__sequenceStarts) else self.__length
+            begin = self.__fileStarts[line] + start - self.__sequenceStarts[line]
+            end = begin + min(stop, lineEnd) - start
+            pieces.append(self.__map[begin:end])
+            start, line = min(stop, lineEnd), line + 1
+        
+        return b''.join(pieces).upper().decode('latin-1')
+    
+    
+    def chunks(self, chunkSize:int=1 << 22):
+        """yields the sequence in consecutive portions
+
+        Args:
+            chunkSize (int, optional): the length of every portion (the last one can be shorter). Defaults to 4M.
+
+        Yields:
+            chunk (str): a portion of the sequence
+        """
+        for start in range(0, self.__length, chunkSize):
+            yield self[start:start+chunkSize]
+    
+    
+    def __str__(self)->str:
+        return self[:]
+    
+    
+    def __repr__(self)->str:
+        return f'MappedSequence({self.__file.name!r})'
+    
+    
+    def close(self)->None:
+        """releases the memory map and the file"""
+        
+        if isinstance(self.__map, mmap.mmap):
+            self.__map.close()
+        self.__file.close()
+    
+    
+    def __enter__(self)->'MappedSequence':
+        return self
+    
+    
+    def __exit__(self, *args)->None:
+        self.close()
+
+
+## INGEST -------------------------------------------------------------------------------------------------------
+
+# number of bytes read at a time by the ingest
+INGEST_CHUNK_SIZE = 1 << 24
+
+_INGEST_UPPER = bytes.maketrans(b'acgtx', b'ACGTX')
+_INGEST_VALID = b'ACGTX-'
+_INGEST_WHITESPACE = b' \t\r\n\x0b\x0c'
+_INGEST_INLINE_WHITESPACE = b' \t\r\x0b\x0c'
+
+# a whitespace inside a line, i.e. between two of its characters, which is as invalid as any other character
+_INTERIOR_WHITESPACE = re.compile(rb'[^\s][ \t\r\x0b\x0c]+[^\s]')
+
+
+# compressed formats read transparently: name -> (magic bytes, opener)
+_COMPRESSED_FORMATS = {
+    'gzip': (b'\x1f\x8b', gzip.open),
+    'bz2': (b'BZh', bz2.open),
+    'xz': (b'\xfd7zXZ\x00', lzma.open),
+}
+
+
+def compressionOf(path:str)->str:
+    """detects the compression of a file from its first bytes
+
+    Args:
+        path (str): the path of the file
+
+    Returns:
+        compression (str | None): the name of the compressed format (gzip, bz2 or xz), None for a plain file
+    """
+    
+    with open(path, 'rb') as fp:
+        head = fp.read(6)
+    return next((name for name, (magic, _) in _COMPRESSED_FORMATS.items() if head.startswith(magic)), None)
+
+
+def openInput(path:str):
+    """opens a file for binary reading, a compressed one (see compressionOf) is decompressed on the fly while it is read
+
+    Args:
+        path (str): the path of the file
+
+    Returns:
+        file (BinaryIO): the opened file
+    """
+    
+    compression = compressionOf(path)
+    return open(path, 'rb') if compression is None else _COMPRESSED_FORMATS[compression][1](path, 'rb')
+
+
+class SequenceFormatError(ValueError):
+    def __init__(self, message:str, path:str, line:int, column:int, character:str):
+        """Raised by the ingest at the first invalid character of a sequence file.
+
+        Args:
+            message (str): the description of the error
+            path (str): the path of the file
+            line (int): the line of the invalid character, starting from 1
+            column (int): the column (byte) of the invalid character in its line, starting from 1
+            character (str): the invalid character, empty for an empty sequence
+        """
+        
+        super().__init__(f'{message}: {f"invalid character {character!r}" if character else "empty sequence"} '
+                         f'at line {line}, column {column} of {path}')
+        self.path, self.line, self.column, self.character = path, line, column, character
+
+
+def _ingestChunks(fp, chunkSize:int, stats:dict, partial:bool=False):
+    """reads a binary file chunkSize bytes at a time, accounting the bytes read and the time spent in stats
+
+    Args:
+        fp (BinaryIO): the file to be read
+        chunkSize (int): the number of bytes read at a time
+        stats (dict | None): the 'bytes' and 'seconds' counters to be increased, if any
+        partial (bool, optional): if True a chunk is what a single read returns, at most chunkSize bytes, so that a
+            pipe is processed as its data arrives. Defaults to False.
+
+    Yields:
+        chunk (bytes): the next chunk of the file
+    """
+    
+    read = fp.read1 if partial else fp.read
+    while True:
+        start = time.perf_counter()
+        chunk = read(chunkSize)
+        if stats is not None:
+            stats['bytes'] += len(chunk)
+            stats['seconds'] += time.perf_counter() - start
+        if not chunk:
+            return
+        yield chunk
+
+
+def _locateInvalid(message:str, path:str, raw:bytes, invalid:bytes, line:int, column:int)->SequenceFormatError:
+    """builds the error of the first invalid byte of a chunk
+
+    Args:
+        message (str): the description of the error
+        path (str): the path of the file
+        raw (bytes): the chunk as read from the file
+        invalid (bytes): the invalid bytes of the chunk, in order
+        line (int): the line of the first byte of the chunk
+        column (int): the column of the first byte of the chunk
+
+    Returns:
+        error (SequenceFormatError): the error to be raised
+    """
+    
+    pos = raw.find(invalid[:1])
+    lineStart = raw.rfind(b'\n', 0, pos) + 1
+    column = pos - lineStart + 1 if lineStart else column + pos
+    character = raw[pos:pos+4].decode('utf-8', errors='replace')[0]
+    
+    return SequenceFormatError(message, path, line + raw.count(b'\n', 0, pos), column, character)
+
+
+def _locateInvalidLine(message:str, path:str, lines:List[bytes], line:int)->SequenceFormatError:
+    """builds the error of the first invalid byte of some lines, the whitespaces around every line being allowed
+
+    Args:
+        message (str): the description of the error
+        path (str): the path of the file
+        lines (list[bytes]): the lines as read from the file
+        line (int): the line number of the first one
+
+    Returns:
+        error (SequenceFormatError): the error to be raised
+    """
+    
+    for i, data in enumerate(lines):
+        stripped = data.strip()
+        invalid = stripped.translate(_INGEST_UPPER).translate(None, _INGEST_VALID)
+        if invalid:
+            pos = len(data) - len(data.lstrip()) + stripped.find(invalid[:1])
+            return SequenceFormatError(message, path, line + i, pos + 1, data[pos:pos+4].decode('utf-8', errors='replace')[0])
+
+
+def _checkLines(message:str, path:str, block:bytes, cleaned:bytes, line:int)->None:
+    """validates some whole lines: only the whitespaces around every line are dropped, as MappedSequence does, 
+    the ones inside a line are invalid characters
+
+    Args:
+        message (str): the description of the error
+        path (str): the path of the file
+        block (bytes): the lines as read from the file
+        cleaned (bytes): the lines uppercased and without whitespaces
+        line (int): the line number of the first one
+
+    Raises:
+        SequenceFormatError: at the first invalid character of the lines
+    """
+    
+    # lines ended by \n or \r\n and holding no other whitespace cannot have one inside, otherwise a line holds one 
+    # only if it splits in several words, which are joined when the whitespaces inside the lines are deleted
+    inline = any(space in block for space in (b' ', b'\t', b'\x0b', b'\x0c')) or \
+        (b'\r' in block and block.count(b'\r') != block.count(b'\r\n'))
+    inside = inline and len(block.split()) != len(block.translate(None, _INGEST_INLINE_WHITESPACE).split())
+    match = _INTERIOR_WHITESPACE.search(block) if inside else None
+    
+    if match is not None:
+        block, pos = block[:match.start() + 1], match.start() + 1
+        cleaned = block.translate(_INGEST_UPPER, _INGEST_WHITESPACE)
+    
+    invalid = cleaned.translate(None, _INGEST_VALID)
+    if invalid:
+        raise _locateInvalid(message, path, block, invalid, line, 1)
+    if match is not None:
+        raise SequenceFormatError(message, path, line + block.count(b'\n'), pos - block.rfind(b'\n'), chr(match.group()[1]))
+
+
+def ingestSequence(path:str, message:str='Incorrect reference sequence passed', chunkSize:int=None, stats:dict=None)->bytes:
+    """reads a sequence file in a single sweep of large binary chunks: the whole lines of every chunk are uppercased, 
+    stripped of the whitespaces around them and validated by byte translation tables, without going through text 
+    decoding. Compressed files (gzip, bz2 or xz) are decompressed chunk by chunk on the way
+
+    Args:
+        path (str): the path of the file
+        message (str, optional): the description of the error raised. Defaults to 'Incorrect reference sequence passed'.
+        chunkSize (int, optional): the number of bytes read at a time. Defaults to INGEST_CHUNK_SIZE.
+        stats (dict, optional): 'bytes' and 'seconds' counters increased by the bytes read and the time spent. Defaults to None.
+
+    Raises:
+        SequenceFormatError: at the first character other than A, C, G, T, X, - (in any case) and the whitespaces 
+            around a line
+
+    Returns:
+        sequence (bytes): the ascii codes of the sequence
+    """
+    
+    parts = []
+    line, rest = 1, b''
+    
+    with openInput(path) as fp:
+        for raw in itertools.chain(_ingestChunks(fp, chunkSize or INGEST_CHUNK_SIZE, stats), [None]):
+            start = time.perf_counter()
+            
+            # only whole lines are processed, the last partial one is carried over to the next chunk
+            if raw is None:
+                block, rest = rest + b'\n' if rest else b'', b''
+            else:
+                raw = rest + raw
+                end = raw.rfind(b'\n') + 1
+                block, rest = raw[:end], raw[end:]
+            
+            cleaned = block.translate(_INGEST_UPPER, _INGEST_WHITESPACE)
+            _checkLines(message, path, block, cleaned, line)
+            
+            parts.append(cleaned)
+            line += block.count(b'\n')
+            if stats is not None:
+                stats['seconds'] += time.perf_counter() - start
+    
+    return b''.join(parts)
+
+
+def ingestQueries(path, message:str='Incorrect query sequence', chunkSize:int=None, stats:dict=None):
+    """reads a query file, one sequence per line, in a single sweep of large binary chunks: the lines of a chunk are 
+    stripped, then uppercased and validated as a whole by byte translation tables. A FASTA or FASTQ file is read 
+    through ingestRecords instead, one query per record. Compressed files (gzip, bz2 or xz) are decompressed chunk 
+    by chunk on the way. An opened binary stream (e.g. sys.stdin.buffer) is read as plain lines, as they arrive
+
+    Args:
+        path (str | BinaryIO): the path of the file, or an opened binary stream
+        message (str, optional): the description of the error raised. Defaults to 'Incorrect query sequence'.
+        chunkSize (int, optional): the number of bytes read at a time. Defaults to INGEST_CHUNK_SIZE.
+        stats (dict, optional): 'bytes' and 'seconds' counters increased by the bytes read and the time spent. Defaults to None.
+
+    Raises:
+        SequenceFormatError: at the first invalid character or empty line
+
+    Yields:
+        sequence (str): the next query, uppercased and without whitespaces
+    """
+    
+    stream = not isinstance(path, str)
+    
+    # a FASTA or FASTQ file gives one query per record
+    if not stream and recordFormatOf(path) is not None:
+        for _, sequence, _ in ingestRecords(path, message, chunkSize, stats, allowEmpty=False):
+            yield sequence.decode('ascii')
+        return
+    
+    line, rest = 1, b''
+    fp, path = (nullcontext(path), getattr(path, 'name', '<stream>')) if stream else (openInput(path), path)
+    
+    with fp as fp:
+        for raw in itertools.chain(_ingestChunks(fp, chunkSize or INGEST_CHUNK_SIZE, stats, partial=stream), [None]):
+            start = time.perf_counter()
+            
+            # only whole lines are processed, the last partial one is carried over to the next chunk
+            if raw is None:
+                block, rest = rest + b'\n' if rest else b'', b''
+            else:
+                raw = rest + raw
+                end = raw.rfind(b'\n') + 1
+                block, rest = raw[:end], raw[end:]
+            
+            lines = block.split(b'\n')[:-1]
+            cleaned = b'\n'.join([data.strip() for data in lines]).translate(_INGEST_UPPER)
+            if cleaned.translate(None, _INGEST_VALID + b'\n'):
+                raise _locateInvalidLine(message, path, lines, line)
+            
+            queries = cleaned.decode('ascii').split('\n') if lines else []
+            if '' in queries:
+                raise SequenceFormatError(message, path, line + queries.index(''), 1, '')
+            
+            line += len(queries)
+            if stats is not None:
+                stats['seconds'] += time.perf_counter() - start
+            
+            yield from queries
+
+
+def recordFormatOf(path:str)->str:
+    """detects whether a sequence file holds FASTA or FASTQ records from its first non whitespace byte, '>' and '@'
+    not being valid sequence characters
+
+    Args:
+        path (str): the path of the file, possibly compressed
+
+    Returns:
+        format (str | None): 'fasta', 'fastq' or None for a plain sequence file
+    """
+    
+    with openInput(path) as fp:
+        head = fp.read(1 << 16).lstrip()
+    return {b'>': 'fasta', b'@': 'fastq'}.get(head[:1])
+
+
+def _recordName(header:bytes)->str:
+    """the name of a record, i.e. the first word of its header line (without the leading > or @)"""
+    return (header.split() or [b''])[0].decode('utf-8', errors='replace')
+
+
+def _fastaHeaders(block:bytes):
+    """finds the header lines of a block of whole lines through bytes.find, much faster than a multiline regex
+
+    Yields:
+        start (int): the offset of the > starting the header line
+        end (int): the offset following its line terminator
+    """
+    
+    start = 0 if block.startswith(b'>') else block.find(b'\n>') + 1 or None
+    while start is not None:
+        end = block.index(b'\n', start) + 1
+        yield start, end
+        start = block.find(b'\n>', end - 1) + 1 or None
+
+
+def _fastaRecords(fp, path:str, message:str, chunkSize:int, stats:dict, allowEmpty:bool):
+    """parses the FASTA records of ingestRecords: the sequence lines between two header lines are cleaned and 
+    validated as a whole, as ingestSequence does"""
+    
+    name, parts, offset, headerLine = None, [], 0, 0
+    line, position, rest = 1, 0, b''
+    
+    for raw in itertools.chain(_ingestChunks(fp, chunkSize, stats), [None]):
+        start = time.perf_counter()
+        
+        # only whole lines are processed, the last partial one is carried over to the next chunk
+        if raw is None:
+            block, rest = rest + b'\n' if rest else b'', b''
+        else:
+            raw = rest + raw
+            end = raw.rfind(b'\n') + 1
+            block, rest = raw[:end], raw[end:]
+        
+        records, pos = [], 0
+        for header in itertools.chain(_fastaHeaders(block), [None]):
+            segment = block[pos:header[0] if header else len(block)]
+            cleaned = segment.translate(_INGEST_UPPER, _INGEST_WHITESPACE)
+            _checkLines(message, path, segment, cleaned, line + block.count(b'\n', 0, pos))
+            parts.append(cleaned)
+            
+            if header is None:
+                break
+            
+            if name is not None:
+                records.append((name, b''.join(parts), offset, headerLine))
+            name, parts, offset = _recordName(block[header[0] + 1:header[1]]), [], position + header[1]
+            headerLine, pos = line + block.count(b'\n', 0, header[0]), header[1]
+        
+        line, position = line + block.count(b'\n'), position + len(block)
+        if stats is not None:
+            stats['seconds'] += time.perf_counter() - start
+        
+        for record in records:
+            yield _checkRecord(path, message, allowEmpty, *record)
+    
+    if name is not None:
+        yield _checkRecord(path, message, allowEmpty, name, b''.join(parts), offset, headerLine)
+
+
+def _fastqRecords(fp, path:str, message:str, chunkSize:int, stats:dict, allowEmpty:bool):
+    """parses the FASTQ records of ingestRecords, four lines each (header, sequence, separator and qualities), 
+    the empty lines between two records are skipped"""
+    
+    line, position, rest, pending = 1, 0, b'', []
+    
+    for raw in itertools.chain(_ingestChunks(fp, chunkSize, stats), [None]):
+        start = time.perf_counter()
+        
+        if raw is None:
+            block, rest = rest + b'\n' if rest else b'', b''
+        else:
+            raw = rest + raw
+            end = raw.rfind(b'\n') + 1
+            block, rest = raw[:end], raw[end:]
+        
+        records = []
+        for data in block.split(b'\n')[:-1]:
+            if pending or data.strip():
+                pending.append((line, position, data))
+            line, position = line + 1, position + len(data) + 1
+            
+            if len(pending) == 4:
+                records.append(_fastqRecord(path, message, pending))
+                pending = []
+        
+        if stats is not None:
+            stats['seconds'] += time.perf_counter() - start
+        
+        for record in records:
+            yield _checkRecord(path, message, allowEmpty, *record)
+    
+    if pending:
+        raise SequenceFormatError(f'{message} (truncated FASTQ record)', path, line, 1, '')
+
+
+def _fastqRecord(path:str, message:str, lines:List[tuple])->tuple:
+    """validates the four (line number, offset, content) lines of a FASTQ record
+
+    Returns:
+        record (tuple[str, bytes, int, int]): the name, the sequence, its offset and the line of the header
+    """
+    
+    (headerLine, _, header), (sequenceLine, offset, sequence), (separatorLine, _, separator), _ = lines
+    
+    for number, data, marker in [(headerLine, header, b'@'), (separatorLine, separator, b'+')]:
+        if not data.startswith(marker):
+            raise SequenceFormatError(message, path, number, 1, data[:4].decode('utf-8', errors='replace')[:1])
+    
+    stripped = sequence.strip()
+    cleaned = stripped.translate(_INGEST_UPPER)
+    if cleaned.translate(None, _INGEST_VALID):
+        raise _locateInvalidLine(message, path, [sequence], sequenceLine)
+    
+    return _recordName(header[1:]), cleaned, offset + len(sequence) - len(sequence.lstrip()), headerLine
+
+
+def _checkRecord(path:str, message:str, allowEmpty:bool, name:str, sequence:bytes, offset:int, headerLine:int)->tuple:
+    """rejects an empty record when allowEmpty is False, returns the name, sequence and offset of the record otherwise"""
+    
+    if not (sequence or allowEmpty):
+        raise SequenceFormatError(message, path, headerLine + 1, 1, '')
+    return name, sequence, offset
+
+
+def ingestRecords(path:str, message:str='Incorrect reference sequence passed', chunkSize:int=None, stats:dict=None, 
+                  allowEmpty:bool=True):
+    """streams the records of a FASTA or FASTQ file (see recordFormatOf) in a single sweep of large binary chunks, 
+    the sequence of every record is uppercased, stripped of the whitespaces around every line and validated by byte 
+    translation tables. A FASTA record can span any number of lines, a FASTQ one takes four. Compressed files (gzip, bz2 or xz) are 
+    decompressed chunk by chunk on the way
+
+    Args:
+        path (str): the path of the file
+        message (str, optional): the description of the error raised. Defaults to 'Incorrect reference sequence passed'.
+        chunkSize (int, optional): the number of bytes read at a time. Defaults to INGEST_CHUNK_SIZE.
+        stats (dict, optional): 'bytes' and 'seconds' counters increased by the bytes read and the time spent. Defaults to None.
+        allowEmpty (bool, optional): if False a record without sequence is an error. Defaults to True.
+
+    Raises:
+        ValueError: if the file holds neither FASTA nor FASTQ records
+        SequenceFormatError: at the first invalid character of a sequence, or at a malformed FASTQ record
+
+    Yields:
+        name (str): the name of the record, i.e. the first word of its header
+        sequence (bytes): the ascii codes of its sequence
+        offset (int): the offset of the first line of the sequence in the (decompressed) file, see RecordIndex.fetch
+    """
+    
+    parsers = {'fasta': _fastaRecords, 'fastq': _fastqRecords}
+    recordFormat = recordFormatOf(path)
+    if recordFormat is None:
+        raise ValueError(f'{path} holds neither FASTA nor FASTQ records')
+    
+    with openInput(path) as fp:
+        yield from parsers[recordFormat](fp, path, message, chunkSize or INGEST_CHUNK_SIZE, stats, allowEmpty)
+
+
+class RecordIndex():
+    def __init__(self, names:List[str], lengths:List[int], offsets:List[int]=None, path:str=None):
+        """Index of the records of a reference made of several sequences (e.g. the chromosomes of a FASTA file) 
+        concatenated one after the other. It gives the record holding any position of the reference and the offsets
+        of the windows which do not span two records, and it reads the sequence of a single record straight from 
+        its offset in the file, without parsing the ones before it.
+
+        Args:
+            names (list[str]): the names of the records, in order
+            lengths (list[int]): the length of their sequences
+            offsets (list[int], optional): the offset of the first line of every sequence in the (decompressed) file.
+                Defaults to None, i.e. the records cannot be fetched.
+            path (str, optional): the path of the file holding the records. Defaults to None.
+        """
+        
+        self.names = list(names)
+        self.lengths = array('q', lengths)
+        self.starts = array('q', itertools.accumulate(self.lengths, initial=0))
+        self.size = self.starts.pop()
+        self.offsets = None if offsets is None else array('q', offsets)
+        self.path = path
+        self.__positions = {}
+        for i, name in enumerate(self.names):
+            self.__positions.setdefault(name, i)
+    
+    
+    def __len__(self)->int:
+        return len(self.names)
+    
+    
+    def __eq__(self, other)->bool:
+        return isinstance(other, RecordIndex) and self.names == other.names and self.lengths == other.lengths
+    
+    
+    def __repr__(self)->str:
+        return f'RecordIndex({len(self)} records, {self.size} bases)'
+    
+    
+    def locate(self, position:int)->tuple:
+        """finds the record holding a position of the concatenated reference
+
+        Args:
+            position (int): the position in the concatenated reference
+
+        Returns:
+            name (str): the name of the record
+            position (int): the position inside the record
+        """
+        
+        if not 0 <= position < self.size:
+            raise IndexError(f'position {position} out of the {self.size} bases of the records')
+        
+        # empty records share their start with the next one, the last of them is the one holding the position
+        i = bisect_right(self.starts, position) - 1
+        return self.names[i], position - self.starts[i]
+    
+    
+    def intervals(self, length:int)->List[tuple]:
+        """the offsets of the windows of a given length lying inside a single record
+
+        Args:
+            length (int): the length of the windows
+
+        Returns:
+            intervals (list[tuple[int, int]]): the [start, stop) ranges of offsets of every record at least length long
+        """
+        
+        return [(start, start + size - length + 1) for start, size in zip(self.starts, self.lengths) if size >= length]
+    
+    
+    def fetch(self, record)->str:
+        """reads the sequence of a single record from the file, starting from its offset
+
+        Args:
+            record (str | int): the name or the index of the record
+
+        Raises:
+            KeyError: if there is no record with the given name
+            ValueError: if the records are not backed by a file
+
+        Returns:
+            sequence (str): the sequence of the record, uppercased and without whitespaces
+        """
+        
+        i = record if isinstance(record, int) else self.__positions[record]
+        if self.path is None or self.offsets is None:
+            raise ValueError('The records are not backed by a file')
+        
+        parts, missing = [], self.lengths[i]
+        
+        # the sequence lines are followed by the next record, which is never reached
+        with openInput(self.path) as fp:
+            fp.seek(self.offsets[i])
+            while missing:
+                chunk = fp.read(min(2 * missing + 1024, INGEST_CHUNK_SIZE))
+                if not chunk:
+                    break
+                cleaned = chunk.translate(_INGEST_UPPER, _INGEST_WHITESPACE)[:missing]
+                parts.append(cleaned)
+                missing -= len(cleaned)
+        
+        return b''.join(parts).decode('ascii')
+
+
+## SCORING ENGINES ----------------------------------------------------------------------------------------------
+
+def _numpyEncode(sequence:str):
+    """encodes a sequence as an integer array holding one code point per base
+
+    Args:
+        sequence (str | PackedSequence | np.ndarray): the sequence to be encoded, an array is assumed already encoded
+
+    Returns:
+        codes (np.ndarray): uint8 codes for ascii sequences, uint32 code points otherwise
+    """
+    if isinstance(sequence, np.ndarray):
+        return sequence
+    if isinstance(sequence, PackedSequence):
+        return np.frombuffer(sequence.encode(), dtype=np.uint8)
+    if sequence.isascii():
+        return np.frombuffer(sequence.encode('ascii'), dtype=np.uint8)
+    return np.frombuffer(sequence.encode('utf-32-le'), dtype=np.uint32)
+
+
+def _numpyOffsetScores(reference, query:str):
+    """evaluates the score_alignment score of the query against every window of the reference at once
+
+    Args:
+        reference (np.ndarray): the reference sequence encoded via _numpyEncode
+        query (str): the query sequence
+
+    Returns:
+        scores (np.ndarray): int64 array, the i-th element is the score of the window starting at position i
+    """
+    query = _numpyEncode(query)
+    length, offsets = len(query), len(reference) - len(query) + 1
+    valid = (query != ord('X')) & (query != ord('-'))
+    matches = np.zeros(offsets, dtype=np.int64)
+
+    # loop over the shortest axis and let numpy sweep the other one
+    if length <= offsets:
+        for j in np.flatnonzero(valid):
+            matches += reference[j:j+offsets] == query[j]
+    else:
+        for i in range(offsets):
+            matches[i] = np.count_nonzero((reference[i:i+length] == query) & valid)
+
+    return 2*matches - length
+
+
+class _FFTReference():
+    def __init__(self, reference:str):
+        """Stores a reference sequence for the fft engine.
+        
+        The reference is kept encoded and the spectrum of the indicator of every base is computed once, 
+        the first time a query containing that base is scored, and then reused by every following query.
+
+        Args:
+            reference (str | PackedSequence): the reference sequence
+        """
+        
+        self.codes = _numpyEncode(reference)
+        self.size = 1 << max(len(self.codes)-1, 1).bit_length()
+        self.spectra = {}
+    
+    
+    def spectrum(self, code:int):
+        """returns the spectrum of the indicator array of the given code point
+
+        Args:
+            code (int): the code point of the base
+
+        Returns:
+            spectrum (np.ndarray): the real fft of the indicator array, zero padded to self.size
+        """
+        
+        if code not in self.spectra:
+            self.spectra[code] = np.fft.rfft(self.codes == code, self.size)
+        return self.spectra[code]
+
+
+def _fftOffsetScores(reference:_FFTReference, query:str):
+    """evaluates the score_alignment score of every window via per-base indicator cross-correlations in O(n log n)
+
+    The circular cross-correlation never wraps around for the valid offsets since the fft size is at least the
+    reference length, the float results are rounded to the nearest integer which makes them exact.
+
+    Args:
+        reference (_FFTReference): the reference sequence encoded for the fft engine
+        query (str): the query sequence
+
+    Returns:
+        scores (np.ndarray): int64 array, the i-th element is the score of the window starting at position i
+    """
+    
+    codes = _numpyEncode(query)
+    length, offsets = len(codes), len(reference.codes) - len(codes) + 1
+    correlation = np.zeros(reference.size // 2 + 1, dtype=np.complex128)
+    
+    # X and - never match, every other symbol matches only itself
+    for code in set(query) - {'X', '-'}:
+        code = ord(code)
+        correlation += reference.spectrum(code) * np.conj(np.fft.rfft(codes == code, reference.size))
+    
+    matches = np.rint(np.fft.irfft(correlation, reference.size)[:offsets]).astype(np.int64)
+    return 2*matches - length
+
+
+class _BitsetReference():
+    def __init__(self, reference:str):
+        """Stores a reference sequence as one bitmask per symbol, the i-th bit of a mask is set when the 
+        i-th base of the reference is that symbol. X and - never match so they are left out of every mask.
+        Only python integers are used, hence this encoding does not require numpy.
+
+        Args:
+            reference (str | PackedSequence): the reference sequence
+        """
+        
+        reference = str(reference)
+        self.length = len(reference)
+        self.masks = {}
+        
+        symbols = set(reference)
+        for symbol in symbols - {'X', '-'}:
+            bits = reference.translate({ord(c): '1' if c == symbol else '0' for c in symbols})
+            self.masks[symbol] = int(bits[::-1], 2)
+
+
+def _bitsetMatchCounters(reference:_BitsetReference, query:str)->tuple:
+    """counts the matches of every window in parallel, each window owns one bit of the integers returned, 
+    the k-th integer holds the k-th bit of the match count (bit sliced counters)
+
+    Args:
+        reference (_BitsetReference): the reference sequence encoded for the bitset engine
+        query (str): the query sequence
+
+    Returns:
+        counters (list[int]): the bit sliced match counters
+        window (int): the mask of the valid offsets
+    """
+    
+    counters = []
+    
+    for j, symbol in enumerate(query):
+        carry = reference.masks.get(symbol, 0) >> j if symbol not in {'X', '-'} else 0
+        
+        # ripple carry addition of one bit to every counter
+        for k in range(len(counters)):
+            if not carry:
+                break
+            counters[k], carry = counters[k] ^ carry, counters[k] & carry
+        
+        if carry:
+            counters.append(carry)
+    
+    return counters, (1 << (reference.length - len(query) + 1)) - 1
+
+
+def _bitsetOffsetScores(reference:_BitsetReference, query:str)->List[int]:
+    """evaluates the score_alignment score of every window of the reference with the bitset engine
+
+    Args:
+        reference (_BitsetReference): the reference sequence encoded for the bitset engine
+        query (str): the query sequence
+
+    Returns:
+        scores (list[int]): the i-th element is the score of the window starting at position i
+    """
+    
+    counters, window = _bitsetMatchCounters(reference, query)
+    offsets = window.bit_length()
+    matches = [0] * offsets
+    
+    for k, counter in enumerate(counters):
+        column = bin((counter & window) | (1 << offsets))[:2:-1]
+        for i, bit in enumerate(column):
+            if bit == '1':
+                matches[i] += 1 << k
+    
+    return [2*match - len(query) for match in matches]
+
+
+def _bitsetBestOffset(reference:_BitsetReference, query:str)->tuple:
+    """selects the leftmost best window with the bitset engine without extracting every single score
+
+    The highest count is built from the most significant counter bit down, keeping at every step only the windows 
+    that can still reach it, the lowest bit left is the leftmost best window.
+
+    Args:
+        reference (_BitsetReference): the reference sequence encoded for the bitset engine
+        query (str): the query sequence
+
+    Returns:
+        position (int): the leftmost position with the highest score
+        best score (int): the highest score
+    """
+    
+    counters, candidates = _bitsetMatchCounters(reference, query)
+    matches = 0
+    
+    for k in range(len(counters)-1, -1, -1):
+        if candidates & counters[k]:
+            candidates &= counters[k]
+            matches |= 1 << k
+    
+    return (candidates & -candidates).bit_length() - 1, 2*matches - len(query)
+
+
+def _batchedScoreTiles(reference, queries:List[str], tileBytes:int, matrix:'SubstitutionMatrix'=None):
+    """scores many queries of the same length against every window of the reference, one tile of queries and offsets 
+    at a time: for every symbol the indicator matrix of the windows is multiplied by the (weighted) indicator matrix 
+    of the queries, which turns the whole (queries x offsets) scoring into a few matrix products. The queries are 
+    split in blocks whose indicator matrices take about tileBytes, so that the memory does not grow with the batch
+
+    Args:
+        reference (np.ndarray): the reference sequence encoded via _numpyEncode, or via _alphabetEncode with a matrix
+        queries (list[str]): the queries, all of the same length
+        tileBytes (int): the approximate memory used by every tile
+        matrix (SubstitutionMatrix, optional): the scoring, defaults to None i.e. score_alignment
+
+    Yields:
+        first (int): the index of the first query of the tile
+        start (int): the first offset of the tile
+        scores (np.ndarray): (tile queries x tile offsets) matrix of scores, int64 unless the matrix has float weights
+    """
+    
+    length = len(queries[0])
+    offsets = len(reference) - length + 1
+    windows = np.lib.stride_tricks.sliding_window_view(reference, length)
+    dtype = np.float32 if matrix is None else np.float64
+    
+    # every symbol has a (queries x length) factor, a block of queries holds them all within tileBytes
+    symbols = len(set().union(*queries)) if matrix is None else len(SubstitutionMatrix.ALPHABET)
+    rows = max(min(tileBytes // (np.dtype(dtype).itemsize * length * max(symbols, 1)), len(queries)), 1)
+    tile = max(min(tileBytes // (np.dtype(dtype).itemsize * max(length, rows)), offsets), 1)
+    
+    for first in range(0, len(queries), rows):
+        block = queries[first:first+rows]
+        
+        if matrix is None:
+            # float32 products of 0/1 values are exact as long as the query is shorter than 2**24
+            codes = np.stack([_numpyEncode(query) for query in block])
+            factors = [(symbol, (codes == symbol).astype(np.float32)) for symbol in np.unique(codes) 
+                       if symbol not in (ord('X'), ord('-'))]
+        else:
+            # the factor of a reference symbol holds the weight of every query position against it
+            weights = matrix.array().astype(np.float64)
+            indices = np.stack([_alphabetEncode(query) for query in block])
+            factors = [(symbol, weights[symbol][indices]) for symbol in range(len(SubstitutionMatrix.ALPHABET))]
+            factors = [(symbol, factor) for symbol, factor in factors if factor.any()]
+        
+        for start in range(0, offsets, tile):
+            windowBlock = windows[start:start+tile]
+            scores = np.zeros((len(block), len(windowBlock)), dtype=dtype)
+            
+            for symbol, factor in factors:
+                scores += factor @ (windowBlock == symbol).astype(dtype).T
+            
+            if matrix is None:
+                yield first, start, 2*np.rint(scores).astype(np.int64) - length
+            else:
+                yield first, start, np.rint(scores).astype(np.int64) if matrix.integral else scores
+
+
+def _batchedBestOffsets(reference, queries:List[str], tileBytes:int=None, matrix:'SubstitutionMatrix'=None)->List[tuple]:
+    """finds the leftmost best window of many queries of the same length scoring them all together
+
+    Args:
+        reference (np.ndarray): the reference sequence encoded via _numpyEncode, or via _alphabetEncode with a matrix
+        queries (list[str]): the queries, all of the same length
+        tileBytes (int, optional): the approximate memory used by every tile. Defaults to BATCH_TILE_BYTES.
+        matrix (SubstitutionMatrix, optional): the scoring, defaults to None i.e. score_alignment
+
+    Returns:
+        alignments (list[tuple[int, int]]): position and score of every query, in the given order
+    """
+    
+    bestPos, bestScores = np.zeros(len(queries), dtype=np.int64), None
+    
+    # the tiles of a block of queries are visited left to right and only strictly higher scores replace the best 
+    # ones (leftmost tie-break)
+    for first, start, scores in _batchedScoreTiles(reference, queries, tileBytes or BATCH_TILE_BYTES, matrix):
+        rows = slice(first, first + len(scores))
+        if matrix is not None and not matrix.integral:
+            tileBest, tileScores = map(np.array, zip(*[_exactMatrixBest(reference, query, matrix, row, start)
+                                                       for query, row in zip(queries[rows], scores)]))
+            tileBest -= start
+        else:
+            tileBest = scores.argmax(axis=1)
+            tileScores = scores[np.arange(len(scores)), tileBest]
+        if bestScores is None:
+            bestScores = np.empty(len(queries), dtype=tileScores.dtype)
+        if start == 0:
+            bestPos[rows], bestScores[rows] = tileBest, tileScores
+            continue
+        better = tileScores > bestScores[rows]
+        bestPos[rows][better], bestScores[rows][better] = start + tileBest[better], tileScores[better]
+    
+    return [(int(pos), score.item()) for pos, score in zip(bestPos, bestScores)]
+
+
+def _batchedOffsetScores(reference, query:str):
+    """evaluates the score_alignment score of every window of the reference with the batched engine
+
+    Args:
+        reference (np.ndarray): the reference sequence encoded via _numpyEncode
+        query (str): the query sequence
+
+    Returns:
+        scores (np.ndarray): int64 array, the i-th element is the score of the window starting at position i
+    """
+    
+    return np.concatenate([tile[0] for _, _, tile in _batchedScoreTiles(reference, [query], BATCH_TILE_BYTES)])
+
+
+def _bestOffset(scores)->tuple:
+    """selects the leftmost offset holding the maximum score
+
+    Args:
+        scores (np.ndarray | list[int]): the score of every offset
+
+    Returns:
+        position (int): the leftmost position with the highest score
+        best score (int): the highest score
+    """
+    if _isArray(scores):
+        pos = int(np.argmax(scores))
+        return pos, scores[pos].item()
+
+    best = max(scores)
+    return scores.index(best), best
+
+
+def _boundedScore(window:str, query:str, threshold)->int:
+    """evaluates the score_alignment score of a window, giving up as soon as it cannot exceed the threshold
+
+    Args:
+        window (str | PackedSequence): the reference window, as long as the query
+        query (str): the query sequence
+        threshold (int | float): the score to be beaten
+
+    Returns:
+        score (int | None): the score of the window, None if it is not higher than the threshold
+    """
+    
+    # every non matching position takes 2 off the best score the window can still reach
+    score = len(query)
+    for base, other in zip(window, query):
+        if base != other or base == 'X' or base == '-':
+            score -= 2
+            if score <= threshold:
+                return None
+    
+    return score
+
+
+def _maximumScore(scoringFunction, query:str):
+    """upper bound of the score of any window, for scoring functions declaring a maxPositionScore attribute
+
+    Args:
+        scoringFunction (function): the scoring function in use
+        query (str): the query sequence
+
+    Returns:
+        bound (int | float | None): the highest score a window can get, None if the scoring function does not declare it
+    """
+    
+    maxPositionScore = getattr(scoringFunction, 'maxPositionScore', None)
+    return None if maxPositionScore is None else maxPositionScore * len(query)
+
+
+class SubstitutionMatrix():
+    ALPHABET = 'ACGTX-'
+    
+    def __init__(self, weights:dict=None, match=1, mismatch=-1):
+        """A declarative scoring function: the score of a window is the sum, over its positions, of the weight of the
+        pair (reference base, query base). Unlike an arbitrary scoring function it can be used by the numpy, fft and 
+        batch engines, and it can be called as a scoring function by the python one.
+        
+        The pairs not given in weights score match when the two bases are equal and are neither X nor -, mismatch 
+        otherwise, so that SubstitutionMatrix() scores exactly as score_alignment. Bases outside ALPHABET are scored as X.
+
+        Args:
+            weights (dict[str | tuple, int | float], optional): the weight of a pair, keyed by the reference base followed
+                by the query base (e.g. {'AG': 0, 'GA': 0} to not penalize these transitions). Defaults to None.
+            match (int | float, optional): the weight of two equal bases. Defaults to 1.
+            mismatch (int | float, optional): the weight of two different bases, or of X and -. Defaults to -1.
+
+        Raises:
+            ValueError: if a pair contains a base outside ALPHABET
+            TypeError: if a weight is not a number
+        """
+        
+        table = [[match if a == b and a not in 'X-' else mismatch for b in self.ALPHABET] for a in self.ALPHABET]
+        
+        for pair, weight in (weights or {}).items():
+            if len(pair) != 2 or pair[0] not in self.ALPHABET or pair[1] not in self.ALPHABET:
+                raise ValueError(f'Invalid pair {pair!r}, both bases should be one of {self.ALPHABET}')
+            table[self.ALPHABET.index(pair[0])][self.ALPHABET.index(pair[1])] = weight
+        
+        if not all(isinstance(weight, (int, float)) for row in table for weight in row):
+            raise TypeError('The weights of a substitution matrix should be integers or floats')
+        
+        self.weights = tuple(tuple(row) for row in table)
+        self.integral = all(isinstance(weight, int) for row in table for weight in row)
+        self.maxPositionScore = max(max(row) for row in table)
+        self.__index = {base: i for i, base in enumerate(self.ALPHABET)}
+    
+    
+    def __call__(self, alignment:'Alignment', seq1:str, seq2:str):
+        """scores two sequences of the same length, with the signature of Alignment.score_alignment
+
+        Raises:
+            ValueError: if the length of the two sequence is not equal
+
+        Returns:
+            score (int | float): the sum of the weights of the aligned pairs
+        """
+        
+        if len(seq1) != len(seq2) or not len(seq1):
+            raise ValueError('Lengths of the two sequences should match or the two sequence should not be empty')
+        
+        index = self.__index
+        return sum(self.weights[index.get(a, 4)][index.get(b, 4)] for a, b in zip(seq1, seq2))
+    
+    
+    def array(self):
+        """returns the weights as a (reference base x query base) numpy array, int64 or float64"""
+        
+        return np.array(self.weights, dtype=np.int64 if self.integral else np.float64)
+    
+    
+    def __eq__(self, other)->bool:
+        return isinstance(other, SubstitutionMatrix) and self.weights == other.weights
+    
+    
+    def __hash__(self)->int:
+        return hash(self.weights)
+    
+    
+    def __repr__(self)->str:
+        return f'SubstitutionMatrix({self.weights!r})'
+
+
+def _alphabetEncode(sequence:str):
+    """encodes a sequence as the index of every base in SubstitutionMatrix.ALPHABET, bases outside it count as X
+
+    Args:
+        sequence (str | PackedSequence | np.ndarray): the sequence to be encoded, an array holds _numpyEncode codes
+
+    Returns:
+        indices (np.ndarray): int8 array of indices
+    """
+    
+    codes = _numpyEncode(sequence)
+    table = np.full(256, SubstitutionMatrix.ALPHABET.index('X'), dtype=np.int8)
+    for i, base in enumerate(SubstitutionMatrix.ALPHABET):
+        table[ord(base)] = i
+    
+    if codes.dtype == np.uint8:
+        return table[codes]
+    return np.where(codes < 256, table[np.minimum(codes, 255)], table[ord('X')])
+
+
+def _matrixOffsetScores(reference, query:str, matrix:SubstitutionMatrix):
+    """evaluates the score of the query against every window of the reference at once with a substitution matrix
+
+    The weights are added position after position, in the same order as SubstitutionMatrix.__call__, so that
+    float weights give exactly the same sums.
+
+    Args:
+        reference (np.ndarray): the reference sequence encoded via _alphabetEncode
+        query (str): the query sequence
+        matrix (SubstitutionMatrix): the scoring
+
+    Returns:
+        scores (np.ndarray): the i-th element is the score of the window starting at position i
+    """
+    
+    weights, query = matrix.array(), _alphabetEncode(query)
+    length, offsets = len(query), len(reference) - len(query) + 1
+    scores = np.zeros(offsets, dtype=weights.dtype)
+    
+    if length <= offsets or not matrix.integral:
+        for j, symbol in enumerate(query):
+            scores += weights[:, symbol][reference[j:j+offsets]]
+    else:
+        for i in range(offsets):
+            scores[i] = weights[reference[i:i+length], query].sum()
+    
+    return scores
+
+
+def _fftMatrixOffsetScores(reference:_FFTReference, query:str, matrix:SubstitutionMatrix):
+    """evaluates the score of every window with a substitution matrix via one cross-correlation per reference symbol,
+    between its indicator and the weights of the query positions against it. Integer weights give exact scores, 
+    float ones are subject to the fft rounding (see _exactMatrixBest).
+
+    Args:
+        reference (_FFTReference): the reference sequence encoded for the fft engine from its _alphabetEncode indices
+        query (str): the query sequence
+        matrix (SubstitutionMatrix): the scoring
+
+    Returns:
+        scores (np.ndarray): the i-th element is the score of the window starting at position i
+    """
+    
+    weights, query = matrix.array(), _alphabetEncode(query)
+    offsets = len(reference.codes) - len(query) + 1
+    correlation = np.zeros(reference.size // 2 + 1, dtype=np.complex128)
+    
+    for symbol in range(len(SubstitutionMatrix.ALPHABET)):
+        factor = weights[symbol][query]
+        if factor.any():
+            correlation += reference.spectrum(symbol) * np.conj(np.fft.rfft(factor, reference.size))
+    
+    scores = np.fft.irfft(correlation, reference.size)[:offsets]
+    return np.rint(scores).astype(np.int64) if matrix.integral else scores
+
+
+def _exactMatrixBest(reference, query:str, matrix:SubstitutionMatrix, scores, start:int=0)->tuple:
+    """selects the leftmost best window from scores affected by rounding errors (float weights with the fft and batch
+    engines): the windows within the error bound from the highest score are scored again exactly, in the same order 
+    as SubstitutionMatrix.__call__
+
+    Args:
+        reference (np.ndarray): the reference sequence encoded via _alphabetEncode
+        query (str): the query sequence
+        matrix (SubstitutionMatrix): the scoring
+        scores (np.ndarray): the approximate score of the windows starting at start, start + 1, ...
+        start (int, optional): the offset of the first score. Defaults to 0.
+
+    Returns:
+        position (int): the leftmost position with the highest score
+        best score (float): the highest score
+    """
+    
+    weights, query = matrix.array(), _alphabetEncode(query)
+    tolerance = 1e-6 * max(1.0, float(np.abs(weights).max()) * len(query))
+    candidates = start + np.flatnonzero(scores >= scores.max() - tolerance)
+    exact = np.zeros(len(candidates), dtype=np.float64)
+    
+    for j, symbol in enumerate(query):
+        exact += weights[:, symbol][reference[candidates + j]]
+    
+    best = int(np.argmax(exact))
+    return int(candidates[best]), exact[best].item()
+
+
+def _topOffsets(scores, topK:int=None, minScore=None)->List[tuple]:
+    """selects the topK best offsets and/or the ones scoring at least minScore without sorting every score: numpy
+    arrays are partitioned around the topK-th score, lists go through a bounded heap
+
+    Args:
+        scores (np.ndarray | list[int]): the score of every offset
+        topK (int, optional): the maximum number of offsets selected. Defaults to None, i.e. no limit.
+        minScore (int | float, optional): the lowest score selected. Defaults to None, i.e. no threshold.
+
+    Returns:
+        hits (list[tuple[int, int]]): position and score of the offsets selected, highest score first and leftmost 
+            position first among equal scores
+    """
+    
+    if _isArray(scores):
+        selected = np.flatnonzero(scores >= minScore) if minScore is not None else np.arange(len(scores))
+        
+        if topK is not None and topK < len(selected):
+            values = scores[selected]
+            kth = np.partition(values, len(values) - topK)[len(values) - topK]
+            above = selected[values > kth]
+            selected = np.concatenate([above, selected[values == kth][:topK - len(above)]])
+        
+        order = np.lexsort((selected, -scores[selected]))
+        return [(int(pos), scores[pos].item()) for pos in selected[order]]
+    
+    return _selectHits(enumerate(scores), topK, minScore)
+
+
+def _selectHits(hits, topK:int=None, minScore=None)->List[tuple]:
+    """selects, from (position, score) pairs, the topK best ones and/or the ones scoring at least minScore
+
+    Args:
+        hits (Iterable[tuple[int, int]]): the candidate positions and scores
+        topK (int, optional): the maximum number of hits selected. Defaults to None, i.e. no limit.
+        minScore (int | float, optional): the lowest score selected. Defaults to None, i.e. no threshold.
+
+    Returns:
+        hits (list[tuple[int, int]]): the hits selected, highest score first and leftmost position first among equal scores
+    """
+    
+    if minScore is not None:
+        hits = (hit for hit in hits if hit[1] >= minScore)
+    
+    if topK is not None:
+        return heapq.nlargest(topK, hits, key=lambda hit: (hit[1], -hit[0]))
+    return sorted(hits, key=lambda hit: (-hit[1], hit[0]))
+
+
+# name -> (reference encoder, offsets scorer, best offset finder or None to select from the scores),
+# every engine reproduces score_alignment exactly
+_ENGINES = {
+    'numpy': (_numpyEncode, _numpyOffsetScores, None),
+    'fft': (_FFTReference, _fftOffsetScores, None),
+    'bitset': (_BitsetReference, _bitsetOffsetScores, _bitsetBestOffset),
+    'batch': (_numpyEncode, _batchedOffsetScores, lambda reference, query: _batchedBestOffsets(reference, [query])[0]),
+}
+
+_NUMPY_ENGINES = {'numpy', 'fft', 'batch'}
+
+# engines supporting a SubstitutionMatrix: name -> (encoding name, reference encoder, offsets scorer(reference, query, matrix), 
+# best offset finder or None), the encodings are shared by the engines using the same name
+_MATRIX_ENGINES = {
+    'numpy': ('alphabet', _alphabetEncode, _matrixOffsetScores, None),
+    'fft': ('fft-alphabet', lambda reference: _FFTReference(_alphabetEncode(reference)), _fftMatrixOffsetScores, 
+            lambda reference, query, matrix: _bestOffset(_fftMatrixOffsetScores(reference, query, matrix)) if matrix.integral 
+            else _exactMatrixBest(reference.codes, query, matrix, _fftMatrixOffsetScores(reference, query, matrix))),
+    'batch': ('alphabet', _alphabetEncode, 
+              lambda reference, query, matrix: np.concatenate([tile[0] for _, _, tile in _batchedScoreTiles(reference, [query], BATCH_TILE_BYTES, matrix)]),
+              lambda reference, query, matrix: _batchedBestOffsets(reference, [query], matrix=matrix)[0]),
+}
+
+# engines scoring the reference encoding of another one: engine -> name of the encoding, so that it is built once.
+# Only the indexes expensive to build (k-mer index, suffix array) are stored in an IndexCache, the encodings of the
+# engines are a single pass over the reference, cheaper than fingerprinting it
+_SHARED_ENCODINGS = {'batch': 'numpy'}
+
+# engines spending their time in numpy calls which release the GIL, their partitions are scored by threads
+_GIL_RELEASING_ENGINES = {'numpy', 'fft', 'batch'}
+
+# query length from which the auto engine prefers the fft engine to the sliding numpy one
+FFT_MIN_QUERY_LENGTH = 256
+
+# number of offsets scored at once when a reference is scanned in chunks
+CHUNK_SIZE = 1 << 22
+
+# approximate memory used by every tile of the batched engine
+BATCH_TILE_BYTES = 1 << 26
+
+
+## K-MER SEED INDEX ---------------------------------------------------------------------------------------------
+
+# k-mer length used by the seed index of Alignment.find_best_alignment
+KMER_SIZE = 12
+
+
+class KmerIndex():
+    def __init__(self, reference:str, k:int=KMER_SIZE):
+        """Indexes the positions of every k-mer of a reference sequence, so that the offsets where a query may align 
+        with few mismatches can be found without scanning the whole reference.
+        
+        The k-mers are stored 2 bits per base as sorted integer keys with the matching positions next to them, the ones
+        containing X, - (which never match) or any character other than A, C, G and T are not indexed. Requires numpy.
+
+        Args:
+            reference (str | PackedSequence | np.ndarray): the reference sequence
+            k (int, optional): the k-mer length, between 1 and 31. Defaults to KMER_SIZE.
+
+        Raises:
+            ValueError: if k is not between 1 and 31
+            ImportError: if numpy is not installed
+        """
+        
+        if np is None:
+            raise ImportError('The k-mer index requires numpy to be installed')
+        if not 1 <= k <= 31:
+            raise ValueError('The k-mer length should be between 1 and 31')
+        
+        self.k = k
+        self.codes = _numpyEncode(reference)
+        
+        table = np.full(256, 4, dtype=np.uint8)
+        table[np.frombuffer(b'ACGT', dtype=np.uint8)] = np.arange(4, dtype=np.uint8)
+        bases = table[np.minimum(self.codes, 255)]
+        bases[self.codes > 255] = 4
+        
+        windows = max(len(bases) - k + 1, 0)
+        invalid = np.concatenate(([0], np.cumsum(bases > 3)))
+        positions = np.flatnonzero(invalid[k:] == invalid[:windows])
+        
+        keys = np.zeros(windows, dtype=np.uint64)
+        for j in range(k):
+            keys = keys * 4 + bases[j:j+windows]
+        keys = keys[positions]
+        
+        # the stable sort keeps the positions of every k-mer in increasing order
+        order = np.argsort(keys, kind='stable')
+        self.keys = keys[order]
+        self.positions = positions[order].astype(np.int32 if len(bases) < 2**31 else np.int64)
+    
+    
+    def toArrays(self)->dict:
+        """returns the arrays making up the index, see fromArrays
+
+        Returns:
+            arrays (dict[str, np.ndarray]): the index arrays
+        """
+        return {'k': np.array(self.k), 'codes': self.codes, 'keys': self.keys, 'positions': self.positions}
+    
+    
+    @classmethod
+    def fromArrays(cls, arrays:dict)->'KmerIndex':
+        """rebuilds an index from the arrays returned by toArrays (e.g. memory mapped from an IndexCache)
+
+        Args:
+            arrays (dict[str, np.ndarray]): the index arrays
+
+        Returns:
+            index (KmerIndex): the index
+        """
+        
+        index = cls.__new__(cls)
+        index.k, index.codes, index.keys, index.positions = int(arrays['k']), arrays['codes'], arrays['keys'], arrays['positions']
+        return index
+    
+    
+    def lookup(self, kmer:str):
+        """returns the positions where a k-mer occurs in the reference
+
+        Args:
+            kmer (str): the k-mer, it must be k bases long
+
+        Returns:
+            positions (np.ndarray): the positions in increasing order, empty if the k-mer is not indexed
+        """
+        
+        lo, hi = self.__range(kmer)
+        return self.positions[lo:hi]
+    
+    
+    def __range(self, kmer:str)->tuple:
+        """returns the slice of the sorted keys holding the given k-mer"""
+        
+        key = 0
+        for base in kmer:
+            if base not in 'ACGT':
+                return 0, 0
+            key = key * 4 + 'ACGT'.index(base)
+        
+        key = np.uint64(key)
+        return int(np.searchsorted(self.keys, key, 'left')), int(np.searchsorted(self.keys, key, 'right'))
+    
+    
+    def candidates(self, query:str, maxMismatches:int):
+        """returns the offsets where the query may align with at most maxMismatches non matching positions
+
+        The query is split in maxMismatches + 1 segments: by the pigeonhole principle at least one of them matches
+        the reference exactly at any such offset, hence so does every k-mer of that segment. The rarest k-mer of every
+        segment is looked up, segments containing X or - can never match exactly and are skipped.
+
+        Args:
+            query (str): the query, made of A, C, G, T, X and - only
+            maxMismatches (int): the maximum number of non matching positions, the query must be at least 
+                (maxMismatches + 1) * k bases long
+
+        Returns:
+            offsets (np.ndarray): the candidate offsets in increasing order
+        """
+        
+        length, segments = len(query), maxMismatches + 1
+        bounds = [length * i // segments for i in range(segments + 1)]
+        offsets = [np.zeros(0, dtype=np.int64)]
+        
+        for start, stop in zip(bounds, bounds[1:]):
+            if 'X' in query[start:stop] or '-' in query[start:stop]:
+                continue
+            
+            ranges = [(self.__range(query[j:j+self.k]), j) for j in range(start, stop - self.k + 1)]
+            (lo, hi), j = min(ranges, key=lambda item: item[0][1] - item[0][0])
+            offsets.append(self.positions[lo:hi].astype(np.int64) - j)
+        
+        offsets = np.unique(np.concatenate(offsets))
+        return offsets[(offsets >= 0) & (offsets <= len(self.codes) - length)]
+    
+    
+    def score(self, offsets, query:str, tile:int=1 << 20):
+        """evaluates the score_alignment score of the query at the given offsets
+
+        Args:
+            offsets (np.ndarray): the offsets to be scored
+            query (str): the query sequence
+            tile (int, optional): the maximum number of bases gathered at once. Defaults to 1M.
+
+        Returns:
+            scores (np.ndarray): int64 array, the score of every offset
+        """
+        
+        codes = _numpyEncode(query)
+        valid = (codes != ord('X')) & (codes != ord('-'))
+        step = max(tile // len(codes), 1)
+        matches = np.concatenate([np.zeros(0, dtype=np.int64)] + [
+            ((self.codes[offsets[i:i+step, None] + np.arange(len(codes))] == codes) & valid).sum(axis=1)
+            for i in range(0, len(offsets), step)
+        ])
+        
+        return 2*matches - len(codes)
+
+
+## SUFFIX ARRAY -------------------------------------------------------------------------------------------------
+
+class SuffixArray():
+    def __init__(self, reference:str):
+        """Sorts every suffix of a reference sequence, so that all the exact occurrences of a query can be found with 
+        a binary search in O(m log n) instead of scanning the reference. Requires numpy.
+        
+        The array is built by prefix doubling: at every round the suffixes are ranked by their first 2k characters 
+        combining the ranks of their first k and next k characters, until every rank is distinct.
+
+        Args:
+            reference (str | PackedSequence | np.ndarray): the reference sequence
+
+        Raises:
+            ImportError: if numpy is not installed
+        """
+        
+        if np is None:
+            raise ImportError('The suffix array requires numpy to be installed')
+        
+        codes = _numpyEncode(reference)
+        self.text = codes.tobytes().decode('latin-1' if codes.dtype == np.uint8 else 'utf-32-le')
+        
+        n = len(codes)
+        rank = np.unique(codes, return_inverse=True)[1].astype(np.int64)
+        self.suffixes = np.argsort(rank, kind='stable')
+        k = 1
+        
+        while n and rank[self.suffixes[-1]] < n - 1:
+            following = np.zeros(n, dtype=np.int64)
+            following[:n-k] = rank[k:] + 1
+            keys = rank * (n + 1) + following
+            
+            self.suffixes = np.argsort(keys, kind='stable')
+            keys = keys[self.suffixes]
+            rank[self.suffixes] = np.concatenate(([0], np.cumsum(keys[1:] != keys[:-1])))
+            k *= 2
+    
+    
+    def toArrays(self)->dict:
+        """returns the arrays making up the suffix array, see fromArrays
+
+        Returns:
+            arrays (dict[str, np.ndarray]): the suffix array arrays
+        """
+        
+        dtype = np.uint8 if self.text.isascii() else np.uint32
+        return {'codes': _numpyEncode(self.text).astype(dtype, copy=False), 'suffixes': self.suffixes}
+    
+    
+    @classmethod
+    def fromArrays(cls, arrays:dict)->'SuffixArray':
+        """rebuilds a suffix array from the arrays returned by toArrays (e.g. memory mapped from an IndexCache)
+
+        Args:
+            arrays (dict[str, np.ndarray]): the suffix array arrays
+
+        Returns:
+            index (SuffixArray): the suffix array
+        """
+        
+        index = cls.__new__(cls)
+        codes = arrays['codes']
+        index.text = codes.tobytes().decode('latin-1' if codes.dtype == np.uint8 else 'utf-32-le')
+        index.suffixes = arrays['suffixes']
+        return index
+    
+    
+    def occurrences(self, query:str):
+        """returns the positions where the query occurs exactly in the reference
+
+        Args:
+            query (str): the query sequence
+
+        Returns:
+            positions (np.ndarray): the positions of the occurrences, in suffix order
+        """
+        
+        length, text, suffixes = len(query), self.text, self.suffixes
+        lo, hi = 0, len(suffixes)
+        
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if text[suffixes[mid]:suffixes[mid] + length] < query:
+                lo = mid + 1
+            else:
+                hi = mid
+        
+        first, hi = lo, len(suffixes)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if text[suffixes[mid]:suffixes[mid] + length] == query:
+                lo = mid + 1
+            else:
+                hi = mid
+        
+        return suffixes[first:lo]
+    
+    
+    def find(self, query:str)->int:
+        """returns the leftmost exact occurrence of the query in the reference
+
+        Args:
+            query (str): the query sequence
+
+        Returns:
+            position (int): the leftmost position, -1 if the query does not occur
+        """
+        
+        positions = self.occurrences(query)
+        return int(positions.min()) if len(positions) else -1
+
+
+## INDEX CACHE --------------------------------------------------------------------------------------------------
+
+# version of the on disk format of the IndexCache, part of every key so that old artifacts are never loaded
+INDEX_CACHE_VERSION = 1
+
+# the number of references whose fingerprint is remembered by an Alignment
+FINGERPRINT_CACHE_SIZE = 8
+
+
+def _referenceFingerprint(reference)->str:
+    """hashes the content of a normalized reference, any form of the same sequence gets the same fingerprint
+
+    Args:
+        reference (str | PackedSequence | MappedSequence | np.ndarray): the reference sequence
+
+    Returns:
+        fingerprint (str): the hex sha256 of the format version, the code width and the sequence codes
+    """
+    
+    digest = hashlib.sha256(f'v{INDEX_CACHE_VERSION}'.encode())
+    
+    if _isArray(reference):
+        digest.update(b'uint8' if reference.dtype == np.uint8 else b'uint32')
+        digest.update(reference.tobytes())
+    elif isinstance(reference, PackedSequence):
+        digest.update(b'uint8')
+        digest.update(reference.encode())
+    elif isinstance(reference, MappedSequence):
+        digest.update(b'uint8')
+        for chunk in reference.chunks():
+            digest.update(chunk.encode('latin-1'))
+    else:
+        isAscii = reference.isascii()
+        digest.update(b'uint8' if isAscii else b'uint32')
+        for i in range(0, len(reference), CHUNK_SIZE):
+            digest.update(reference[i:i+CHUNK_SIZE].encode('ascii' if isAscii else 'utf-32-le'))
+    
+    return digest.hexdigest()
+
+
+class IndexCache():
+    def __init__(self, directory:str, maxBytes:int=1 << 32):
+        """Keeps the encodings and indexes built by Alignment on disk, so that later runs on the same reference 
+        memory map them back instead of rebuilding them.
+        
+        Every artifact is a directory of .npy files stored under the fingerprint of the reference content. Artifacts are
+        written in a temporary directory which is then renamed in place, so that concurrent jobs never see partial ones.
+        When the total size goes above maxBytes the least recently used artifacts are removed. Requires numpy.
+
+        Args:
+            directory (str): the cache directory, created if missing
+            maxBytes (int, optional): the maximum size of the cache. Defaults to 4 GiB.
+        """
+        
+        self.directory = directory
+        self.maxBytes = maxBytes
+        os.makedirs(directory, exist_ok=True)
+    
+    
+    def __path(self, fingerprint:str, artifact:str)->str:
+        return os.path.join(self.directory, fingerprint, artifact)
+    
+    
+    def load(self, fingerprint:str, artifact:str)->dict:
+        """memory maps the arrays of a cached artifact
+
+        Args:
+            fingerprint (str): the fingerprint of the reference
+            artifact (str): the artifact name
+
+        Returns:
+            arrays (dict[str, np.ndarray] | None): the read only arrays, None if the artifact is not cached
+        """
+        
+        path = self.__path(fingerprint, artifact)
+        
+        try:
+            arrays = {name[:-4]: np.load(os.path.join(path, name), mmap_mode='r') 
+                      for name in os.listdir(path) if name.endswith('.npy')}
+            os.utime(path)
+        except (FileNotFoundError, ValueError):
+            return None
+        
+        return arrays
+    
+    
+    def store(self, fingerprint:str, artifact:str, arrays:dict)->None:
+        """writes the arrays of an artifact atomically and evicts the least recently used artifacts if needed
+
+        Args:
+            fingerprint (str): the fingerprint of the reference
+            artifact (str): the artifact name
+            arrays (dict[str, np.ndarray]): the arrays to be stored
+        """
+        
+        path = self.__path(fingerprint, artifact)
+        temporary = os.path.join(self.directory, f'.tmp-{uuid.uuid4().hex}')
+        os.makedirs(temporary)
+        
+        try:
+            for name, values in arrays.items():
+                np.save(os.path.join(temporary, f'{name}.npy'), values)
+            
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.rename(temporary, path)
+        except OSError:
+            # another job stored the same artifact first
+            shutil.rmtree(temporary, ignore_errors=True)
+        
+        self.evict(keep=path)
+    
+    
+    def evict(self, keep:str=None)->None:
+        """removes the least recently used artifacts until the cache fits in maxBytes
+
+        Args:
+            keep (str, optional): the path of an artifact never to be removed. Defaults to None.
+        """
+        
+        artifacts = []
+        
+        for fingerprint in os.listdir(self.directory):
+            if fingerprint.startswith('.'):
+                continue
+            # another job may remove the directory of a fingerprint while it is being listed
+            try:
+                names = os.listdir(os.path.join(self.directory, fingerprint))
+            except FileNotFoundError:
+                continue
+            for artifact in names:
+                path = self.__path(fingerprint, artifact)
+                try:
+                    size = sum(entry.stat().st_size for entry in os.scandir(path))
+                    artifacts.append((os.stat(path).st_mtime, size, path))
+                except FileNotFoundError:
+                    continue
+        
+        total = sum(size for _, size, _ in artifacts)
+        
+        for _, size, path in sorted(artifacts):
+            if total <= self.maxBytes:
+                break
+            if path != keep:
+                shutil.rmtree(path, ignore_errors=True)
+                total -= size
+                try:
+                    os.rmdir(os.path.dirname(path))
+                except OSError:
+                    pass
+
+
+## RESULT WRITERS ----------------------------------------------------------------------------------------------
+
+# number of characters buffered by a ResultWriter before they are written out
+WRITER_BUFFER_SIZE = 1 << 20
+
+
+class RecordResult(list):
+    def __init__(self, values:list, record:str, recordPosition:int):
+        """A result of Alignment.align_reads against a reference made of several records (see RecordIndex): the usual 
+        [reference portion, query, position, score] list, the position being the one in the concatenated reference, 
+        which also carries the record aligned to and the position inside it.
+
+        Args:
+            values (list): the elements of the result
+            record (str): the name of the record
+            recordPosition (int): the position inside the record
+        """
+        
+        super().__init__(values)
+        self.record, self.recordPosition = record, recordPosition
+
+
+class ResultWriter():
+    def __init__(self, output, reference=None, append:bool=False, compress:bool=None, 
+                 bufferSize:int=WRITER_BUFFER_SIZE, referenceName:str='reference', records:RecordIndex=None):
+        """Writes the results of Alignment.align_reads incrementally, one result at a time. The formatted results are 
+        buffered and written out bufferSize characters at a time with a single call. The header is written when the 
+        output is opened, unless results are appended to a non empty file.
+
+        Args:
+            output (str | TextIO): the path of the output file, or an open text stream (e.g. sys.stdout) which is never closed
+            reference (str | PackedSequence | MappedSequence, optional): the reference the results refer to. Defaults to None.
+            append (bool, optional): if True the results are appended to the file. Defaults to False.
+            compress (bool, optional): if True the file is gzip compressed. Defaults to None, i.e. if its name ends with .gz
+            bufferSize (int, optional): the number of characters buffered. Defaults to WRITER_BUFFER_SIZE.
+            referenceName (str, optional): the name of the reference, where the format requires one. Defaults to 'reference'.
+            records (RecordIndex, optional): the records of the reference, if it is made of several ones the record 
+                and the position inside it are written as well. Defaults to None.
+        """
+        
+        self.reference, self.referenceName, self.records = reference, referenceName, records
+        self.count = self.characters = 0
+        self.__buffer, self.__size, self.__bufferSize = [], 0, bufferSize
+        self.__owned = isinstance(output, str)
+        header = True
+        
+        if self.__owned:
+            header = not (append and os.path.exists(output) and os.path.getsize(output))
+            mode = 'at' if append else 'wt'
+            if output.endswith('.gz') if compress is None else compress:
+                self.__stream = gzip.open(output, mode, encoding='UTF-8')
+            else:
+                self.__stream = open(output, mode, encoding='UTF-8', buffering=bufferSize)
+        else:
+            self.__stream = output
+        
+        if header:
+            self.writeHeader()
+    
+    
+    def writeHeader(self)->None:
+        """writes the header of the format, if any"""
+        pass
+    
+    
+    def format(self, result:list)->str:
+        """formats a single result
+
+        Args:
+            result (list[str, str, int, int] | list[str, str, int, int, list]): the result, with its hits if any
+
+        Returns:
+            text (str): the formatted result, including its line terminator
+        """
+        raise NotImplementedError
+    
+    
+    def write(self, result:list)->None:
+        """buffers a single result, the buffer is written out once it holds bufferSize characters
+
+        Args:
+            result (list[str, str, int, int] | list[str, str, int, int, list]): the result, with its hits if any
+        """
+        
+        self.count += 1
+        self._emit(self.format(result))
+    
+    
+    def writeAll(self, results:List[list])->List[list]:
+        """buffers every result of a list
+
+        Args:
+            results (list[list]): the results
+
+        Returns:
+            results (list[list]): the results given
+        """
+        
+        for result in results:
+            self.write(result)
+        return results
+    
+    
+    def _emit(self, text:str)->None:
+        self.__buffer.append(text)
+        self.__size += len(text)
+        self.characters += len(text)
+        if self.__size >= self.__bufferSize:
+            self.flush()
+    
+    
+    def flush(self)->None:
+        """writes out the buffered text"""
+        
+        if self.__buffer:
+            self.__stream.write(''.join(self.__buffer))
+            self.__buffer, self.__size = [], 0
+    
+    
+    def close(self)->None:
+        """writes out the buffered text and closes the output file, a stream given is only flushed"""
+        
+        self.flush()
+        if self.__owned:
+            self.__stream.close()
+        else:
+            self.__stream.flush()
+    
+    
+    def __enter__(self)->'ResultWriter':
+        return self
+    
+    
+    def __exit__(self, *args)->None:
+        self.close()
+
+
+class TextWriter(ResultWriter):
+    """the human readable layout of Alignment.prettyPrint, preceded by the whole reference"""
+    
+    def writeHeader(self)->None:
+        # a mapped reference is written chunk by chunk
+        if isinstance(self.reference, MappedSequence):
+            self._emit("Reference sequence : ")
+            for chunk in self.reference.chunks():
+                self._emit(chunk)
+            self._emit('\n'*2)
+        else:
+            self._emit(f"Reference sequence : {self.reference}" + '\n'*2)
+    
+    
+    def format(self, result:list)->str:
+        text = (f"Portion of the reference sequence : {result[0]}\n"
+                f"Sequence queried : {result[1]}\n"
+                f"Position for the best alignment in the reference sequence : {result[2]}\n"
+                f"best scoring obtained : {result[3]}\n")
+        if self.records is not None:
+            text += "Record of the best alignment : {}, position {}\n".format(*self.records.locate(result[2]))
+        if len(result) > 4:
+            text += f"Alignments found (position, score) : {', '.join(f'({pos}, {score})' for pos, score in result[4])}\n"
+        return text + '\n'*2
+
+
+class TSVWriter(ResultWriter):
+    """one tab separated line per result, the hits (if any) as a comma separated list of position:score, followed by 
+    the record and the position inside it for a reference made of several records"""
+    
+    def writeHeader(self)->None:
+        self._emit('reference\tquery\tposition\tscore\thits' + ('\trecord\trecord_position\n' if self.records is not None else '\n'))
+    
+    
+    def format(self, result:list)->str:
+        hits = ','.join(f'{pos}:{score}' for pos, score in result[4]) if len(result) > 4 else ''
+        if self.records is None:
+            return f'{result[0]}\t{result[1]}\t{result[2]}\t{result[3]}\t{hits}\n'
+        return '{}\t{}\t{}\t{}\t{}\t{}\t{}\n'.format(*result[:4], hits, *self.records.locate(result[2]))
+
+
+def _jsonNumber(value)->str:
+    """formats a score as a JSON number, integers directly"""
+    return str(value) if isinstance(value, int) else json.dumps(value)
+
+
+class JSONLinesWriter(ResultWriter):
+    """one JSON object per line and per result"""
+    
+    def format(self, result:list)->str:
+        # the record is assembled by hand, json.dumps on a whole dictionary would dominate the writing time
+        quote = json.encoder.encode_basestring_ascii
+        text = f'{{"reference":{quote(str(result[0]))},"query":{quote(str(result[1]))},"position":{result[2]},"score":{_jsonNumber(result[3])}'
+        if len(result) > 4:
+            text += ',"hits":[' + ','.join(f'[{pos},{_jsonNumber(score)}]' for pos, score in result[4]) + ']'
+        if self.records is not None:
+            record, pos = self.records.locate(result[2])
+            text += f',"record":{quote(record)},"record_position":{pos}'
+        return text + '}\n'
+
+
+class SAMWriter(ResultWriter):
+    """a SAM like tabular layout: ungapped alignments (CIGAR <length>M) with 1-based positions, the score in the AS tag
+    and the hits (if any) in the XA tag. The queries are named q1, q2, ... in the order they are written. For a 
+    reference made of several records every record is a reference sequence of its own, the empty ones are left out
+    of the header as SAM requires LN to be at least 1 (no alignment is ever located in them)."""
+    
+    def writeHeader(self)->None:
+        self._emit('@HD\tVN:1.6\tSO:unsorted\n')
+        if self.records is not None:
+            for name, length in zip(self.records.names, self.records.lengths):
+                if length:
+                    self._emit(f'@SQ\tSN:{name}\tLN:{length}\n')
+        elif self.reference:
+            self._emit(f'@SQ\tSN:{self.referenceName}\tLN:{len(self.reference)}\n')
+        self._emit('@PG\tID:Assignment9\tPN:Assignment9\n')
+    
+    
+    def __locate(self, position:int)->tuple:
+        return self.records.locate(position) if self.records is not None else (self.referenceName, position)
+    
+    
+    def format(self, result:list)->str:
+        score = f'AS:i:{result[3]}' if isinstance(result[3], int) else f'AS:f:{result[3]}'
+        name, pos = self.__locate(result[2])
+        text = (f'q{self.count}\t0\t{name}\t{pos + 1}\t255\t{len(result[1])}M\t*\t0\t0\t'
+                f'{result[1]}\t*\t{score}')
+        if len(result) > 4:
+            hits = ((self.__locate(pos), score) for pos, score in result[4])
+            text += '\tXA:Z:' + ''.join(f'{name},{pos + 1},{score};' for (name, pos), score in hits)
+        return text + '\n'
+
+
+# output formats of Alignment.prettyPrint, align_reads and iter_align_reads
+WRITERS = {'text': TextWriter, 'tsv': TSVWriter, 'jsonl': JSONLinesWriter, 'sam': SAMWriter}
+
+
+## METRICS ------------------------------------------------------------------------------------------------------
+
+class AlignmentMetrics():
     def __init__(self):
+        """Timings and counters of Alignment.align_reads, collected only when asked for (see its metrics parameter).
+        The counters are increased once per scan of the reference and not once per window, so that collecting
+        them costs next to nothing.
+
+        Attributes:
+            wallTime (dict[str, float]): the wall time in seconds spent in every stage of align_reads (reference, 
+                queries, hits, alignment, results, output)
+            cpuTime (dict[str, float]): the CPU time in seconds of this process spent in every stage, the one of 
+                worker processes is not included
+            windowsScored (int): the windows of the reference scored, a partitioned scan counting all of them
+            scoringCalls (int): the calls of the scoring function made by the python engine
+            resultCacheHits (int): the queries found in the result cache
+            resultCacheMisses (int): the queries not found in the result cache
+            encodingCacheHits (int): the reference encodings and indexes reused
+            encodingCacheMisses (int): the reference encodings and indexes built or loaded from the index cache
+            bytesRead (int): the bytes read from the reference and query files
+            bytesWritten (int): the characters of the results written out
+            engines (dict[str, str]): the engine used by every query aligned
+        """
+        
+        self.wallTime, self.cpuTime = {}, {}
+        self.windowsScored = self.scoringCalls = 0
+        self.resultCacheHits = self.resultCacheMisses = 0
+        self.encodingCacheHits = self.encodingCacheMisses = 0
+        self.bytesRead = self.bytesWritten = 0
+        self.engines = {}
+    
+    
+    def stage(self, name:str)->'_MetricsStage':
+        """times a stage, the time is added to the one already spent in the stage
+
+        Args:
+            name (str): the name of the stage
+
+        Returns:
+            timer (context manager): measures the wall and CPU time of its block
+        """
+        return _MetricsStage(self, name)
+    
+    
+    def counters(self, reset:bool=False)->dict:
+        """returns the counters, without the timings
+
+        Args:
+            reset (bool, optional): if True the counters start again from zero. Defaults to False.
+
+        Returns:
+            counters (dict): the value of every counter
+        """
+        
+        counters = {'windowsScored': self.windowsScored, 'scoringCalls': self.scoringCalls, 
+                    'resultCacheHits': self.resultCacheHits, 'resultCacheMisses': self.resultCacheMisses,
+                    'encodingCacheHits': self.encodingCacheHits, 'encodingCacheMisses': self.encodingCacheMisses,
+                    'bytesRead': self.bytesRead, 'bytesWritten': self.bytesWritten, 'engines': dict(self.engines)}
+        
+        if reset:
+            self.windowsScored = self.scoringCalls = 0
+            self.resultCacheHits = self.resultCacheMisses = 0
+            self.encodingCacheHits = self.encodingCacheMisses = 0
+            self.bytesRead = self.bytesWritten = 0
+            self.engines = {}
+        
+        return counters
+    
+    
+    def merge(self, counters:dict)->None:
+        """adds the counters of another collection (e.g. the ones of a worker process, see counters)
+
+        Args:
+            counters (dict): the counters to be added
+        """
+        
+        for name, value in counters.items():
+            if name == 'engines':
+                self.engines.update(value)
+            else:
+                setattr(self, name, getattr(self, name) + value)
+    
+    
+    def asDict(self)->dict:
+        """returns the timings and the counters as a JSON serializable dictionary"""
+        return {'wallTime': dict(self.wallTime), 'cpuTime': dict(self.cpuTime), **self.counters()}
+    
+    
+    def __repr__(self)->str:
+        return f'AlignmentMetrics({self.asDict()})'
+
+
+class _MetricsStage():
+    def __init__(self, metrics:AlignmentMetrics, name:str):
+        self.metrics, self.name = metrics, name
+    
+    
+    def __enter__(self)->'_MetricsStage':
+        self.wall, self.cpu = time.perf_counter(), time.process_time()
+        return self
+    
+    
+    def __exit__(self, *args)->None:
+        wallTime, cpuTime = self.metrics.wallTime, self.metrics.cpuTime
+        wallTime[self.name] = wallTime.get(self.name, 0.0) + time.perf_counter() - self.wall
+        cpuTime[self.name] = cpuTime.get(self.name, 0.0) + time.process_time() - self.cpu
+
+
+## PROCESS POOL WORKERS -----------------------------------------------------------------------------------------
+
+# state of a pool worker, set once by _initWorker and used by every _alignQueries call
+_WORKER = {}
+
+
+def _initWorker(reference, length:int, dtype:str, alignmentFunction, options:dict, indexCache:IndexCache, 
+                metrics:bool=False)->None:
+    """initializes a pool worker of Alignment.align_reads, attaching to the reference published in shared memory
+
+    The numpy based engines use the shared buffer directly (the ascii codes are already their encoding), the other 
+    ones need a string which is decoded once per worker. A mapped reference is mapped again by every worker.
+
+    Args:
+        reference (str): the name of the shared memory block, or the path of a mapped reference if dtype is None
+        length (int): the number of bytes of the reference in the shared memory block
+        dtype (str): the numpy dtype of the reference codes ('uint8' or 'uint32'), None for a mapped reference
+        alignmentFunction (Function): the scoring function
+        options (dict): the other parameters of Alignment.find_best_alignment (engine, chunkSize, maxMismatches, exactIndex, records)
+        indexCache (IndexCache): the index cache of the parent Alignment, if any
+        metrics (bool, optional): if True the counters of the worker are collected and sent back with the alignments.
+            Defaults to False.
+    """
+    
+    _WORKER.update(metrics=AlignmentMetrics() if metrics else None, alignmentFunction=alignmentFunction, options=options)
+    _WORKER['alignment'] = Alignment(indexCache, metrics=_WORKER['metrics'])
+    
+    if dtype is None:
+        _WORKER['reference'] = MappedSequence(reference)
+        return
+    
+    from multiprocessing import shared_memory
+    
+    _WORKER['memory'] = memory = shared_memory.SharedMemory(name=reference)
+    
+    vectorized = alignmentFunction is Alignment.score_alignment or isinstance(alignmentFunction, SubstitutionMatrix)
+    if np is not None and vectorized and (options['engine'] == 'auto' or options['engine'] in _NUMPY_ENGINES):
+        _WORKER['reference'] = np.frombuffer(memory.buf, dtype=dtype, count=length // np.dtype(dtype).itemsize)
+    else:
+        raw = bytes(memory.buf[:length])
+        _WORKER['reference'] = raw.decode('ascii') if dtype == 'uint8' else raw.decode('utf-32-le')
+
+
+def _alignQueries(queries:List[str])->tuple:
+    """aligns a chunk of queries inside a pool worker
+
+    Args:
+        queries (list[str]): the queries to be aligned, already validated
+
+    Returns:
+        alignments (list[tuple[int, int]]): position and score of every query
+        counters (dict | None): the counters collected while aligning them, None if they are not collected
+    """
+    
+    alignments = [_WORKER['alignment'].find_best_alignment(_WORKER['reference'], query, scoringFunction=_WORKER['alignmentFunction'],
+                                                           **_WORKER['options'])
+                  for query in queries]
+    
+    return alignments, None if _WORKER['metrics'] is None else _WORKER['metrics'].counters(reset=True)
+
+
+def _bestInPartition(reference:str, query:str, scoringFunction, engine:str, chunkSize:int)->tuple:
+    """finds the best alignment inside a partition of the reference, used by the partitioned find_best_alignment
+
+    Args:
+        reference (str): the portion of the reference covering the partition offsets
+        query (str): the query sequence
+        scoringFunction (Function): the scoring function
+        engine (str): the resolved scoring engine
+        chunkSize (int): see Alignment.find_best_alignment
+
+    Returns:
+        position (int): the leftmost best position inside the partition
+        best score (int): the best score inside the partition
+    """
+    
+    return Alignment().find_best_alignment(reference, query, scoringFunction=scoringFunction, engine=engine, chunkSize=chunkSize)
+
+
+async def _takeAsync(queries, count:int)->List[str]:
+    """takes the next count queries of an async iterator, fewer when it ends"""
+    
+    chunk = []
+    async for data in queries:
+        chunk.append(data)
+        if len(chunk) == count:
+            break
+    return chunk
+
+
+class Alignment():    
+    def __init__(self, indexCache:'IndexCache'=None, resultCacheSize:int=65536, metrics:'AlignmentMetrics'=None):
         """Initialize an empty Alignment object with no sequences.
         
-        Creates an Alignment instance with query and reference sequences set to None, 
-        preparing the object for subsequent sequence loading or assignment.
+        Creates an Alignment instance with query and reference sequences set to None, 
+        preparing the object for subsequent sequence loading or assignment.
+
+        Args:
+            indexCache (IndexCache | str, optional): the on disk cache (or the path of its directory) where the indexes
+                of the references (k-mer index and suffix array) are stored and loaded from. Defaults to None, i.e. no cache.
+            resultCacheSize (int, optional): the maximum number of (position, score) results remembered by align_reads
+                and iter_align_reads, the least recently used ones are dropped first. Defaults to 65536, 0 disables it.
+            metrics (AlignmentMetrics, optional): where the counters of every call (and the timings of align_reads)
+                are collected. Defaults to None, i.e. nothing is collected.
+        """
+
+        self.__querySequence = None
+        self.__referenceSequence = None
+        self.__records = None
+        self.__encodedReference = {}
+        self.__mappedReference = None
+        self.__fingerprints = OrderedDict()
+        self.__indexCache = IndexCache(indexCache) if isinstance(indexCache, str) else indexCache
+        self.__resultCache = OrderedDict()
+        self.__resultCacheSize = resultCacheSize
+        self.__resultCacheHits = 0
+        self.__resultCacheMisses = 0
+        # guards the result cache and the memos of the encodings and of the fingerprints, reentrant as encoding a
+        # reference may fingerprint it
+        self.__cacheLock = threading.RLock()
+        self.__ingestStats = {'bytes': 0, 'seconds': 0.0}
+        self.__metrics = metrics
+        self.__lastMetrics = metrics
+        
+            
+    ## SCORE ALIGNMENT FUNCTION ----------------------------------------------------------------------------------
+    
+    def score_alignment(self, seq1:str, seq2:str)->int:
+        """Evaluates the alignment score of two string
+
+        Args:
+            seq1 (str): the first sequence
+            seq2 (str): the second sequence
+
+        Raises:
+            ValueError: if the length of the two sequence is not equal
+
+        Returns:
+            score (int): the score alignment obtained
+        """
+        
+        if len(seq1) != len(seq2) or not len(seq1) or not len(seq2):
+            raise ValueError('Lengths of the two sequences should match or the two sequence should not be empty')
+        
+        return sum(1 if seq1[i] == seq2[i] and seq1[i] not in {'X', '-'} else -1 for i in range(len(seq1)))
+    
+    # every position scores at most 1, the scan stops as soon as a window scores len(query)
+    score_alignment.maxPositionScore = 1
+    
+    
+    ## ALIGNMENT READS
+    def align_reads(self, referenceSequence:str=None, querySequence:List[str]=None,
+                    pathReferenceSequence:str=None, pathQuerySequence:str=None,
+                    alignmentFunction=score_alignment, outputFile:str = True, engine:str = 'auto',
+                    chunkSize:int = None, workers:int = None, queriesPerTask:int = 64, 
+                    partitionWorkers:int = None, maxMismatches:int = None, exactIndex:bool = False,
+                    topK:int = None, minScore = None, outputFormat:str = 'text', appendOutput:bool = False,
+                    metrics = None) -> List[List[str]]:
+        """Align query sequences against a reference sequence using a specified alignment function.
+
+        Performs sequence alignment by finding the best matching positions of query sequences within a reference sequence. 
+        Supports flexible input methods including direct sequences, file paths, or previously set sequences.
+
+        Args:
+            referenceSequence (str | PackedSequence | MappedSequence): Optional direct reference sequence.
+            pathReferenceSequence (str): Optional path to the reference sequence file.
+            querySequence (str): Optional direct query sequences as a list or set.
+            pathQuerySequence (str): Optional path to the query sequence file.
+            alignmentFunction (Function | SubstitutionMatrix): Function used to score alignments, defaults to score_alignment.
+            outputFile (None|bool|str|ResultWriter): Controls where the results are going to be outputted, if a non empty string is given it's interpreted as
+                the path to a file where to print the data. If a True boolean is given, the prints occurs on screen (stdout). 
+                If a ResultWriter is given the results are added to it. If anything else is given, no print occurs. 
+            engine (str): The scoring engine used by find_best_alignment (auto, python, numpy, fft, bitset or batch), defaults to 'auto' 
+                which picks a vectorized engine whenever the default score_alignment is in use. With 'batch' the queries are 
+                grouped by length and every group is scored at once against the windows of the reference, BATCH_TILE_BYTES
+                of them at a time.
+            chunkSize (int): If given the reference is scanned chunkSize offsets at a time (see find_best_alignment) and a 
+                reference read from pathReferenceSequence is memory mapped instead of being loaded in memory.
+            workers (int): If greater than 1 the queries are aligned by a pool of that many processes, the reference is 
+                published once in shared memory and the results are identical (and in the same order) to the sequential run. 
+                The alignmentFunction must be picklable (i.e. defined at module level). Defaults to None, i.e. sequential.
+            queriesPerTask (int): The number of queries sent to a worker at a time. Defaults to 64.
+            partitionWorkers (int): If greater than 1 every single query is aligned by splitting the reference offsets 
+                among that many workers (see the workers parameter of find_best_alignment), useful for few long queries.
+                Defaults to None.
+            maxMismatches (int): If given the queries are aligned by the k-mer seed search, see find_best_alignment.
+                Defaults to None.
+            exactIndex (bool): If True every query is first looked up verbatim in a suffix array of the reference, 
+                see find_best_alignment. Defaults to False.
+            topK (int): If given the topK best alignments of every query are reported as well, see find_top_alignments.
+                Defaults to None.
+            minScore (int | float): If given the alignments of every query scoring at least minScore are reported as well, 
+                see find_top_alignments. Defaults to None.
+            outputFormat (str): The layout of the output (text, tsv, jsonl or sam), see prettyPrint. Defaults to 'text'.
+            appendOutput (bool): If True the results are appended to the output file. Defaults to False.
+            metrics (bool | AlignmentMetrics | Callable): If given the timings of every stage and the counters of the run
+                are collected, see AlignmentMetrics: True collects them in a new AlignmentMetrics, an AlignmentMetrics 
+                accumulates them over several runs and a callable is called with the new AlignmentMetrics at the end 
+                of the run. The last ones collected are returned by getMetrics. Defaults to None, i.e. the ones given 
+                to the constructor, if any.
+
+        Returns:
+            results (list[list[str, str, int, int]]): A list of alignment results, 
+            each containing [matched reference segment, query sequence, position in the reference sequence, score].
+            When topK or minScore is given every result also holds the list of the (position, score) hits of the query.
+            When the reference is made of several records (a FASTA or FASTQ file, see readRecords) no alignment spans
+            two of them and every result is a RecordResult, also carrying the record and the position inside it.
+
+        Raises:
+            ValueError: If no valid reference or query sequences are provided or sequences are invalid, or if queriesPerTask
+                is lower than 1.
+        """
+        
+        if not (referenceSequence or pathReferenceSequence or self.__referenceSequence):
+            raise ValueError('Before using align read you should either set reference sequence via setter or give a reference sequence'+
+                            'as a string via referenceSequence param or a path to a file containing a reference sequence via the path param')
+            
+        if not (querySequence or pathQuerySequence or self.__querySequence):
+            raise ValueError('Before using align read you should either set query sequence via setter or give a query sequence'+
+                            'as a string via querySequence param or a path to a file containing a query sequence via the path param')
+        
+        if queriesPerTask < 1:
+            raise ValueError('queriesPerTask should be at least 1')
+        
+        metrics, callback = (AlignmentMetrics(), metrics) if callable(metrics) else \
+            (AlignmentMetrics() if metrics is True else metrics or None, None)
+        previous, bytesRead = self.__metrics, self.__ingestStats['bytes']
+        self.__metrics = previous if metrics is None else metrics
+        stage = self.__stage
+        
+        try:
+            with stage('reference'):
+                referenceSequence, records = self.__resolveReference(referenceSequence, pathReferenceSequence, chunkSize)
+            
+            with stage('queries'):
+                if querySequence:        
+                    querySequence = list(map(lambda x:x.strip().upper(), querySequence))
+                    
+                    for seq in querySequence:
+                        if not self.checkSequenceValidity(seq):
+                            raise ValueError('Incorrect query sequence')
+                        
+                    self.__querySequence = querySequence
+                elif pathQuerySequence:
+                    # the ingest has already uppercased and validated the file
+                    self.__querySequence = self.readQueryData(path=pathQuerySequence)
+                
+                
+            self.__setReference(referenceSequence, records)
+            
+            alignment = []
+            
+            # duplicated queries are aligned once and already known ones are taken from the result cache
+            alignments = {data: self.__cachedResult(data, alignmentFunction) for data in dict.fromkeys(self.__querySequence)}
+            missing = [data for data, result in alignments.items() if result is None]
+            hits = None
+            
+            # the first hit is the best alignment, when it is selected
+            if topK is not None or minScore is not None:
+                with stage('hits'):
+                    hits = {data: self.find_top_alignments(self.__referenceSequence, data, alignmentFunction, engine, topK, minScore, 
+                                                           chunkSize, self.__records)
+                            for data in alignments}
+                    for data in missing:
+                        if hits[data]:
+                            alignments[data] = self.__storeResult(data, alignmentFunction, hits[data][0])
+                    missing = [data for data in missing if alignments[data] is None]
+            
+            with stage('alignment'):
+                if engine == 'batch' and not (workers and workers > 1) and not (chunkSize or partitionWorkers or maxMismatches is not None or exactIndex) \
+                        and not isinstance(self.__referenceSequence, MappedSequence) and self.__records is None:
+                    computed = self.__batchedAlignments(missing, alignmentFunction)
+                elif workers and workers > 1:
+                    computed = self.__parallelAlignments(missing, alignmentFunction, workers, queriesPerTask,
+                                                         engine=engine, chunkSize=chunkSize, maxMismatches=maxMismatches,
+                                                         exactIndex=exactIndex, records=self.__records)
+                else:
+                    computed = (self.find_best_alignment(self.__referenceSequence, data, scoringFunction=alignmentFunction, 
+                                                         engine=engine, chunkSize=chunkSize, workers=partitionWorkers,
+                                                         maxMismatches=maxMismatches, exactIndex=exactIndex, records=self.__records) 
+                                for data in missing)
+                
+                for data, result in zip(missing, computed):
+                    alignments[data] = self.__storeResult(data, alignmentFunction, result)
+            
+            with stage('results'):
+                for data in self.__querySequence:
+                    alignment.append(self.__result(data, *alignments[data]))
+                    if hits is not None:
+                        alignment[-1].append(hits[data])
+            
+            with stage('output'):
+                self.prettyPrint(alignment, outputFilePath=outputFile, outputFormat=outputFormat, append=appendOutput)
+        finally:
+            metrics = self.__finishMetrics(previous, bytesRead)
+        
+        if callback is not None:
+            callback(metrics)
+        
+        return alignment
+    
+    
+    def __batchedAlignments(self, queries:List[str], alignmentFunction)->List[tuple]:
+        """aligns the queries against the stored reference with the batched engine, one group of queries of the same
+        length at a time
+
+        Args:
+            queries (list[str]): the validated queries
+            alignmentFunction (Function | SubstitutionMatrix): the scoring function, score_alignment or a substitution matrix
+
+        Returns:
+            alignments (list[tuple[int, int]]): position and score of every query, in the given order
+        """
+        
+        groups = {}
+        for i, data in enumerate(queries):
+            groups.setdefault(len(data), []).append(i)
+        
+        alignments = [None] * len(queries)
+        
+        for length, indices in groups.items():
+            group = [queries[i] for i in indices]
+            
+            if len(self.__referenceSequence) <= length:
+                raise ValueError('reference sequence length should be higher than the query sequence length')
+            self.__resolveEngine('batch', alignmentFunction, group[0])
+            
+            if isinstance(alignmentFunction, SubstitutionMatrix):
+                name, encoder = _MATRIX_ENGINES['batch'][:2]
+                encoded = self.__encodeReference(self.__referenceSequence, name, encoder)
+                results = _batchedBestOffsets(encoded, group, matrix=alignmentFunction)
+            else:
+                results = _batchedBestOffsets(self.__encodeReference(self.__referenceSequence, 'batch'), group)
+            
+            for i, alignment in zip(indices, results):
+                alignments[i] = alignment
+            
+            if self.__metrics is not None:
+                self.__metrics.windowsScored += (len(self.__referenceSequence) - length + 1) * len(group)
+                self.__metrics.engines.update(dict.fromkeys(group, 'batch'))
+        
+        return alignments
+    
+    
+    def __parallelAlignments(self, queries:List[str], alignmentFunction, workers:int, queriesPerTask:int, **options):
+        """aligns the queries against the stored reference with a pool of processes
+
+        Args:
+            queries (list[str]): the validated queries
+            alignmentFunction (Function): the scoring function, it must be picklable
+            workers (int): the number of processes
+            queriesPerTask (int): the number of queries sent to a worker at a time
+            options: the other parameters of find_best_alignment (engine, chunkSize, maxMismatches, exactIndex, records)
+
+        Yields:
+            alignment (tuple[int, int]): position and score of every query, in the input order
+        """
+        
+        from multiprocessing import shared_memory
+        
+        tasks = [queries[i:i+queriesPerTask] for i in range(0, len(queries), queriesPerTask)]
+        memory = None
+        
+        if not tasks:
+            return
+        
+        if isinstance(self.__referenceSequence, MappedSequence):
+            initargs = (self.__referenceSequence.path, 0, None)
+        else:
+            reference = str(self.__referenceSequence)
+            dtype = 'uint8' if reference.isascii() else 'uint32'
+            reference = reference.encode('ascii') if dtype == 'uint8' else reference.encode('utf-32-le')
+            
+            memory = shared_memory.SharedMemory(create=True, size=len(reference))
+            memory.buf[:len(reference)] = reference
+            initargs = (memory.name, len(reference), dtype)
+            del reference
+        
+        try:
+            with _processPool(min(workers, len(tasks)), initializer=_initWorker, 
+                                     initargs=initargs + (alignmentFunction, options, self.__indexCache, self.__metrics is not None)) as pool:
+                for alignments, counters in pool.map(_alignQueries, tasks):
+                    if counters is not None:
+                        self.__metrics.merge(counters)
+                    yield from alignments
+        finally:
+            if memory is not None:
+                memory.close()
+                memory.unlink()
+    
+    
+    def iter_align_reads(self, referenceSequence:str=None, querySequence=None,
+                         pathReferenceSequence:str=None, pathQuerySequence:str=None,
+                         alignmentFunction=score_alignment, outputFile:str = None, engine:str = 'auto',
+                         chunkSize:int = None, outputFormat:str = 'text', appendOutput:bool = False):
+        """Streaming version of align_reads: the queries are read lazily and every result is yielded (and printed) 
+        as soon as it is computed, so the memory used does not grow with the number of queries.
+
+        The parameters are the same of align_reads, except that querySequence can be any iterable (e.g. a generator)
+        and that the queries given are not stored in the object. Since the queries are not known in advance, every 
+        query is validated only when its turn comes.
+
+        Args:
+            referenceSequence (str | PackedSequence | MappedSequence): Optional direct reference sequence.
+            querySequence (Iterable[str]): Optional iterable of query sequences, consumed lazily.
+            pathReferenceSequence (str): Optional path to the reference sequence file.
+            pathQuerySequence (str): Optional path to the query sequence file, read one line at a time.
+            alignmentFunction (Function | SubstitutionMatrix): Function used to score alignments, defaults to score_alignment.
+            outputFile (None|bool|str|ResultWriter): Same of align_reads, the results are written one by one. Defaults to None, i.e. no print.
+            engine (str): The scoring engine used by find_best_alignment, defaults to 'auto'.
+            chunkSize (int): Same of align_reads.
+            outputFormat (str): Same of align_reads.
+            appendOutput (bool): Same of align_reads.
+
+        Returns:
+            results (Iterator[list[str, str, int, int]]): yields [matched reference segment, query sequence, position in the 
+                reference sequence, score] for every query, in the input order (a RecordResult for a reference made of
+                several records, see align_reads).
+
+        Raises:
+            ValueError: If no valid reference or query sequences are provided or the reference is invalid, 
+                an invalid query raises the same error of align_reads while iterating.
+        """
+        
+        if not (referenceSequence or pathReferenceSequence or self.__referenceSequence):
+            raise ValueError('Before using align read you should either set reference sequence via setter or give a reference sequence'+
+                            'as a string via referenceSequence param or a path to a file containing a reference sequence via the path param')
+            
+        if not (querySequence or pathQuerySequence or self.__querySequence):
+            raise ValueError('Before using align read you should either set query sequence via setter or give a query sequence'+
+                            'as a string via querySequence param or a path to a file containing a query sequence via the path param')
+        
+        if outputFormat not in WRITERS:
+            raise ValueError(f'Unknown output format {outputFormat}, expected one of {", ".join(WRITERS)}')
+        
+        self.__setReference(*self.__resolveReference(referenceSequence, pathReferenceSequence, chunkSize))
+        output = (outputFile, outputFormat, appendOutput)
+        
+        # the ingest has already uppercased and validated the queries of a file
+        if pathQuerySequence and not querySequence:
+            return self.__streamAlignments(self.iterQueryData(pathQuerySequence), alignmentFunction, output, engine, chunkSize, True)
+        
+        return self.__streamAlignments(querySequence or self.__querySequence, alignmentFunction, output, engine, chunkSize)
+    
+    
+    def __streamAlignments(self, queries, alignmentFunction, output:tuple, engine:str, chunkSize:int, validated:bool=False):
+        """generator behind iter_align_reads, the output is opened at the first iteration and closed at the last one
+
+        Args:
+            queries (Iterable[str]): the queries to be aligned
+            alignmentFunction (Function): Function used to score alignments
+            output (tuple): the output file, the output format and the append flag, see prettyPrint
+            engine (str): the scoring engine
+            chunkSize (int): see find_best_alignment
+            validated (bool, optional): if True the queries are already uppercased and validated. Defaults to False.
+
+        Yields:
+            result (list[str, str, int, int]): the alignment of the next query
+        """
+        
+        writer = self.__openWriter(*output)
+        
+        try:
+            for data in queries:
+                if not validated:
+                    data = data.strip().upper()
+                    if not self.checkSequenceValidity(data):
+                        raise ValueError('Incorrect query sequence')
+                
+                found = self.__cachedResult(data, alignmentFunction)
+                if found is None:
+                    found = self.__storeResult(data, alignmentFunction, self.find_best_alignment(self.__referenceSequence, data, 
+                                               scoringFunction=alignmentFunction, engine=engine, chunkSize=chunkSize, 
+                                               records=self.__records))
+                
+                result = self.__result(data, *found)
+                
+                if writer:
+                    writer.write(result)
+                
+                yield result
+        finally:
+            if writer is not None and writer is not output[0]:
+                writer.close()
+            elif writer is not None:
+                writer.flush()
+    
+    
+    def align_reads_async(self, referenceSequence:str=None, querySequence=None,
+                          pathReferenceSequence:str=None, pathQuerySequence:str=None,
+                          alignmentFunction=score_alignment, engine:str = 'auto', chunkSize:int = None,
+                          executor:'Executor' = None, queriesPerTask:int = 64, maxInFlight:int = None):
+        """asyncio version of iter_align_reads, which never blocks the event loop: the queries are aligned queriesPerTask
+        at a time by an executor, with at most maxInFlight chunks submitted at once, and the results are yielded as 
+        soon as they are available, in the input order.
+
+        Leaving the iteration early (break, aclose) or cancelling the task iterating cancels the chunks not started yet
+        and stops the running ones before their next query.
+
+        Args:
+            referenceSequence (str | PackedSequence | MappedSequence): Optional direct reference sequence.
+            querySequence (Iterable[str] | AsyncIterable[str]): Optional iterable, or async iterable, of query sequences.
+            pathReferenceSequence (str): Optional path to the reference sequence file, read without blocking the event loop.
+            pathQuerySequence (str): Optional path to the query sequence file, read without blocking the event loop.
+            alignmentFunction (Function | SubstitutionMatrix): Function used to score alignments, defaults to score_alignment.
+            engine (str): The scoring engine used by find_best_alignment, defaults to 'auto'.
+            chunkSize (int): Same of align_reads.
+            executor (Executor): The executor the chunks are aligned by, it shares the encodings of this object and so 
+                it should run threads (the numpy based engines release the GIL). Defaults to None, i.e. a 
+                ThreadPoolExecutor created and shut down by the iteration.
+            queriesPerTask (int): The number of queries aligned by a chunk. Defaults to 64.
+            maxInFlight (int): The maximum number of chunks submitted and not yielded yet. Defaults to None, i.e. twice 
+                the number of processors.
+
+        Returns:
+            results (AsyncIterator[list[str, str, int, int]]): yields [matched reference segment, query sequence, position 
+                in the reference sequence, score] for every query, in the input order (a RecordResult for a reference 
+                made of several records, see align_reads).
+
+        Raises:
+            ValueError: If no valid reference or query sequences are provided, an invalid query or reference raises
+                the same error of align_reads while iterating.
+        """
+        
+        if not (referenceSequence or pathReferenceSequence or self.__referenceSequence):
+            raise ValueError('Before using align read you should either set reference sequence via setter or give a reference sequence'+
+                            'as a string via referenceSequence param or a path to a file containing a reference sequence via the path param')
+            
+        if not (querySequence or pathQuerySequence or self.__querySequence):
+            raise ValueError('Before using align read you should either set query sequence via setter or give a query sequence'+
+                            'as a string via querySequence param or a path to a file containing a query sequence via the path param')
+        
+        if queriesPerTask < 1 or (maxInFlight is not None and maxInFlight < 1):
+            raise ValueError('queriesPerTask and maxInFlight should be at least 1')
+        
+        # the ingest has already uppercased and validated the queries of a file
+        if pathQuerySequence and not querySequence:
+            queries, validated = self.iterQueryData(pathQuerySequence), True
+        else:
+            queries, validated = querySequence or self.__querySequence, False
+        
+        return self.__asyncAlignments((referenceSequence, pathReferenceSequence, chunkSize), queries, validated, alignmentFunction,
+                                      engine, chunkSize, executor, queriesPerTask, maxInFlight or 2 * (os.cpu_count() or 1))
+    
+    
+    async def __asyncAlignments(self, reference:tuple, queries, validated:bool, alignmentFunction, engine:str, chunkSize:int,
+                                executor:'Executor', queriesPerTask:int, maxInFlight:int):
+        """async generator behind align_reads_async
+
+        Args:
+            reference (tuple): the parameters of __resolveReference
+            queries (Iterable[str] | AsyncIterable[str]): the queries to be aligned
+            validated (bool): if True the queries are already uppercased and validated
+            alignmentFunction (Function): Function used to score alignments
+            engine (str): the scoring engine
+            chunkSize (int): see find_best_alignment
+            executor (Executor | None): the executor of the chunks, None for a new ThreadPoolExecutor
+            queriesPerTask (int): the number of queries of a chunk
+            maxInFlight (int): the maximum number of chunks submitted and not yielded yet
+
+        Yields:
+            result (list[str, str, int, int]): the alignment of the next query
+        """
+        
+        import asyncio
+        
+        loop = asyncio.get_running_loop()
+        owned = executor is None
+        executor = _threadPool() if owned else executor
+        pending = deque()
+        cancelled = threading.Event()
+        
+        # the files are read by the default executor of the loop, so that reading is never queued behind the chunks
+        if hasattr(queries, '__aiter__'):
+            queries = queries.__aiter__()
+            nextChunk = lambda: _takeAsync(queries, queriesPerTask)
+        else:
+            queries = iter(queries)
+            nextChunk = lambda: loop.run_in_executor(None, lambda: list(itertools.islice(queries, queriesPerTask)))
+        
+        try:
+            self.__setReference(*await loop.run_in_executor(None, self.__resolveReference, *reference))
+            
+            while True:
+                # a slot is freed only when a chunk is yielded, so a slow chunk holds back the ones after it
+                while len(pending) >= maxInFlight:
+                    for result in await pending.popleft():
+                        yield result
+                
+                chunk = await nextChunk()
+                if not chunk:
+                    break
+                
+                pending.append(loop.run_in_executor(executor, self.__alignChunk, chunk, alignmentFunction, engine, chunkSize, 
+                                                    validated, cancelled))
+                
+                # the chunks already aligned are yielded in order while the next ones are submitted
+                while pending and pending[0].done():
+                    for result in pending.popleft().result():
+                        yield result
+            
+            while pending:
+                for result in await pending.popleft():
+                    yield result
+        finally:
+            cancelled.set()
+            for future in pending:
+                future.cancel()
+            if owned:
+                executor.shutdown(wait=False, cancel_futures=True)
+    
+    
+    def __alignChunk(self, queries:List[str], alignmentFunction, engine:str, chunkSize:int, validated:bool, 
+                     cancelled:threading.Event)->List[list]:
+        """aligns a chunk of queries of align_reads_async inside its executor
+
+        Args:
+            queries (list[str]): the queries of the chunk
+            alignmentFunction (Function): Function used to score alignments
+            engine (str): the scoring engine
+            chunkSize (int): see find_best_alignment
+            validated (bool): if True the queries are already uppercased and validated
+            cancelled (threading.Event): set when the iteration ends, the chunk then stops before its next query
+
+        Returns:
+            results (list[list]): the result of every query, see align_reads
+        """
+        
+        results = []
+        
+        for data in queries:
+            if cancelled.is_set():
+                break
+            
+            if not validated:
+                data = data.strip().upper()
+                if not self.checkSequenceValidity(data):
+                    raise ValueError('Incorrect query sequence')
+            
+            # the result cache is shared by the chunks of every iteration running at the same time
+            with self.__cacheLock:
+                found = self.__cachedResult(data, alignmentFunction)
+            if found is None:
+                found = self.find_best_alignment(self.__referenceSequence, data, scoringFunction=alignmentFunction, engine=engine, 
+                                                 chunkSize=chunkSize, records=self.__records)
+                with self.__cacheLock:
+                    found = self.__storeResult(data, alignmentFunction, found)
+            
+            results.append(self.__result(data, *found))
+        
+        return results
+    
+    
+    def __result(self, query:str, pos:int, score)->list:
+        """builds the result of a query aligned against the stored reference
+
+        Args:
+            query (str): the query sequence
+            pos (int): the position of its best alignment
+            score (int | float): the score of its best alignment
+
+        Returns:
+            result (list | RecordResult): [matched reference segment, query, position, score], a RecordResult when 
+                the reference is made of several records
+        """
+        
+        result = [str(self.__referenceSequence[pos:pos+len(query)]), query, pos, score]
+        return result if self.__records is None else RecordResult(result, *self.__records.locate(pos))
+    
+    
+    def __stage(self, name:str):
+        """times a stage of align_reads when metrics are collected, does nothing otherwise"""
+        return nullcontext() if self.__metrics is None else self.__metrics.stage(name)
+    
+    
+    def __finishMetrics(self, previous:'AlignmentMetrics', bytesRead:int)->'AlignmentMetrics':
+        """ends the collection of the metrics of an align_reads run
+
+        Args:
+            previous (AlignmentMetrics | None): the metrics collected before the run, restored
+            bytesRead (int): the bytes read by the ingest before the run
+
+        Returns:
+            metrics (AlignmentMetrics | None): the metrics of the run, None if they were not collected
+        """
+        
+        metrics, self.__metrics = self.__metrics, previous
+        if metrics is not None:
+            metrics.bytesRead += self.__ingestStats['bytes'] - bytesRead
+            self.__lastMetrics = metrics
+        return metrics
+    
+    
+    ## RESULT CACHE ------------------------------------------------------------------------------------------
+    
+    def __cachedResult(self, query:str, alignmentFunction)->tuple:
+        """looks up the alignment of a query against the stored reference in the result cache
+
+        Args:
+            query (str): the query sequence
+            alignmentFunction (Function): the scoring function
+
+        Returns:
+            alignment (tuple[int, int] | None): the cached position and score, None if not cached
+        """
+        
+        if not self.__resultCacheSize:
+            return None
+        
+        key = (self.getReferenceFingerprint(), alignmentFunction, query)
+        result = self.__resultCache.get(key)
+        
+        if result is None:
+            self.__resultCacheMisses += 1
+        else:
+            self.__resultCacheHits += 1
+            self.__resultCache.move_to_end(key)
+        
+        if self.__metrics is not None:
+            self.__metrics.resultCacheMisses += result is None
+            self.__metrics.resultCacheHits += result is not None
+        
+        return result
+    
+    
+    def __storeResult(self, query:str, alignmentFunction, result:tuple)->tuple:
+        """stores the alignment of a query in the result cache, dropping the least recently used one if it is full
+
+        Args:
+            query (str): the query sequence
+            alignmentFunction (Function): the scoring function
+            result (tuple[int, int]): the position and score of the query
+
+        Returns:
+            alignment (tuple[int, int]): the given result
+        """
+        
+        if self.__resultCacheSize:
+            self.__resultCache[(self.getReferenceFingerprint(), alignmentFunction, query)] = tuple(result)
+            if len(self.__resultCache) > self.__resultCacheSize:
+                self.__resultCache.popitem(last=False)
+        
+        return tuple(result)
+    
+    
+    def getResultCacheInfo(self)->dict:
+        """returns the statistics of the result cache of align_reads and iter_align_reads
+
+        Returns:
+            info (dict): hits, misses, size (number of results cached) and maxSize
+        """
+        return {'hits': self.__resultCacheHits, 'misses': self.__resultCacheMisses, 
+                'size': len(self.__resultCache), 'maxSize': self.__resultCacheSize}
+    
+    
+    def clearResultCache(self)->None:
+        """empties the result cache, the hit and miss counters are kept"""
+        self.__resultCache.clear()
+    
+    
+    def __setReference(self, referenceSequence, records:'RecordIndex'=None)->None:
+        """stores the reference and its records, the result cache is emptied if any of them changes
+
+        Args:
+            referenceSequence (str | PackedSequence | MappedSequence): the new reference
+            records (RecordIndex, optional): the records of the reference, if it is made of several ones. Defaults to None.
+        """
+        
+        if self.__referenceSequence is None or not self.__sameReference(self.__referenceSequence, referenceSequence) \
+                or records != self.__records:
+            self.clearResultCache()
+        
+        # the file mapped by align_reads is released as soon as another reference takes its place
+        if self.__mappedReference is not None and self.__mappedReference[1] is not referenceSequence:
+            self.__mappedReference[1].close()
+            self.__mappedReference = None
+        
+        self.__referenceSequence, self.__records = referenceSequence, records
+    
+    
+    def __mapReference(self, path:str)->'MappedSequence':
+        """memory maps a reference file for align_reads, the same mapping is reused as long as the file is unchanged,
+        so that its validation, its fingerprint and the results already computed are reused as well
+
+        Args:
+            path (str): the path to the reference sequence file
+
+        Raises:
+            ValueError: if the reference sequence is not valid
+
+        Returns:
+            reference (MappedSequence): the mapped reference
+        """
+        
+        stat = os.stat(path)
+        key = (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+        
+        if self.__mappedReference is not None and self.__mappedReference[0] == key:
+            return self.__mappedReference[1]
+        
+        mapped = self.readSequence(path, mapped=True)
+        if not self.checkSequenceValidity(mapped):
+            mapped.close()
+            raise ValueError('Incorrect reference sequence passed ')
+        
+        # the previous mapping is stale, the new one replaces it as the reference right away
+        if self.__mappedReference is not None:
+            self.__mappedReference[1].close()
+        self.__mappedReference = (key, mapped)
+        
+        return mapped
+    
+    
+    def __resolveReference(self, referenceSequence:str, pathReferenceSequence:str, chunkSize:int):
+        """returns the reference to be used by align_reads, either the given one, the one read from the given path 
+        or the stored one, together with its records
+
+        Args:
+            referenceSequence (str | PackedSequence | MappedSequence): the direct reference sequence or None
+            pathReferenceSequence (str): the path to the reference sequence file or None
+            chunkSize (int): if given, the file is memory mapped (unless it is compressed or it holds FASTA or FASTQ records)
+
+        Raises:
+            ValueError: if the reference sequence is not valid
+
+        Returns:
+            reference (str | PackedSequence | MappedSequence): the normalized reference sequence
+            records (RecordIndex | None): the records of a reference read from a FASTA or FASTQ file
         """
+        
+        if not (referenceSequence or pathReferenceSequence):
+            return self.__referenceSequence, self.__records
+        
+        records = None
+        
+        # compressed and FASTA/FASTQ files cannot be memory mapped, they are read in memory and scanned in chunks all the same
+        if referenceSequence:
+            referenceSequence = self.__normalizeSequence(referenceSequence)
+            valid = self.checkSequenceValidity(referenceSequence)
+        elif chunkSize and compressionOf(pathReferenceSequence) is None and recordFormatOf(pathReferenceSequence) is None:
+            referenceSequence, valid = self.__mapReference(pathReferenceSequence), True
+        else:
+            # the ingest has already uppercased and validated the file
+            referenceSequence, records = self.readRecords(pathReferenceSequence)
+            valid = referenceSequence != ''
+        
+        if not valid:
+            raise ValueError('Incorrect reference sequence passed ')
+        
+        return referenceSequence, records
+    
+
+    ## BEST ALIGNMENT FUNCTION ---------------------------------------------------------------------------
+
+    def find_best_alignment(self, reference:str, query:str, scoringFunction=score_alignment, engine:str='auto',
+                            chunkSize:int=None, workers:int=None, maxMismatches:int=None, exactIndex:bool=False,
+                            records:'RecordIndex'=None)->List[int]:
+        """evaluates the best possible alignment for a query sequence into a sequence
+
+        Args:
+            reference (str | PackedSequence | MappedSequence): the reference sequence 
+            query (str): the sub sequence to be aligned to the reference sequence
+            scoringFunction (function | SubstitutionMatrix, optional): the function to be used to determine the score, 
+            the function must accept two string as input (in the order reference, subsequence) and must return an 
+            integer or float. A SubstitutionMatrix can also be scored by the vectorized engines. Defaults to score_alignment.
+            engine (str, optional): the engine used to score the windows. 'python' calls the scoring function on every
+            window, 'numpy' scores every window at once with array operations and 'fft' computes every score through 
+            fft cross-correlations in O(n log n), 'bitset' counts the matches of every window with shifts and ANDs
+            on per base bitmasks without requiring numpy, 'batch' scores through matrix products (see align_reads). 
+            These last four support only the default scoring, and all but 'bitset' a SubstitutionMatrix.
+            Defaults to 'auto', i.e. 'fft' for queries of at least FFT_MIN_QUERY_LENGTH bases and 'numpy' for shorter
+            ones when the default scoring or a SubstitutionMatrix is used ('bitset' if numpy is not installed, 'numpy'
+            for a matrix with float weights), 'python' otherwise.
+            chunkSize (int, optional): if given the offsets are scored chunkSize at a time, each chunk reading only 
+            chunkSize + len(query) - 1 bases of the reference, so that the memory used does not depend on the reference 
+            length. Defaults to None, i.e. CHUNK_SIZE for a MappedSequence reference (which is always scanned in chunks)
+            and a single chunk otherwise.
+            workers (int, optional): if greater than 1 the offsets are split into that many partitions scored concurrently,
+            by threads for the numpy based engines (which release the GIL) and by processes otherwise (the scoring function 
+            must then be picklable). Every partition is at least 2 offsets long. Defaults to None, i.e. no partitioning.
+            maxMismatches (int, optional): if given, a k-mer index of the reference (built once and reused) gives the offsets 
+            where the query may align with at most maxMismatches non matching positions and only those are scored. 
+            When none of them reaches the score such an alignment would have, the whole reference is scanned as usual, 
+            so the result is always the same. Supports only the default scoring and requires numpy. Defaults to None.
+            exactIndex (bool, optional): if True, a suffix array of the reference (built once and reused) is checked first:
+            a query without X and - occurring verbatim aligns at its leftmost occurrence with score len(query), which 
+            no other window can beat. Otherwise the search goes on as usual. Ignored with a custom scoring function. 
+            Requires numpy. Defaults to False.
+            records (RecordIndex, optional): the records the reference is made of, only the windows lying inside a single 
+            record are scored (chunkSize offsets at a time, if given). workers, maxMismatches and exactIndex are then 
+            ignored. Defaults to None, i.e. the reference is a single sequence.
+
+        Raises:
+            ValueError: if the reference sequence has a lower or equal length to the query sequence
+            ValueError: if every record is shorter than the query
+            ValueError: if the engine is unknown or it does not support the given scoring function
+            ValueError: if maxMismatches is negative or it is used with a custom scoring function
 
-        self.__querySequence = None
-        self.__referenceSequence = None
+        Returns:
+            position (int): the starting position in the reference sequence for which the best alignment score was obtained 
+            best score (int): the best alignment score obtained by the sequence  
+        """
         
+        if len(reference) <= len(query):
+            raise ValueError('reference sequence length should be higher than the query sequence length')
+        
+        engine = self.__resolveEngine(engine, scoringFunction, query)
+        
+        if engine != 'python' and not query:
+            raise ValueError('Lengths of the two sequences should match or the two sequence should not be empty')
+        
+        if self.__metrics is not None:
+            self.__metrics.engines[query] = engine
+        
+        if records is not None:
+            bestPos, bestScore = None, None
+            bound = _maximumScore(scoringFunction, query)
             
-    ## SCORE ALIGNMENT FUNCTION ----------------------------------------------------------------------------------
+            # records and chunks are scanned left to right, which keeps the leftmost position on ties
+            for start, scores in self.__recordScores(reference, query, scoringFunction, engine, chunkSize, records):
+                pos, score = _bestOffset(scores)
+                if bestScore is None or score > bestScore:
+                    bestPos, bestScore = start + pos, score
+                    if bound is not None and bestScore >= bound:
+                        break
+            
+            return bestPos, bestScore
+        
+        if exactIndex and scoringFunction is Alignment.score_alignment and query and 'X' not in query and '-' not in query:
+            index = self.__encodeReference(reference, 'suffix', lambda reference: SuffixArray(str(reference) if isinstance(reference, MappedSequence) else reference),
+                                           (SuffixArray.toArrays, SuffixArray.fromArrays))
+            pos = index.find(str(query))
+            if pos >= 0:
+                return pos, len(query)
+        
+        if maxMismatches is not None:
+            seeded = self.__seededAlignment(reference, query, scoringFunction, maxMismatches)
+            if seeded:
+                return seeded
+        
+        if workers and workers > 1 and len(reference) - len(query) + 1 >= 4:
+            return self.__partitionedAlignment(reference, query, scoringFunction, engine, chunkSize, workers)
+        
+        if isinstance(reference, MappedSequence):
+            chunkSize = chunkSize or CHUNK_SIZE
+            
+        if not chunkSize:
+            return self.__scanWindows(reference, query, scoringFunction, engine)
+        
+        bestPos, bestScore = None, None
+        bound = _maximumScore(scoringFunction, query)
+        
+        # chunks are scanned left to right and only a strictly higher score replaces the best one,
+        # which keeps the leftmost position on ties
+        for start in range(0, len(reference) - len(query) + 1, chunkSize):
+            pos, score = self.__scanWindows(reference[start:start + chunkSize + len(query) - 1], query, scoringFunction, engine, False)
+            if bestScore is None or score > bestScore:
+                bestPos, bestScore = start + pos, score
+                if bound is not None and bestScore >= bound:
+                    break
+        
+        return bestPos, bestScore
     
-    def score_alignment(self, seq1:str, seq2:str)->int:
-        """Evaluates the alignment score of two string
+    
+    def find_top_alignments(self, reference:str, query:str, scoringFunction=score_alignment, engine:str='auto',
+                            topK:int=None, minScore=None, chunkSize:int=None, records:'RecordIndex'=None)->List[tuple]:
+        """finds the topK best alignments of a query, and/or all the ones scoring at least minScore
 
         Args:
-            seq1 (str): the first sequence
-            seq2 (str): the second sequence
+            reference (str | PackedSequence | MappedSequence): the reference sequence 
+            query (str): the sub sequence to be aligned to the reference sequence
+            scoringFunction (function | SubstitutionMatrix, optional): see find_best_alignment. Defaults to score_alignment.
+            engine (str, optional): see find_best_alignment. Defaults to 'auto'.
+            topK (int, optional): the maximum number of alignments returned. Defaults to None, i.e. no limit.
+            minScore (int | float, optional): the lowest score of the alignments returned. Defaults to None, i.e. no threshold.
+            chunkSize (int, optional): see find_best_alignment. Defaults to None.
+            records (RecordIndex, optional): see find_best_alignment. Defaults to None.
 
         Raises:
-            ValueError: if the length of the two sequence is not equal
+            ValueError: if the reference sequence has a lower or equal length to the query sequence
+            ValueError: if every record is shorter than the query
+            ValueError: if neither topK nor minScore is given, or topK is lower than 1
+            ValueError: if the engine is unknown or it does not support the given scoring function
 
         Returns:
-            score (int): the score alignment obtained
+            hits (list[tuple[int, int]]): position and score of the alignments, highest score first and leftmost position 
+                first among equal scores (the first one is the result of find_best_alignment, when selected)
         """
         
-        if len(seq1) != len(seq2) or not len(seq1) or not len(seq2):
+        if len(reference) <= len(query):
+            raise ValueError('reference sequence length should be higher than the query sequence length')
+        
+        if topK is None and minScore is None:
+            raise ValueError('Either topK or minScore should be given')
+        if topK is not None and topK < 1:
+            raise ValueError('topK should be at least 1')
+        
+        engine = self.__resolveEngine(engine, scoringFunction, query)
+        
+        if engine != 'python' and not query:
             raise ValueError('Lengths of the two sequences should match or the two sequence should not be empty')
         
-        return sum(1 if seq1[i] == seq2[i] and seq1[i] not in {'X', '-'} else -1 for i in range(len(seq1)))
+        if self.__metrics is not None:
+            self.__metrics.engines[query] = engine
+        
+        if isinstance(reference, MappedSequence):
+            chunkSize = chunkSize or CHUNK_SIZE
+        
+        if not chunkSize and records is None:
+            return _topOffsets(self.__offsetScores(reference, query, scoringFunction, engine), topK, minScore)
+        
+        if records is None:
+            pieces = ((start, self.__offsetScores(reference[start:start + chunkSize + len(query) - 1], query, scoringFunction, engine,
+                                                  persistent=False))
+                      for start in range(0, len(reference) - len(query) + 1, chunkSize))
+        else:
+            pieces = self.__recordScores(reference, query, scoringFunction, engine, chunkSize, records)
+        
+        hits = []
+        
+        # every chunk keeps at most topK hits, merged with the ones of the previous chunks
+        for start, scores in pieces:
+            hits = _selectHits(hits + [(start + pos, score) for pos, score in _topOffsets(scores, topK, minScore)], topK)
+        
+        return hits
     
     
-    ## ALIGNMENT READS
-    def align_reads(self, referenceSequence:str=None, querySequence:List[str]=None,
-                    pathReferenceSequence:str=None, pathQuerySequence:str=None,
-                    alignmentFunction=score_alignment, outputFile:str = True
-                    ) -> List[List[str]]:
-        """Align query sequences against a reference sequence using a specified alignment function.
-
-        Performs sequence alignment by finding the best matching positions of query sequences within a reference sequence. 
-        Supports flexible input methods including direct sequences, file paths, or previously set sequences.
+    def __offsetScores(self, reference:str, query:str, scoringFunction, engine:str, persistent:bool=True):
+        """scores every window of the reference with the given engine
 
         Args:
-            referenceSequence (str): Optional direct reference sequence.
-            pathReferenceSequence (str): Optional path to the reference sequence file.
-            querySequence (str): Optional direct query sequences as a list or set.
-            pathQuerySequence (str): Optional path to the query sequence file.
-            alignmentFunction (Function): Function used to score alignments, defaults to score_alignment.
-            outputFile (None|bool|str): Controls where the results are going to be outputted, if a non empty string is given it's interpreted as
-                the path to a file where to print the data. If a True boolean is given, the prints occurs on screen (stdout). 
-                If anything else is given, no print occurs. 
+            reference (str | PackedSequence): the reference sequence, at least as long as the query
+            query (str): the query sequence
+            scoringFunction (function | SubstitutionMatrix): the scoring function
+            engine (str): the resolved engine name
+            persistent (bool, optional): False for a chunk of a larger reference, whose encoding is never stored in
+                the index cache. Defaults to True.
 
         Returns:
-            results (list[list[str, str, int, int]]): A list of alignment results, 
-            each containing [matched reference segment, query sequence, position in the reference sequence, score].
+            scores (np.ndarray | list[int]): the i-th element is the score of the window starting at position i
+        """
+        
+        if self.__metrics is not None:
+            self.__metrics.windowsScored += len(reference) - len(query) + 1
+            self.__metrics.scoringCalls += len(reference) - len(query) + 1 if engine == 'python' else 0
+        
+        if engine != 'python' and isinstance(scoringFunction, SubstitutionMatrix):
+            name, encoder, scorer, _ = _MATRIX_ENGINES[engine]
+            return scorer(self.__encodeReference(reference, name, encoder, persistent=persistent), query, scoringFunction)
+        
+        if engine != 'python':
+            return _ENGINES[engine][1](self.__encodeReference(reference, engine, persistent=persistent), query)
+        
+        return [scoringFunction(self, reference[i:i+len(query)], query) for i in range(len(reference)-len(query)+1)]
+    
+    
+    def __recordScores(self, reference:str, query:str, scoringFunction, engine:str, chunkSize:int, records:'RecordIndex'):
+        """scores the windows of the reference lying inside a single record, record by record
+
+        Args:
+            reference (str | PackedSequence): the reference sequence, the records concatenated
+            query (str): the query sequence
+            scoringFunction (function | SubstitutionMatrix): the scoring function
+            engine (str): the resolved engine name
+            chunkSize (int): if given every record is scored chunkSize offsets at a time, otherwise the whole reference
+                is scored at once (reusing its encoding) and the windows spanning two records are left out
+            records (RecordIndex): the records of the reference
 
         Raises:
-            ValueError: If no valid reference or query sequences are provided or sequences are invalid.
+            ValueError: if every record is shorter than the query
+
+        Yields:
+            start (int): the offset of the first window scored
+            scores (np.ndarray | list[int]): the scores of the windows starting at start, start + 1, ...
         """
         
-        if not (referenceSequence or pathReferenceSequence or self.__referenceSequence):
-            raise ValueError('Before using align read you should either set reference sequence via setter or give a reference sequence'+
-                            'as a string via referenceSequence param or a path to a file containing a reference sequence via the path param')
-            
-        if not (querySequence or pathQuerySequence or self.__querySequence):
-            raise ValueError('Before using align read you should either set query sequence via setter or give a query sequence'+
-                            'as a string via querySequence param or a path to a file containing a query sequence via the path param')
-                
+        intervals = records.intervals(len(query))
+        if not intervals:
+            raise ValueError('every record of the reference sequence is shorter than the query sequence')
         
-        if referenceSequence or pathReferenceSequence:
-            
-            referenceSequence = referenceSequence or self.readSequence(pathReferenceSequence)
-            referenceSequence = referenceSequence.strip().upper()
-            
-            if not self.checkSequenceValidity(referenceSequence):
-                raise ValueError('Incorrect reference sequence passed ')
-        else:
-            referenceSequence = self.__referenceSequence
+        if not chunkSize:
+            scores = self.__offsetScores(reference, query, scoringFunction, engine)
+            for start, stop in intervals:
+                yield start, scores[start:stop]
+            return
         
-        if querySequence or pathQuerySequence:        
-            querySequence = list(querySequence) if querySequence else self.readQueryData(path=pathQuerySequence)
-            
-            querySequence = list(map(lambda x:x.strip().upper(), querySequence))
-            
-            for seq in querySequence:
-                if not self.checkSequenceValidity(seq):
-                    raise ValueError('Incorrect query sequence')
-                
-            self.__querySequence = querySequence
-            
-            
-        self.__referenceSequence = referenceSequence.upper()
+        for first, stop in intervals:
+            for start in range(first, stop, chunkSize):
+                end = min(start + chunkSize, stop)
+                yield start, self.__offsetScores(reference[start:end + len(query) - 1], query, scoringFunction, engine, persistent=False)
+    
+    
+    def __seededAlignment(self, reference:str, query:str, scoringFunction, maxMismatches:int)->tuple:
+        """seed and extend search: scores only the offsets given by the k-mer index of the reference
+
+        Args:
+            reference (str | PackedSequence | MappedSequence): the reference sequence
+            query (str): the query sequence
+            scoringFunction (function): the scoring function, it must be score_alignment
+            maxMismatches (int): the maximum number of non matching positions looked for
+
+        Raises:
+            ValueError: if maxMismatches is negative or the scoring function is not score_alignment
+
+        Returns:
+            alignment (tuple[int, int] | None): the best alignment, None if it could not be proved to be the best one
+        """
+        
+        if maxMismatches < 0:
+            raise ValueError('The maximum number of mismatches should not be negative')
+        if scoringFunction is not Alignment.score_alignment:
+            raise ValueError('The seed search supports only the default score_alignment scoring function')
+        
+        index = self.__encodeReference(reference, f'kmer{KMER_SIZE}', lambda reference: KmerIndex(str(reference) if isinstance(reference, MappedSequence) else reference),
+                                       (KmerIndex.toArrays, KmerIndex.fromArrays))
+        
+        if len(query) < (maxMismatches + 1) * index.k or not set(query) <= set('ACGTX-'):
+            return None
         
-        alignment = []
+        offsets = index.candidates(query, maxMismatches)
+        if not len(offsets):
+            return None
+        
+        scores = index.score(offsets, query)
+        best = int(np.argmax(scores))
+        if self.__metrics is not None:
+            self.__metrics.windowsScored += len(offsets)
+        
+        # every offset with at most maxMismatches non matching positions is a candidate, so a candidate scoring at least
+        # as much as such an offset is the best one and the leftmost among the equal ones
+        if scores[best] < len(query) - 2*maxMismatches:
+            return None
+        
+        return int(offsets[best]), int(scores[best])
+    
+    
+    def __partitionedAlignment(self, reference:str, query:str, scoringFunction, engine:str, chunkSize:int, workers:int)->tuple:
+        """splits the offsets of the reference into overlapping partitions and scores them concurrently
+
+        Args:
+            reference (str | PackedSequence | MappedSequence): the reference sequence
+            query (str): the query sequence
+            scoringFunction (function): the scoring function
+            engine (str): the resolved engine name
+            chunkSize (int): see find_best_alignment
+            workers (int): the number of partitions
 
-        for data in self.__querySequence:
-            pos, score = self.find_best_alignment(self.__referenceSequence, data, scoringFunction=alignmentFunction)
-            alignment.append([self.__referenceSequence[pos:pos+len(data)], data, pos, score])
+        Returns:
+            position (int): the leftmost position with the highest score
+            best score (int): the highest score
+        """
+        
+        offsets = len(reference) - len(query) + 1
+        partitions = min(workers, offsets // 2)
+        bounds = [offsets * i // partitions for i in range(partitions + 1)]
+        executor = _threadPool if engine in _GIL_RELEASING_ENGINES else _processPool
+        
+        # the partitions are scored by other Alignment objects, they are counted as if they were scanned entirely
+        if self.__metrics is not None:
+            self.__metrics.windowsScored += offsets
+            self.__metrics.scoringCalls += offsets if engine == 'python' else 0
+        
+        with executor(partitions) as pool:
+            futures = [pool.submit(_bestInPartition, str(reference[start:stop + len(query) - 1]), query, scoringFunction, engine, chunkSize)
+                       for start, stop in zip(bounds, bounds[1:])]
             
+            bestPos, bestScore = None, None
             
-        self.prettyPrint(alignment, outputFilePath=outputFile)
+            # partitions are merged left to right keeping the first of equal scores, i.e. the leftmost position
+            for start, future in zip(bounds, futures):
+                pos, score = future.result()
+                if bestScore is None or score > bestScore:
+                    bestPos, bestScore = start + pos, score
         
-        return alignment
+        return bestPos, bestScore
     
-
-    ## BEST ALIGNMENT FUNCTION ---------------------------------------------------------------------------
-
-    def find_best_alignment(self, reference:str, query:str, scoringFunction=score_alignment)->List[int]:
-        """evaluates the best possible alignment for a query sequence into a sequence
+    
+    def __scanWindows(self, reference:str, query:str, scoringFunction, engine:str, persistent:bool=True)->tuple:
+        """scores every window of the reference with the given engine
 
         Args:
-            reference (str): the reference sequence 
-            query (str): the sub sequence to be aligned to the reference sequence
-            scoringFunction (function, optional): the function to be used to determine the score, 
-            the function must accept two string as input (in the order reference, subsequence) and must return an 
-            integer or float.  Defaults to score_alignment.
-
-        Raises:
-            ValueError: if the reference sequence has a lower or equal length to the query sequence
+            reference (str | PackedSequence): the reference sequence, at least as long as the query
+            query (str): the query sequence
+            scoringFunction (function): the scoring function, used only by the python engine
+            engine (str): the resolved engine name
+            persistent (bool, optional): False for a chunk of a larger reference, see __offsetScores. Defaults to True.
 
         Returns:
-            position (int): the starting position in the reference sequence for which the best alignment score was obtained 
-            best score (int): the best alignment score obtained by the sequence  
+            position (int): the leftmost position with the highest score
+            best score (int): the highest score
         """
         
-        if len(reference) <= len(query):
-            raise ValueError('reference sequence length should be higher than the query sequence length')
+        if self.__metrics is not None and engine != 'python':
+            self.__metrics.windowsScored += len(reference) - len(query) + 1
+        
+        if engine != 'python' and isinstance(scoringFunction, SubstitutionMatrix):
+            name, encoder, scorer, best = _MATRIX_ENGINES[engine]
+            encoded = self.__encodeReference(reference, name, encoder, persistent=persistent)
+            
+            return best(encoded, query, scoringFunction) if best else _bestOffset(scorer(encoded, query, scoringFunction))
+        
+        if engine != 'python':
+            _, scorer, best = _ENGINES[engine]
+            encoded = self.__encodeReference(reference, engine, persistent=persistent)
+            
+            return best(encoded, query) if best else _bestOffset(scorer(encoded, query))
         
         try:
             maximumScore = float('-inf')
         except TypeError:
             maximumScore = -999999999
         
-        for i in range(len(reference)-len(query), -1, -1):
-            score = scoringFunction(self, reference[i:i+len(query)], query)
-            if score >= maximumScore:
+        bound = _maximumScore(scoringFunction, query)
+        bounded = scoringFunction is Alignment.score_alignment and len(query)
+        
+        # the leftmost exact occurrence reaches the highest possible score, no other window can beat it
+        if bounded and isinstance(reference, str) and 'X' not in query and '-' not in query:
+            pos = reference.find(query)
+            if pos >= 0:
+                return pos, len(query)
+        
+        # windows are scanned left to right and only a strictly higher score replaces the best one (leftmost tie-break),
+        # so the scan can stop at the first window reaching the highest possible score
+        i = -1
+        for i in range(len(reference)-len(query)+1):
+            if bounded:
+                score = _boundedScore(reference[i:i+len(query)], query, maximumScore)
+                if score is None:
+                    continue
+            else:
+                score = scoringFunction(self, reference[i:i+len(query)], query)
+            
+            if score > maximumScore:
                 maximumScore = score
                 pos = i
+                if bound is not None and score >= bound:
+                    break
+        
+        if self.__metrics is not None:
+            self.__metrics.windowsScored += i + 1
+            self.__metrics.scoringCalls += i + 1
 
         return pos, maximumScore
+    
+    
+    def __resolveEngine(self, engine:str, scoringFunction, query:str)->str:
+        """resolves the engine to be used by find_best_alignment
+
+        Args:
+            engine (str): the requested engine, 'auto' picks the fastest available one
+            scoringFunction (function): the scoring function in use
+            query (str): the query to be aligned
+
+        Raises:
+            ValueError: if the engine is unknown or it does not support the scoring function
+            ImportError: if the engine requires numpy and numpy is not installed
+
+        Returns:
+            engine (str): the name of the engine to be used
+        """
+        
+        matrix = isinstance(scoringFunction, SubstitutionMatrix)
+        
+        if engine == 'auto':
+            if matrix and np is not None:
+                return 'fft' if scoringFunction.integral and len(query) >= FFT_MIN_QUERY_LENGTH else 'numpy'
+            if scoringFunction is not Alignment.score_alignment:
+                return 'python'
+            if np is None:
+                return 'bitset'
+            return 'fft' if len(query) >= FFT_MIN_QUERY_LENGTH else 'numpy'
+        
+        if engine == 'python':
+            return engine
+        
+        if engine not in _ENGINES:
+            raise ValueError(f'Unknown engine {engine}, expected one of auto, python, {", ".join(_ENGINES)}')
+        
+        if matrix and engine not in _MATRIX_ENGINES:
+            raise ValueError(f'The {engine} engine supports only the default score_alignment scoring function')
+        
+        if scoringFunction is not Alignment.score_alignment and not matrix:
+            raise ValueError(f'The {engine} engine supports only the default score_alignment scoring function or a SubstitutionMatrix' 
+                             if engine in _MATRIX_ENGINES else f'The {engine} engine supports only the default score_alignment scoring function')
+        
+        if engine in _NUMPY_ENGINES and np is None:
+            raise ImportError(f'The {engine} engine requires numpy to be installed')
+        
+        return engine
+    
+    
+    def __encodeReference(self, reference:str, engine:str, encoder=None, persistence:tuple=None, persistent:bool=True):
+        """returns the reference encoded for the given engine, the encoding is computed once and reused 
+        as long as the same reference is given, by all the engines sharing it (see _SHARED_ENCODINGS). If an index 
+        cache is set, persistent encodings are loaded from it and stored in it when they have to be built.
+
+        Args:
+            reference (str): the reference sequence
+            engine (str): the engine name, or the name of the encoding
+            encoder (function, optional): the function building the encoding. Defaults to the encoder of the engine.
+            persistence (tuple, optional): the (to arrays, from arrays) functions of an encoding which can be stored in 
+                the index cache. Defaults to None, i.e. the encoding is never stored.
+            persistent (bool, optional): if False the encoding is never loaded from nor stored in the index cache, 
+                as for the chunks of a chunked scan which would only fill it with slices of the reference. Defaults to True.
+
+        Returns:
+            encoded reference: the reference in the format expected by the engine
+        """
+        
+        encoder = encoder or _ENGINES[engine][0]
+        engine = _SHARED_ENCODINGS.get(engine, engine)
+        
+        # the encoding is built under the lock, so that concurrent calls never build the same one twice
+        with self.__cacheLock:
+            cached = self.__encodedReference.get(engine)
+            
+            # only strings are compared by value, any other reference must be the very same object
+            if cached is None or not self.__sameReference(cached[0], reference):
+                if self.__indexCache is None or persistence is None or not persistent:
+                    encoded = encoder(reference)
+                else:
+                    fingerprint = self.getReferenceFingerprint(reference)
+                    arrays = self.__indexCache.load(fingerprint, engine)
+                    
+                    if arrays is None:
+                        encoded = encoder(reference)
+                        self.__indexCache.store(fingerprint, engine, persistence[0](encoded))
+                    else:
+                        encoded = persistence[1](arrays)
+                
+                cached = self.__encodedReference[engine] = (reference, encoded)
+                if self.__metrics is not None:
+                    self.__metrics.encodingCacheMisses += 1
+            elif self.__metrics is not None:
+                self.__metrics.encodingCacheHits += 1
+        
+        return cached[1]
+    
+    
+    def __sameReference(self, first, second)->bool:
+        """tells whether two references are the same, only strings are compared by value any other reference must 
+        be the very same object"""
+        
+        return first is second or (isinstance(second, str) and first == second)
+    
+    
+    def getReferenceFingerprint(self, reference:str=None)->str:
+        """returns the content hash identifying a reference in the index cache, it is computed once per reference and
+        the ones of the last FINGERPRINT_CACHE_SIZE references are remembered
+
+        Args:
+            reference (str | PackedSequence | MappedSequence, optional): the reference. Defaults to the stored one.
+
+        Returns:
+            fingerprint (str): the hex sha256 fingerprint, None if there is no reference
+        """
+        
+        reference = self.__referenceSequence if reference is None else reference
+        if reference is None:
+            return None
+        
+        # strings are remembered by value, any other reference by identity (it is kept alive along with its fingerprint)
+        key = reference if isinstance(reference, str) else id(reference)
+        
+        with self.__cacheLock:
+            cached = self.__fingerprints.get(key)
+            
+            if cached is None or not self.__sameReference(cached[0], reference):
+                cached = self.__fingerprints[key] = (reference, _referenceFingerprint(reference))
+                if len(self.__fingerprints) > FINGERPRINT_CACHE_SIZE:
+                    self.__fingerprints.popitem(last=False)
+            else:
+                self.__fingerprints.move_to_end(key)
+        
+        return cached[1]
 
 
     ## PRETTY PRINT OF THE RESULTS ------------------------------------------------------------------------
 
-    def prettyPrint(self, results:List[List[str]], outputFilePath:str=True)->List[List[str]]:
+    def prettyPrint(self, results:List[List[str]], outputFilePath:str=True, outputFormat:str='text', append:bool=False)->List[List[str]]:
         """performs the print of the align_reads function in a prettier way
 
         Args:
             results (list[list[str, str, int, int]]): the result of the align_reads function
-            outputFile (None|bool|str): Controls where the results are going to be outputted, if a non empty string is given it's interpreted as
-                the path to a file where to print the data. If a True boolean is given, the prints occurs on screen (stdout). 
-                If anything else is given, no print occurs. Defaults to True.
+            outputFile (None|bool|str|ResultWriter): Controls where the results are going to be outputted, if a non empty string is given it's interpreted as
+                the path to a file where to print the data (gzip compressed if it ends with .gz). If a True boolean is given, the prints occurs on 
+                screen (stdout). If a ResultWriter is given the results are added to it, and it is left open. If anything else is given, 
+                no print occurs. Defaults to True.
+            outputFormat (str, optional): the layout of the output, one of WRITERS (text, tsv, jsonl or sam). Defaults to 'text'.
+            append (bool, optional): if True the results are appended to the output file. Defaults to False.
         
         Returns: 
             The results of the align_read function (i.e. the parameter results)    
         """
         
-        if isinstance(outputFilePath, bool) and outputFilePath:
-            outputFilePath = sys.stdout
-        elif isinstance(outputFilePath, str) and outputFilePath.strip() != '':
-            outputFilePath = open(outputFilePath, 'w', encoding='UTF-8')
-        else:
+        writer = self.__openWriter(outputFilePath, outputFormat, append)
+        
+        if writer is None:
             return results
-
         
-        print(f"Reference sequence : {self.__referenceSequence}", file=outputFilePath, end='\n'*2)
-            
-        for data in results:
-            print(f"Portion of the reference sequence : {data[0]}", file=outputFilePath)
-            print(f"Sequence queried : {data[1]}", file=outputFilePath)
-            print(f"Position for the best alignment in the reference sequence : {data[2]}", file=outputFilePath)
-            print(f"best scoring obtained : {data[3]}", file=outputFilePath, end='\n'*3)
-            
-        if outputFilePath != sys.stdout:
-            outputFilePath.close()
+        # a writer opened here has written its header as well
+        characters = writer.characters if writer is outputFilePath else 0
+        writer.writeAll(results)
+        if self.__metrics is not None:
+            self.__metrics.bytesWritten += writer.characters - characters
+        if writer is not outputFilePath:
+            writer.close()
+        else:
+            writer.flush()
         
         return results
+    
+    
+    def __openWriter(self, outputFilePath, outputFormat:str='text', append:bool=False)->ResultWriter:
+        """opens the output of prettyPrint
+
+        Args:
+            outputFilePath (None|bool|str|ResultWriter): see prettyPrint
+            outputFormat (str, optional): see prettyPrint. Defaults to 'text'.
+            append (bool, optional): see prettyPrint. Defaults to False.
+
+        Raises:
+            ValueError: if the output format is unknown
+
+        Returns:
+            writer (ResultWriter | None): the writer of the results, None if nothing has to be printed
+        """
+        
+        if isinstance(outputFilePath, ResultWriter):
+            return outputFilePath
+        if outputFormat not in WRITERS:
+            raise ValueError(f'Unknown output format {outputFormat}, expected one of {", ".join(WRITERS)}')
+        
+        if isinstance(outputFilePath, bool) and outputFilePath:
+            return WRITERS[outputFormat](sys.stdout, self.__referenceSequence, records=self.__records)
+        if isinstance(outputFilePath, str) and outputFilePath.strip() != '':
+            return WRITERS[outputFormat](outputFilePath, self.__referenceSequence, append=append, records=self.__records)
+        return None
 
 
     # DATA VALIDATION -------------------------------------------------------------------------
@@ -189,55 +3737,163 @@ class Alignment():
         """checks whether a given sequence is valid or not (i.e contains correct characters)
 
         Args:
-            string (str): the string to be checked
+            string (str | PackedSequence | MappedSequence): the string to be checked, a packed sequence is valid by 
+                construction and so it is only checked to be non empty, a mapped one is checked chunk by chunk
 
         Returns:
             result (bool): the result of the comparison
         """
-        return all(item in {'A', 'C', 'G', 'T', '-', 'X'} for item in string) and string.strip() != ''
+        if isinstance(string, PackedSequence):
+            return len(string) > 0
+        
+        if isinstance(string, MappedSequence):
+            return len(string) > 0 and all(map(self.checkSequenceValidity, string.chunks()))
+        
+        # a single translation deletes every valid character, anything left over is invalid
+        return string.strip() != '' and string.isascii() and not string.encode('ascii').translate(None, _INGEST_VALID)
     
     
     ## DATA READING ---------------------------------------------------------------------------
     
     
-    def readSequence(self, path:str)->str:
-        """reads the reference sequence
+    def readSequence(self, path:str, mapped:bool=False, packed:bool=False)->str:
+        """reads the reference sequence, uppercasing and validating it in the same sweep (see ingestSequence). 
+        The records of a FASTA or FASTQ file are concatenated, see readRecords.
+
+        Args:
+            path (str): the path to the txt file to be read, possibly gzip, bz2 or xz compressed.
+            mapped (bool, optional): if True the file is memory mapped instead of being read in memory, which is not 
+                possible for a compressed or a FASTA/FASTQ file. Defaults to False.
+            packed (bool, optional): if True the sequence is packed straight from the bytes read. Defaults to False.
+
+        Raises:
+            SequenceFormatError: if the file contains an invalid character, with its line and column
+
+        Returns:
+            sequence (str | PackedSequence | MappedSequence): the sequence read 
+        """
+        
+        if mapped:
+            return MappedSequence(path)
+        
+        if recordFormatOf(path) is not None:
+            return self.readRecords(path, packed)[0]
+        
+        sequence = ingestSequence(path, stats=self.__ingestStats)
+        return PackedSequence(sequence) if packed else sequence.decode('ascii')
+    
+    
+    def readRecords(self, path:str, packed:bool=False)->tuple:
+        """reads a reference made of several records (e.g. the chromosomes of a FASTA file, see ingestRecords): their 
+        sequences are concatenated and indexed by a RecordIndex, which keeps the alignments from spanning two records
 
         Args:
-            path (str): the path to the txt file to be read.
+            path (str): the path to the FASTA or FASTQ file to be read, possibly gzip, bz2 or xz compressed. A plain
+                sequence file is read by readSequence and it has no records.
+            packed (bool, optional): if True the sequence is packed straight from the bytes read. Defaults to False.
+
+        Raises:
+            SequenceFormatError: if a sequence contains an invalid character, with its line and column
 
         Returns:
-            sequence (str): the sequence read 
+            sequence (str | PackedSequence): the sequences of the records, one after the other
+            records (RecordIndex | None): the index of the records, None for a plain sequence file
         """
         
-        with open(path, 'r', encoding='UTF-8') as fp:
-            return ''.join(line.strip().upper() for line in  fp)
+        if recordFormatOf(path) is None:
+            return self.readSequence(path, packed=packed), None
+        
+        names, lengths, offsets, parts = [], [], [], []
+        for name, sequence, offset in ingestRecords(path, stats=self.__ingestStats):
+            names.append(name)
+            lengths.append(len(sequence))
+            offsets.append(offset)
+            parts.append(sequence)
+        
+        sequence = b''.join(parts)
+        return PackedSequence(sequence) if packed else sequence.decode('ascii'), RecordIndex(names, lengths, offsets, path)
         
         
     def readQueryData(self, path:str)->List[str]:
-        """reads the query data to be aligned
+        """reads the query data to be aligned, uppercasing and validating it in the same sweep (see ingestQueries)
 
         Args:
-            path (str): The path to the file containing the data to be aligned.
+            path (str): The path to the file containing the data to be aligned, possibly gzip, bz2 or xz compressed.
+
+        Raises:
+            SequenceFormatError: if the file contains an invalid character or an empty line, with its line and column
 
         Returns:
             sequences (list[str]): the list of sequences to be matched 
         """
         
-        with open(path, 'r', encoding='UTF-8') as fp:
-            return list(map(lambda line:line.strip().upper(), fp))
+        return list(self.iterQueryData(path))
+    
+    
+    def iterQueryData(self, path):
+        """reads the query data to be aligned lazily, one chunk of lines at a time
+
+        Args:
+            path (str | BinaryIO): The path to the file containing the data to be aligned, possibly gzip, bz2 or xz 
+                compressed, or an opened binary stream of plain lines (e.g. sys.stdin.buffer).
+
+        Yields:
+            sequence (str): the next sequence to be matched
+        """
+        
+        yield from ingestQueries(path, stats=self.__ingestStats)
         
         
     ## GETTERS ------------------------------------------------------------------------------------ 
-    def getReferenceSequence(self)->str:
+    def getReferenceSequence(self, packed:bool=None)->str:
         """returns the reference sequence 
 
+        Args:
+            packed (bool, optional): if True the reference is returned as a PackedSequence, if False as a string.
+                Defaults to None, i.e. the reference is returned in the form it was given.
+
+        Returns:
+            reference sequence (str | PackedSequence): the reference sequence
+        """
+        if self.__referenceSequence is None or packed is None:
+            return self.__referenceSequence
+        
+        if packed:
+            return self.__referenceSequence if isinstance(self.__referenceSequence, PackedSequence) else PackedSequence(self.__referenceSequence)
+        
+        return str(self.__referenceSequence)
+    
+    
+    def getRecordIndex(self)->'RecordIndex':
+        """returns the records of the reference sequence
+
         Returns:
-            reference sequence (str): the reference sequence
+            records (RecordIndex | None): the index of the records, None if the reference is a single sequence
         """
-        return self.__referenceSequence
+        return self.__records
     
         
+    def getIngestInfo(self)->dict:
+        """returns the statistics of the files read so far by readSequence, readQueryData and iterQueryData
+
+        Returns:
+            info (dict): the bytes read, the seconds spent reading and validating them and the resulting throughput in MB/s
+        """
+        
+        seconds = self.__ingestStats['seconds']
+        return {'bytes': self.__ingestStats['bytes'], 'seconds': seconds,
+                'throughput': self.__ingestStats['bytes'] / seconds / 1e6 if seconds else 0.0}
+    
+    
+    def getMetrics(self)->'AlignmentMetrics':
+        """returns the metrics collected by the last align_reads run collecting them (see its metrics parameter)
+
+        Returns:
+            metrics (AlignmentMetrics | None): the metrics, None if none have been collected yet
+        """
+        return self.__lastMetrics
+    
+    
     def getQuerySequence(self)->List[str]:
         """returns the list of sequence to be queried
 
@@ -248,20 +3904,23 @@ class Alignment():
         
         
     ## SETTERS ------------------------------------------------------------------------------------
-    def setReferenceSequence(self, referenceSequence:str)->None:
+    def setReferenceSequence(self, referenceSequence:str, records:'RecordIndex'=None)->None:
         """sets the new reference sequence to be used
 
         Args:
-            referenceSequence (str): the new reference sequence
+            referenceSequence (str | PackedSequence): the new reference sequence, a packed sequence is stored as it is
+            records (RecordIndex, optional): the records the reference is made of (see readRecords). Defaults to None.
 
         Raises:
-            ValueError: if the reference sequence is not correct
+            ValueError: if the reference sequence is not correct, or the records do not cover it exactly
         """
-        referenceSequence = referenceSequence.strip().upper()
-        if self.checkSequenceValidity(referenceSequence):
-            self.__referenceSequence = referenceSequence
-        else:
+        referenceSequence = self.__normalizeSequence(referenceSequence)
+        if not self.checkSequenceValidity(referenceSequence):
             raise ValueError('Invalid reference sequence')
+        if records is not None and records.size != len(referenceSequence):
+            raise ValueError(f'The records cover {records.size} bases, the reference sequence has {len(referenceSequence)}')
+        
+        self.__setReference(referenceSequence, records)
         
         
     def setQuerySequence(self, queries:List[str])->None:
@@ -279,4 +3938,19 @@ class Alignment():
             if not self.checkSequenceValidity(data):
                 raise ValueError(f'Invalid queries sequence, raised an error query : {data}')
             
-        self.__querySequence = list(queries)
\ No newline at end of file
+        self.__querySequence = list(queries)
+    
+    
+    def __normalizeSequence(self, sequence:str)->str:
+        """strips and uppercases a sequence, packed and mapped sequences are already normalized and are returned as they are
+
+        Args:
+            sequence (str | PackedSequence | MappedSequence): the sequence to be normalized
+
+        Returns:
+            sequence (str | PackedSequence | MappedSequence): the normalized sequence
+        """
+        if isinstance(sequence, (PackedSequence, MappedSequence)):
+            return sequence
+        
+        return sequence.strip().upper()
@@ -0,0 +1,297 @@
+"""Scaling benchmark of the alignment pipeline of Assignment9.
+
+Synthetic references and queries are generated from a seed, written to files and every stage of the pipeline is
+timed on its own. The timings are recorded to JSON and can be compared against a previous run, failing when a
+stage got slower than the tolerance allows:
+
+    python benchmark.py --preset small medium --output baseline.json
+    python benchmark.py --preset small medium --compare baseline.json --tolerance 0.25
+    python benchmark.py --reference-length 1000000 --queries 100 --query-length 50 --x-density 0.01
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+from typing import List
+
+from Assignment9 import Alignment, np
+
+# name -> (reference length, number of queries, query length), every large preset scales a single axis of medium
+PRESETS = {
+    'tiny': (1_000, 1, 4),
+    'small': (100_000, 100, 16),
+    'medium': (1_000_000, 1_000, 100),
+    'large-reference': (100_000_000, 1_000, 100),
+    'many-queries': (1_000_000, 100_000, 100),
+    'long-queries': (1_000_000, 1_000, 10_000),
+}
+
+# stages of the pipeline, in the order they are run
+STAGES = ['readSequence', 'readQueryData', 'checkSequenceValidity', 'find_best_alignment', 'align_reads', 'prettyPrint']
+
+# version of the JSON layout written by the benchmark
+FORMAT_VERSION = 1
+
+_BASES = bytes.maketrans(bytes(range(256)), b'ACGT' * 64)
+
+
+def _scatter(sequence:bytearray, rng:random.Random, xDensity:float, gapDensity:float)->None:
+    """overwrites round(density * len(sequence)) distinct positions of a sequence with X and as many with -"""
+
+    xCount, gapCount = round(xDensity * len(sequence)), round(gapDensity * len(sequence))
+    positions = rng.sample(range(len(sequence)), xCount + gapCount)
+    for i, pos in enumerate(positions):
+        sequence[pos] = ord('X') if i < xCount else ord('-')
+
+
+def generateReference(length:int, xDensity:float=0.0, gapDensity:float=0.0, seed:int=0)->str:
+    """generates a random reference, the bases are uniformly distributed
+
+    Args:
+        length (int): the length of the reference
+        xDensity (float, optional): the fraction of X symbols. Defaults to 0.0.
+        gapDensity (float, optional): the fraction of - symbols. Defaults to 0.0.
+        seed (int, optional): the seed of the generator, the same seed gives the same reference. Defaults to 0.
+
+    Returns:
+        reference (str): the reference sequence
+    """
+
+    rng = random.Random(seed)
+    sequence = bytearray(rng.randbytes(length).translate(_BASES))
+    _scatter(sequence, rng, xDensity, gapDensity)
+
+    return sequence.decode('ascii')
+
+
+def generateQueries(reference:str, count:int, length:int, mutationRate:float=0.02, xDensity:float=0.0,
+                    gapDensity:float=0.0, seed:int=0)->List[str]:
+    """generates queries as windows of the reference taken at random and mutated, so that they align somewhere
+
+    Args:
+        reference (str): the reference sequence, longer than the queries
+        count (int): the number of queries
+        length (int): the length of every query
+        mutationRate (float, optional): the fraction of positions replaced by a random base. Defaults to 0.02.
+        xDensity (float, optional): the fraction of X symbols. Defaults to 0.0.
+        gapDensity (float, optional): the fraction of - symbols. Defaults to 0.0.
+        seed (int, optional): the seed of the generator. Defaults to 0.
+
+    Returns:
+        queries (list[str]): the queries
+    """
+
+    rng = random.Random(seed)
+    queries = []
+
+    for _ in range(count):
+        start = rng.randrange(len(reference) - length)
+        query = bytearray(reference[start:start + length].encode('ascii'))
+        for pos in rng.sample(range(length), round(mutationRate * length)):
+            query[pos] = rng.choice(b'ACGT')
+        _scatter(query, rng, xDensity, gapDensity)
+        queries.append(query.decode('ascii'))
+
+    return queries
+
+
+def _timed(function, repeat:int)->dict:
+    """runs a function repeat times
+
+    Returns:
+        timing (dict): the best and the mean wall time in seconds, and the result of the last run
+    """
+
+    runs, result = [], None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        runs.append(time.perf_counter() - start)
+
+    return {'seconds': min(runs), 'mean': sum(runs) / len(runs), 'result': result}
+
+
+def runBenchmark(referenceLength:int, queryCount:int, queryLength:int, xDensity:float=0.0, gapDensity:float=0.0,
+                 seed:int=0, repeat:int=3, engine:str='auto', outputFormat:str='text', stages:List[str]=None,
+                 directory:str=None)->dict:
+    """generates a dataset and times the stages of the pipeline on it. Every run of the alignment stages uses a new
+    Alignment, so that no run benefits from the encodings and the results cached by the previous ones
+
+    Args:
+        referenceLength (int): the length of the reference
+        queryCount (int): the number of queries
+        queryLength (int): the length of every query
+        xDensity (float, optional): the fraction of X symbols in the reference and in the queries. Defaults to 0.0.
+        gapDensity (float, optional): the fraction of - symbols in the reference and in the queries. Defaults to 0.0.
+        seed (int, optional): the seed of the generators. Defaults to 0.
+        repeat (int, optional): the number of runs of every stage, the best one is reported. Defaults to 3.
+        engine (str, optional): the engine of find_best_alignment and align_reads. Defaults to 'auto'.
+        outputFormat (str, optional): the output format of prettyPrint. Defaults to 'text'.
+        stages (list[str], optional): the stages to be timed. Defaults to None, i.e. all of STAGES.
+        directory (str, optional): where the files are written. Defaults to None, i.e. a temporary directory.
+
+    Returns:
+        report (dict): the parameters of the run and, for every stage timed, the best and mean seconds
+    """
+
+    stages = STAGES if stages is None else stages
+    unknown = set(stages) - set(STAGES)
+    if unknown:
+        raise ValueError(f'Unknown stages {", ".join(sorted(unknown))}, expected some of {", ".join(STAGES)}')
+
+    reference = generateReference(referenceLength, xDensity, gapDensity, seed)
+    queries = generateQueries(reference, queryCount, queryLength, xDensity=xDensity, gapDensity=gapDensity, seed=seed + 1)
+    config = {'referenceLength': referenceLength, 'queryCount': queryCount, 'queryLength': queryLength,
+              'xDensity': xDensity, 'gapDensity': gapDensity, 'seed': seed, 'repeat': repeat, 'engine': engine,
+              'outputFormat': outputFormat}
+    timings = {}
+
+    with tempfile.TemporaryDirectory(dir=directory) as workdir:
+        referencePath, queryPath = os.path.join(workdir, 'reference.txt'), os.path.join(workdir, 'queries.txt')
+        outputPath = os.path.join(workdir, f'output.{outputFormat}')
+
+        with open(referencePath, 'w') as fp:
+            fp.writelines(reference[i:i + 60] + '\n' for i in range(0, len(reference), 60))
+        with open(queryPath, 'w') as fp:
+            fp.writelines(query + '\n' for query in queries)
+
+        functions = {
+            'readSequence': lambda: Alignment().readSequence(referencePath),
+            'readQueryData': lambda: Alignment().readQueryData(queryPath),
+            'checkSequenceValidity': lambda: Alignment().checkSequenceValidity(reference),
+            'find_best_alignment': lambda: Alignment().find_best_alignment(reference, queries[0], engine=engine),
+            'align_reads': lambda: Alignment(resultCacheSize=0).align_reads(referenceSequence=reference, querySequence=queries,
+                                                                            outputFile=False, engine=engine),
+        }
+
+        for stage in stages:
+            if stage == 'prettyPrint':
+                continue
+            timing = _timed(functions[stage], repeat)
+            del timing['result']
+            timings[stage] = timing
+
+        # prettyPrint formats the results against the reference of the Alignment which computed them
+        if 'prettyPrint' in stages:
+            alignment = Alignment()
+            results = alignment.align_reads(referenceSequence=reference, querySequence=queries, outputFile=False, engine=engine)
+            timing = _timed(lambda: alignment.prettyPrint(results, outputFilePath=outputPath, outputFormat=outputFormat), repeat)
+            del timing['result']
+            timings['prettyPrint'] = timing
+
+    return {'config': config, 'stages': timings}
+
+
+def environment()->dict:
+    """describes the machine and the interpreter the benchmark runs on"""
+
+    return {'python': platform.python_version(), 'implementation': platform.python_implementation(),
+            'platform': platform.platform(), 'processor': platform.processor(), 'cpus': os.cpu_count(),
+            'numpy': np.__version__ if np is not None else None}
+
+
+def compareResults(current:dict, baseline:dict, tolerance:float=0.2, minSeconds:float=0.005)->List[dict]:
+    """compares the stages of two benchmark reports, case by case
+
+    Args:
+        current (dict): the report of the run to be checked
+        baseline (dict): the report of the reference run
+        tolerance (float, optional): the relative slowdown allowed, 0.2 means 20% slower. Defaults to 0.2.
+        minSeconds (float, optional): stages taking less than this in both runs are too noisy and never regress.
+            Defaults to 0.005.
+
+    Returns:
+        comparisons (list[dict]): case, stage, baseline and current seconds, their ratio and whether it is a regression,
+            for every stage timed in both reports
+    """
+
+    comparisons = []
+
+    for case, report in current['cases'].items():
+        previous = baseline['cases'].get(case)
+        if previous is None:
+            continue
+
+        for stage, timing in report['stages'].items():
+            if stage not in previous['stages']:
+                continue
+
+            before, after = previous['stages'][stage]['seconds'], timing['seconds']
+            ratio = after / before if before else float('inf')
+            comparisons.append({'case': case, 'stage': stage, 'baseline': before, 'current': after, 'ratio': ratio,
+                                'regression': ratio > 1 + tolerance and max(before, after) >= minSeconds})
+
+    return comparisons
+
+
+def _parseArguments(argv:List[str])->argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Scaling benchmark of the alignment pipeline')
+    parser.add_argument('--preset', nargs='+', choices=PRESETS, help='the dataset sizes to be run')
+    parser.add_argument('--reference-length', type=int, help='length of the reference of a custom case')
+    parser.add_argument('--queries', type=int, default=100, help='number of queries of a custom case')
+    parser.add_argument('--query-length', type=int, default=16, help='length of the queries of a custom case')
+    parser.add_argument('--x-density', type=float, default=0.0, help='fraction of X symbols')
+    parser.add_argument('--gap-density', type=float, default=0.0, help='fraction of - symbols')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the generators')
+    parser.add_argument('--repeat', type=int, default=3, help='runs of every stage, the best one is reported')
+    parser.add_argument('--engine', default='auto', help='engine of find_best_alignment and align_reads')
+    parser.add_argument('--format', default='text', help='output format timed by prettyPrint')
+    parser.add_argument('--stages', nargs='+', choices=STAGES, help='the stages to be timed, all by default')
+    parser.add_argument('--output', help='path of the JSON report')
+    parser.add_argument('--compare', help='path of a JSON report to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='relative slowdown allowed by --compare')
+    parser.add_argument('--min-seconds', type=float, default=0.005, help='stages faster than this never regress')
+
+    arguments = parser.parse_args(argv)
+    if arguments.preset is None and arguments.reference_length is None:
+        arguments.preset = ['small']
+    return arguments
+
+
+def main(argv:List[str]=None)->int:
+    """runs the benchmark from the command line
+
+    Returns:
+        status (int): 1 if a stage regressed against the report given by --compare, 0 otherwise
+    """
+
+    arguments = _parseArguments(argv)
+    cases = {name: PRESETS[name] for name in arguments.preset or []}
+    if arguments.reference_length is not None:
+        cases['custom'] = (arguments.reference_length, arguments.queries, arguments.query_length)
+
+    report = {'version': FORMAT_VERSION, 'environment': environment(), 'cases': {}}
+
+    for case, (referenceLength, queryCount, queryLength) in cases.items():
+        report['cases'][case] = result = runBenchmark(referenceLength, queryCount, queryLength, arguments.x_density,
+                                                      arguments.gap_density, arguments.seed, arguments.repeat,
+                                                      arguments.engine, arguments.format, arguments.stages)
+        for stage, timing in result['stages'].items():
+            print(f'{case:>8} {stage:<24} {timing["seconds"]:12.6f} s')
+
+    if arguments.output:
+        with open(arguments.output, 'w') as fp:
+            json.dump(report, fp, indent=2)
+
+    if not arguments.compare:
+        return 0
+
+    with open(arguments.compare) as fp:
+        baseline = json.load(fp)
+
+    comparisons = compareResults(report, baseline, arguments.tolerance, arguments.min_seconds)
+    for comparison in comparisons:
+        flag = 'REGRESSION' if comparison['regression'] else 'ok'
+        print(f'{comparison["case"]:>8} {comparison["stage"]:<24} {comparison["baseline"]:12.6f} s -> '
+              f'{comparison["current"]:12.6f} s ({comparison["ratio"]:6.2f}x) {flag}')
+
+    return 1 if any(comparison['regression'] for comparison in comparisons) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,101 @@
+"""Command line batch runner of Assignment9.
+
+The queries are read from files, or from stdin, one at a time and every result is written out as soon as it is
+computed, to stdout by default:
+
+    python cli.py referenceSequence.txt queryData.txt
+    cat queryData.txt | python cli.py chr21.fa.gz --format sam --engine bitset > alignments.sam
+    python cli.py referenceSequence.txt queryData.txt --workers 4 --top-k 3 --output results.tsv
+
+Only what a run needs is imported: numpy is imported by the numpy based engines, the pools of processes by --workers,
+so that a short run starts in a few tens of milliseconds.
+"""
+
+import argparse
+import os
+import sys
+from typing import List
+
+# the largest reference, once decompressed, the auto engine aligns by the bitset engine, which does not need numpy
+SMALL_REFERENCE_BYTES = 1 << 16
+
+
+def _parseArguments(argv:List[str])->argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Aligns queries against a reference, streaming the results')
+    parser.add_argument('reference', help='the reference file: a sequence, FASTA or FASTQ file, possibly compressed')
+    parser.add_argument('queries', nargs='*', help='the query files, stdin if none or -')
+    parser.add_argument('-f', '--format', default='tsv', help='layout of the results: text, tsv, jsonl or sam')
+    parser.add_argument('-e', '--engine', default='auto', help='scoring engine: auto, python, numpy, fft, bitset or batch')
+    parser.add_argument('-w', '--workers', type=int, help='processes aligning the queries, all the queries are read first')
+    parser.add_argument('--queries-per-task', type=int, default=64, help='queries sent to a process at a time')
+    parser.add_argument('--chunk-size', type=int, help='reference offsets scanned at a time, the reference is memory mapped')
+    parser.add_argument('--top-k', type=int, help='the best alignments of every query reported as well')
+    parser.add_argument('--min-score', type=float, help='the alignments scoring at least this reported as well')
+    parser.add_argument('-o', '--output', help='path of the output file, stdout by default')
+    parser.add_argument('--append', action='store_true', help='appends the results to the output file')
+    return parser.parse_args(argv)
+
+
+def _queries(paths:List[str], alignment):
+    """the queries of the files, or of stdin, one at a time"""
+
+    for path in paths or ['-']:
+        # stdin is validated as a query file is, blank lines included
+        yield from alignment.iterQueryData(sys.stdin.buffer if path == '-' else path)
+
+
+def _engine(engine:str, path:str)->str:
+    """the engine of the run, auto prefers the bitset engine for a short reference to spare importing numpy"""
+
+    if engine != 'auto':
+        return engine
+
+    from Assignment9 import openInput
+
+    # the decoded length decides, a small compressed file may hold a long reference
+    with openInput(path) as fp:
+        return 'bitset' if len(fp.read(SMALL_REFERENCE_BYTES + 1)) <= SMALL_REFERENCE_BYTES else engine
+
+
+def main(argv:List[str]=None)->int:
+    """aligns the queries from the command line
+
+    Returns:
+        status (int): 0 on success, 1 if the input is not valid
+    """
+
+    arguments = _parseArguments(argv)
+
+    from Assignment9 import Alignment
+
+    alignment = Alignment()
+    output = arguments.output or True
+    minScore = arguments.min_score if arguments.min_score is None or not arguments.min_score.is_integer() \
+        else int(arguments.min_score)
+
+    try:
+        engine = _engine(arguments.engine, arguments.reference)
+        queries = _queries(arguments.queries, alignment)
+        options = dict(pathReferenceSequence=arguments.reference, outputFile=output, engine=engine, chunkSize=arguments.chunk_size,
+                       outputFormat=arguments.format, appendOutput=arguments.append)
+
+        # align_reads needs all the queries at once, iter_align_reads streams them
+        if arguments.workers is None and arguments.top_k is None and minScore is None:
+            for _ in alignment.iter_align_reads(querySequence=queries, **options):
+                pass
+        elif queries := list(queries):
+            alignment.align_reads(querySequence=queries, workers=arguments.workers, queriesPerTask=arguments.queries_per_task,
+                                  topK=arguments.top_k, minScore=minScore, **options)
+    except (ValueError, OSError) as error:
+        if isinstance(error, BrokenPipeError):
+            # the reader of stdout went away (e.g. head), the rest of the output is discarded
+            os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+            return 0
+        print(f'{os.path.basename(sys.argv[0])}: error: {error}', file=sys.stderr)
+        return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,515 @@
+"""Resident alignment server of Assignment9.
+
+The references are read, validated and encoded once, when the server starts, and every request aligns a batch of
+queries against one of them. Requests are served concurrently over a Unix socket or a localhost TCP port; every
+message is a JSON object preceded by its length, as a 4 bytes big endian unsigned integer:
+
+    python server.py serve --reference chr21=chr21.fa phage=referenceSequence.txt --socket /tmp/align.sock
+    python server.py align --socket /tmp/align.sock --reference phage --format tsv queryData.txt
+    python server.py stats --socket /tmp/align.sock
+
+A request holds an "op" (align, references, stats or ping); an align request also holds the "queries", the name
+of the "reference" (optional when the server holds a single one), the "engine" and the output "format". The answer
+holds "ok" and either the result of the request or the "error" raised by it.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import statistics
+import struct
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from io import StringIO
+from typing import List
+
+from Assignment9 import WRITERS, Alignment, RecordResult
+
+# the length prefix of every message
+_HEADER = struct.Struct('>I')
+
+# the largest message accepted, larger ones close the connection
+MAX_MESSAGE_BYTES = 1 << 28
+
+# the number of latest requests the latency percentiles are computed on
+LATENCY_WINDOW = 10_000
+
+
+def encodeMessage(message:dict)->bytes:
+    """encodes a message of the protocol: its JSON text preceded by its length
+
+    Args:
+        message (dict): the message
+
+    Raises:
+        ValueError: if the message is larger than MAX_MESSAGE_BYTES
+
+    Returns:
+        frame (bytes): the bytes to be sent
+    """
+
+    payload = json.dumps(message, separators=(',', ':')).encode('UTF-8')
+    if len(payload) > MAX_MESSAGE_BYTES:
+        raise ValueError(f'The message is {len(payload)} bytes long, at most {MAX_MESSAGE_BYTES} are allowed')
+    return _HEADER.pack(len(payload)) + payload
+
+
+def _checkLength(length:int)->int:
+    if length > MAX_MESSAGE_BYTES:
+        raise ValueError(f'The message is {length} bytes long, at most {MAX_MESSAGE_BYTES} are allowed')
+    return length
+
+
+async def _readMessage(reader:asyncio.StreamReader)->dict:
+    """reads the next message of a connection, None once the peer has closed it"""
+
+    try:
+        header = await reader.readexactly(_HEADER.size)
+    except asyncio.IncompleteReadError as error:
+        if error.partial:
+            raise
+        return None
+    return json.loads(await reader.readexactly(_checkLength(_HEADER.unpack(header)[0])))
+
+
+def _receiveExactly(connection:socket.socket, size:int)->bytes:
+    buffer = bytearray()
+    while len(buffer) < size:
+        data = connection.recv(min(size - len(buffer), 1 << 20))
+        if not data:
+            raise ConnectionError('The server closed the connection')
+        buffer += data
+    return bytes(buffer)
+
+
+class ServerStats():
+    def __init__(self, window:int=LATENCY_WINDOW):
+        """Latency and throughput of the requests served by an AlignmentServer, as a whole and by reference
+
+        Args:
+            window (int, optional): the number of latest requests the latency percentiles are computed on.
+                Defaults to LATENCY_WINDOW.
+        """
+
+        self.started = time.perf_counter()
+        self.requests = self.queries = self.errors = self.connections = self.activeConnections = 0
+        self.busySeconds = 0.0
+        self.references = {}
+        self.__latencies = deque(maxlen=window)
+
+    def record(self, reference:str, queries:int, seconds:float, failed:bool=False)->None:
+        """records a served align request
+
+        Args:
+            reference (str): the name of the reference aligned to
+            queries (int): the number of queries of the request
+            seconds (float): the time taken to serve it
+            failed (bool, optional): if True the request raised an error. Defaults to False.
+        """
+
+        self.requests += 1
+        self.errors += failed
+        self.__latencies.append(seconds)
+        if failed:
+            return
+
+        self.queries += queries
+        self.busySeconds += seconds
+        counts = self.references.setdefault(reference, {'requests': 0, 'queries': 0})
+        counts['requests'] += 1
+        counts['queries'] += queries
+
+    def asDict(self)->dict:
+        """returns the statistics as a JSON serializable dictionary, the latencies are in seconds"""
+
+        latencies = sorted(self.__latencies)
+        uptime = time.perf_counter() - self.started
+        percentile = lambda p: latencies[min(len(latencies) - 1, int(p * len(latencies)))] if latencies else 0.0
+
+        return {'uptime': uptime, 'requests': self.requests, 'queries': self.queries, 'errors': self.errors,
+                'connections': self.connections, 'activeConnections': self.activeConnections,
+                'latency': {'mean': statistics.fmean(latencies) if latencies else 0.0, 'p50': percentile(0.50),
+                            'p95': percentile(0.95), 'p99': percentile(0.99), 'max': latencies[-1] if latencies else 0.0},
+                'throughput': {'requestsPerSecond': self.requests / uptime if uptime else 0.0,
+                               'queriesPerSecond': self.queries / uptime if uptime else 0.0,
+                               'queriesPerBusySecond': self.queries / self.busySeconds if self.busySeconds else 0.0},
+                'references': {name: dict(counts) for name, counts in self.references.items()}}
+
+
+class AlignmentServer():
+    def __init__(self, references:dict, address=('127.0.0.1', 0), engine:str='auto', warmEngines:List[str]=None,
+                 workers:int=None, queriesPerTask:int=64, indexCache=None, resultCacheSize:int=65536):
+        """A long running server keeping its references, their encodings and the results already computed in memory.
+        The align requests are served concurrently by align_reads_async, the queries of all of them being aligned by
+        a single pool of threads.
+
+        Args:
+            references (dict[str, str | Alignment]): the references by name, either the path of a sequence, FASTA or
+                FASTQ file (possibly compressed) or an Alignment holding the reference already
+            address (str | tuple[str, int], optional): the path of the Unix socket, or the (host, port) the server
+                listens on, port 0 picks a free one. Defaults to ('127.0.0.1', 0).
+            engine (str, optional): the engine of the requests not asking for one. Defaults to 'auto'.
+            warmEngines (list[str], optional): the engines the references are encoded for when the server starts.
+                Defaults to None, i.e. the engine.
+            workers (int, optional): the threads aligning the queries. Defaults to None, i.e. the ThreadPoolExecutor one.
+            queriesPerTask (int, optional): the number of queries aligned by a thread at a time. Defaults to 64.
+            indexCache (IndexCache | str, optional): the cache of the Alignment objects created by the server.
+                Defaults to None.
+            resultCacheSize (int, optional): the result cache of the Alignment objects created by the server.
+                Defaults to 65536.
+
+        Raises:
+            ValueError: if no reference is given
+        """
+
+        if not references:
+            raise ValueError('The server needs at least a reference')
+
+        self.address, self.engine, self.queriesPerTask = address, engine, queriesPerTask
+        self.warmEngines = warmEngines or [engine]
+        self.stats = ServerStats()
+        self.__references, self.__sources = {}, dict(references)
+        self.__options = {'indexCache': indexCache, 'resultCacheSize': resultCacheSize}
+        self.__workers, self.__executor, self.__server, self.__connections = workers, None, None, set()
+        self.__loop, self.__thread, self.__ready = None, None, threading.Event()
+
+    def __load(self, source)->Alignment:
+        """reads a reference and encodes it for the warm engines"""
+
+        alignment = source if isinstance(source, Alignment) else Alignment(**self.__options)
+        probe = ['A']
+
+        # aligning a query is what reads the reference once and builds the encodings of an engine
+        for engine in self.warmEngines:
+            if isinstance(source, Alignment):
+                alignment.align_reads(querySequence=probe, outputFile=False, engine=engine)
+            else:
+                alignment.align_reads(pathReferenceSequence=source, querySequence=probe, outputFile=False, engine=engine)
+                source = alignment
+        alignment.clearResultCache()
+        return alignment
+
+    async def start(self):
+        """loads the references and starts listening
+
+        Returns:
+            address (str | tuple[str, int]): the address the server listens on
+        """
+
+        loop = asyncio.get_running_loop()
+        self.__executor = ThreadPoolExecutor(self.__workers)
+        for name, source in self.__sources.items():
+            self.__references[name] = await loop.run_in_executor(None, self.__load, source)
+
+        if isinstance(self.address, str):
+            if os.path.exists(self.address):
+                os.unlink(self.address)
+            self.__server = await asyncio.start_unix_server(self.__serve, self.address, limit=1 << 20)
+        else:
+            self.__server = await asyncio.start_server(self.__serve, *self.address, limit=1 << 20)
+            self.address = self.__server.sockets[0].getsockname()[:2]
+
+        self.stats = ServerStats()
+        return self.address
+
+    async def serveForever(self)->None:
+        """starts the server, if needed, and serves until it is closed"""
+
+        if self.__server is None:
+            await self.start()
+        try:
+            await self.__server.serve_forever()
+        except asyncio.CancelledError:
+            pass
+        finally:
+            await self.close()
+
+    async def close(self)->None:
+        """stops listening, the connections still open are closed and the threads are shut down"""
+
+        if self.__server is None:
+            return
+        server, self.__server = self.__server, None
+        server.close()
+        for writer in list(self.__connections):
+            writer.close()
+        await server.wait_closed()
+        self.__executor.shutdown(wait=False, cancel_futures=True)
+        if isinstance(self.address, str) and os.path.exists(self.address):
+            os.unlink(self.address)
+
+    def startInThread(self):
+        """runs the server in a background thread with its own event loop, until stop is called
+
+        Returns:
+            address (str | tuple[str, int]): the address the server listens on
+        """
+
+        failure = []
+
+        def run():
+            self.__loop = asyncio.new_event_loop()
+            try:
+                self.__loop.run_until_complete(self.start())
+            except Exception as error:
+                failure.append(error)
+                self.__ready.set()
+                return
+            self.__ready.set()
+            self.__loop.run_until_complete(self.serveForever())
+            self.__loop.close()
+
+        self.__thread = threading.Thread(target=run, name='AlignmentServer', daemon=True)
+        self.__thread.start()
+        self.__ready.wait()
+        if failure:
+            raise failure[0]
+        return self.address
+
+    def stop(self)->None:
+        """stops a server started by startInThread"""
+
+        if self.__thread is None:
+            return
+        asyncio.run_coroutine_threadsafe(self.close(), self.__loop).result()
+        self.__thread.join()
+        self.__thread = None
+
+    def references(self)->dict:
+        """returns the length, and the records if any, of every reference by name"""
+
+        described = {}
+        for name, alignment in self.__references.items():
+            records = alignment.getRecordIndex()
+            described[name] = {'length': len(alignment.getReferenceSequence()),
+                               'records': None if records is None else list(records.names)}
+        return described
+
+    async def __serve(self, reader:asyncio.StreamReader, writer:asyncio.StreamWriter)->None:
+        """serves the requests of a connection, one after the other"""
+
+        self.stats.connections += 1
+        self.stats.activeConnections += 1
+        self.__connections.add(writer)
+        try:
+            while (request := await _readMessage(reader)) is not None:
+                writer.write(encodeMessage(await self.__answer(request)))
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            self.stats.activeConnections -= 1
+            self.__connections.discard(writer)
+            writer.close()
+
+    async def __answer(self, request:dict)->dict:
+        """serves a single request, its errors are reported to the client"""
+
+        op = request.get('op') if isinstance(request, dict) else None
+        if op == 'ping':
+            return {'ok': True}
+        if op == 'references':
+            return {'ok': True, 'references': self.references()}
+        if op == 'stats':
+            return {'ok': True, 'stats': self.stats.asDict()}
+        if op != 'align':
+            return {'ok': False, 'error': f'Unknown op {op}, expected one of align, references, stats or ping', 'type': 'ValueError'}
+
+        start, name, queries = time.perf_counter(), request.get('reference'), request.get('queries') or []
+        if name is None and len(self.__references) == 1:
+            # the stats are recorded under the reference serving the request
+            name = next(iter(self.__references))
+        try:
+            results = await self.__align(name, queries, request.get('engine') or self.engine, request.get('format'))
+        except Exception as error:
+            self.stats.record(name, len(queries), time.perf_counter() - start, failed=True)
+            return {'ok': False, 'error': str(error), 'type': type(error).__name__}
+
+        self.stats.record(name, len(queries), time.perf_counter() - start)
+        return {'ok': True, **results}
+
+    async def __align(self, name:str, queries:List[str], engine:str, outputFormat:str)->dict:
+        """aligns the queries of a request
+
+        Returns:
+            answer (dict): either the "results", the records of the results against a reference made of several ones
+                being appended to them, or the "output" formatted by the writer of outputFormat
+        """
+
+        if name not in self.__references:
+            raise ValueError(f'Unknown reference {name}, expected one of {", ".join(self.__references)}')
+        if outputFormat is not None and outputFormat not in WRITERS:
+            raise ValueError(f'Unknown output format {outputFormat}, expected one of {", ".join(WRITERS)}')
+        if not queries:
+            return {'results': []} if outputFormat is None else {'output': ''}
+
+        alignment = self.__references[name]
+        results = [result async for result in alignment.align_reads_async(querySequence=queries, engine=engine, executor=self.__executor,
+                                                                        queriesPerTask=self.queriesPerTask)]
+
+        if outputFormat is not None:
+            output = StringIO()
+            with WRITERS[outputFormat](output, alignment.getReferenceSequence(), referenceName=name,
+                                       records=alignment.getRecordIndex()) as writer:
+                writer.writeAll(results)
+            return {'output': output.getvalue()}
+
+        return {'results': [result + [result.record, result.recordPosition] if isinstance(result, RecordResult) else result
+                            for result in results]}
+
+
+class AlignmentClient():
+    def __init__(self, address, timeout:float=None):
+        """A blocking client of an AlignmentServer, holding a single connection
+
+        Args:
+            address (str | tuple[str, int]): the path of the Unix socket, or the (host, port), of the server
+            timeout (float, optional): the seconds an answer is waited for. Defaults to None, i.e. forever.
+        """
+
+        family = socket.AF_UNIX if isinstance(address, str) else socket.AF_INET
+        self.__socket = socket.socket(family, socket.SOCK_STREAM)
+        self.__socket.settimeout(timeout)
+        self.__socket.connect(address if isinstance(address, str) else tuple(address))
+        if family == socket.AF_INET:
+            self.__socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def __enter__(self)->'AlignmentClient':
+        return self
+
+    def __exit__(self, *exception)->None:
+        self.close()
+
+    def close(self)->None:
+        """closes the connection"""
+        self.__socket.close()
+
+    def request(self, message:dict)->dict:
+        """sends a request and waits for its answer
+
+        Raises:
+            ValueError: if the server raised a ValueError serving the request
+            RuntimeError: if the server raised any other error
+
+        Returns:
+            answer (dict): the answer of the server
+        """
+
+        self.__socket.sendall(encodeMessage(message))
+        length = _checkLength(_HEADER.unpack(_receiveExactly(self.__socket, _HEADER.size))[0])
+        answer = json.loads(_receiveExactly(self.__socket, length))
+        if not answer['ok']:
+            raise (ValueError if answer.get('type') in {'ValueError', 'SequenceFormatError'} else RuntimeError)(answer['error'])
+        return answer
+
+    def align(self, queries:List[str], reference:str=None, engine:str=None, outputFormat:str=None):
+        """aligns a batch of queries
+
+        Args:
+            queries (list[str]): the queries to be aligned
+            reference (str, optional): the name of the reference. Defaults to None, i.e. the only one of the server.
+            engine (str, optional): the scoring engine. Defaults to None, i.e. the one of the server.
+            outputFormat (str, optional): if given the results are formatted by the server, one of WRITERS. Defaults to None.
+
+        Returns:
+            results (list[list] | str): the results of align_reads (RecordResult against a reference made of several
+                records) or their text in outputFormat
+        """
+
+        answer = self.request({'op': 'align', 'reference': reference, 'queries': list(queries), 'engine': engine,
+                               'format': outputFormat})
+        if outputFormat is not None:
+            return answer['output']
+        return [RecordResult(result[:4], *result[4:]) if len(result) == 6 else result for result in answer['results']]
+
+    def references(self)->dict:
+        """returns the references of the server by name, with their length and records"""
+        return self.request({'op': 'references'})['references']
+
+    def stats(self)->dict:
+        """returns the statistics of the server, see ServerStats.asDict"""
+        return self.request({'op': 'stats'})['stats']
+
+    def ping(self)->float:
+        """returns the seconds taken by a round trip to the server"""
+
+        start = time.perf_counter()
+        self.request({'op': 'ping'})
+        return time.perf_counter() - start
+
+
+def _address(arguments:argparse.Namespace):
+    return arguments.socket or (arguments.host, arguments.port)
+
+
+def _parseArguments(argv:List[str])->argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Resident alignment server')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    serve = commands.add_parser('serve', help='loads the references and serves the requests')
+    serve.add_argument('--reference', nargs='+', required=True, help='the references, as name=path or path')
+    serve.add_argument('--engine', default='auto', help='engine of the requests not asking for one')
+    serve.add_argument('--warm', nargs='+', help='engines the references are encoded for at start')
+    serve.add_argument('--workers', type=int, help='threads aligning the queries')
+    serve.add_argument('--queries-per-task', type=int, default=64, help='queries aligned by a thread at a time')
+    serve.add_argument('--index-cache', help='directory of the on disk index cache')
+
+    align = commands.add_parser('align', help='aligns the queries of files, or of stdin, and prints the results')
+    align.add_argument('files', nargs='*', help='the query files, stdin if none')
+    align.add_argument('--reference', help='the name of the reference, needed if the server holds several')
+    align.add_argument('--engine', help='the scoring engine')
+    align.add_argument('--format', default='text', choices=WRITERS, help='the layout of the output')
+
+    commands.add_parser('stats', help='prints the statistics of the server as JSON')
+
+    for command in commands.choices.values():
+        command.add_argument('--socket', help='path of the Unix socket')
+        command.add_argument('--host', default='127.0.0.1', help='host of the TCP server')
+        command.add_argument('--port', type=int, default=7878, help='port of the TCP server')
+
+    return parser.parse_args(argv)
+
+
+def main(argv:List[str]=None)->int:
+    """runs the server or the client from the command line
+
+    Returns:
+        status (int): 0 on success
+    """
+
+    arguments = _parseArguments(argv)
+
+    if arguments.command == 'serve':
+        references = dict(spec.split('=', 1) if '=' in spec else (os.path.basename(spec), spec) for spec in arguments.reference)
+        server = AlignmentServer(references, _address(arguments), arguments.engine, arguments.warm, arguments.workers,
+                                 arguments.queries_per_task, arguments.index_cache)
+
+        async def serve():
+            print(f'serving {", ".join(references)} on {await server.start()}', file=sys.stderr)
+            await server.serveForever()
+
+        try:
+            asyncio.run(serve())
+        except KeyboardInterrupt:
+            pass
+        return 0
+
+    with AlignmentClient(_address(arguments)) as client:
+        if arguments.command == 'stats':
+            print(json.dumps(client.stats(), indent=2))
+            return 0
+
+        # a single request, so that the header and the SAM query names are the ones of a single align_reads run
+        queries = [query for path in arguments.files for query in Alignment().iterQueryData(path)] if arguments.files \
+            else [line.strip() for line in sys.stdin if line.strip()]
+        sys.stdout.write(client.align(queries, arguments.reference, arguments.engine, arguments.format))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,179 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+import Assignment9
+from Assignment9 import Alignment
+
+
+class SlowScoring:
+    """a scoring function sleeping on every window, recording how many windows are scored at once"""
+
+    def __init__(self, delays=None):
+        self.delays, self.lock = delays or {}, threading.Lock()
+        self.calls = self.active = self.maxActive = 0
+
+    def __call__(self, alignment, seq1, seq2):
+        with self.lock:
+            self.calls += 1
+            self.active += 1
+            self.maxActive = max(self.maxActive, self.active)
+        time.sleep(self.delays.get(seq2, 0.001))
+        with self.lock:
+            self.active -= 1
+        return Alignment.score_alignment(alignment, seq1, seq2)
+
+
+async def collect(iterator):
+    return [result async for result in iterator]
+
+
+class TestAlignReadsAsync:
+    REF_SEQ = 'GATCGTGGCTCTAGA'
+    QUERIES = ['GATC', 'GGCT', 'CTAX', 'tagA', 'GATC', 'CGTG']
+
+    def test_same_results_of_align_reads(self, tmp_path):
+        # Arrange
+        query_file = tmp_path / "queries.txt"
+        query_file.write_text('\n'.join(self.QUERIES))
+        expected = Alignment().align_reads(referenceSequence=self.REF_SEQ, querySequence=self.QUERIES, outputFile=False)
+
+        async def queries():
+            for query in self.QUERIES:
+                await asyncio.sleep(0)
+                yield query
+
+        # Act
+        fromList = asyncio.run(collect(Alignment().align_reads_async(referenceSequence=self.REF_SEQ, querySequence=self.QUERIES,
+                                                                     queriesPerTask=2, maxInFlight=2)))
+        fromFile = asyncio.run(collect(Alignment().align_reads_async(referenceSequence=self.REF_SEQ, pathQuerySequence=str(query_file))))
+        fromAsync = asyncio.run(collect(Alignment().align_reads_async(referenceSequence=self.REF_SEQ, querySequence=queries(),
+                                                                      queriesPerTask=4)))
+
+        # Assert
+        assert fromList == fromFile == fromAsync == expected
+
+    def test_order_is_preserved(self):
+        # Arrange
+        scoring = SlowScoring({'GATC': 0.02})
+        alignment = Alignment(resultCacheSize=0)
+
+        # Act
+        results = asyncio.run(collect(alignment.align_reads_async(referenceSequence=self.REF_SEQ, querySequence=self.QUERIES,
+                                                                  alignmentFunction=scoring, queriesPerTask=1)))
+
+        # Assert
+        assert [result[1] for result in results] == [query.upper() for query in self.QUERIES]
+
+    def test_in_flight_chunks_are_bounded(self):
+        # Arrange
+        scoring = SlowScoring()
+
+        # Act
+        with ThreadPoolExecutor(8) as executor:
+            asyncio.run(collect(Alignment(resultCacheSize=0).align_reads_async(referenceSequence=self.REF_SEQ, querySequence=self.QUERIES * 3,
+                                                                               alignmentFunction=scoring, executor=executor,
+                                                                               queriesPerTask=1, maxInFlight=2)))
+
+        # Assert
+        assert scoring.maxActive <= 2 and scoring.calls == 18 * 12
+
+    def test_slow_chunk_holds_back_submissions(self):
+        # Arrange
+        scoring = SlowScoring({'GATC': 0.01})
+        submitted = []
+
+        class CountingExecutor(ThreadPoolExecutor):
+            def submit(self, *args, **kwargs):
+                submitted.append(1)
+                return super().submit(*args, **kwargs)
+
+        async def submittedAtFirstResult(executor):
+            iterator = Alignment(resultCacheSize=0).align_reads_async(referenceSequence=self.REF_SEQ, querySequence=self.QUERIES * 10,
+                                                                     alignmentFunction=scoring, executor=executor,
+                                                                     queriesPerTask=1, maxInFlight=2)
+            await iterator.__anext__()
+            count = len(submitted)
+            await iterator.aclose()
+            return count
+
+        # Act
+        with CountingExecutor(4) as executor:
+            count = asyncio.run(submittedAtFirstResult(executor))
+
+        # Assert
+        assert count <= 2
+
+    def test_reference_is_encoded_once(self, monkeypatch):
+        # Arrange
+        pytest.importorskip('numpy')
+        encodings = []
+        encoder, scorer, finder = Assignment9._ENGINES['numpy']
+
+        def slowEncoder(reference):
+            encodings.append(reference)
+            time.sleep(0.05)
+            return encoder(reference)
+
+        monkeypatch.setitem(Assignment9._ENGINES, 'numpy', (slowEncoder, scorer, finder))
+
+        # Act
+        with ThreadPoolExecutor(4) as executor:
+            results = asyncio.run(collect(Alignment().align_reads_async(referenceSequence=self.REF_SEQ, querySequence=self.QUERIES,
+                                                                        engine='numpy', executor=executor, queriesPerTask=1)))
+
+        # Assert
+        assert len(results) == 6 and encodings == [self.REF_SEQ]
+
+    def test_cancellation_stops_pending_chunks(self):
+        # Arrange
+        scoring = SlowScoring()
+        executor = ThreadPoolExecutor(2)
+
+        async def firstResult():
+            iterator = Alignment(resultCacheSize=0).align_reads_async(referenceSequence=self.REF_SEQ, querySequence=self.QUERIES * 20,
+                                                                     alignmentFunction=scoring, executor=executor,
+                                                                     queriesPerTask=4, maxInFlight=4)
+            result = await iterator.__anext__()
+            await iterator.aclose()
+            return result
+
+        # Act
+        result = asyncio.run(firstResult())
+        executor.shutdown(wait=True)
+        calls = scoring.calls
+
+        # Assert
+        assert result[1] == 'GATC'
+        assert calls < 120 * 12 / 4
+
+    def test_event_loop_is_not_blocked(self):
+        # Arrange
+        scoring, ticks = SlowScoring(), []
+
+        async def main():
+            async def ticker():
+                while True:
+                    ticks.append(time.perf_counter())
+                    await asyncio.sleep(0.005)
+
+            task = asyncio.create_task(ticker())
+            results = await collect(Alignment().align_reads_async(referenceSequence=self.REF_SEQ, querySequence=self.QUERIES,
+                                                                 alignmentFunction=scoring, queriesPerTask=6))
+            task.cancel()
+            return results
+
+        # Act
+        results = asyncio.run(main())
+
+        # Assert
+        assert len(results) == 6 and len(ticks) > 3
+
+    def test_errors(self):
+        # Act & Assert
+        with pytest.raises(ValueError, match='Before using align read'):
+            Alignment().align_reads_async(referenceSequence=self.REF_SEQ)
+
+        with pytest.raises(ValueError, match='Incorrect query sequence'):
+            asyncio.run(collect(Alignment().align_reads_async(referenceSequence=self.REF_SEQ, querySequence=['GATC', 'GANC'])))
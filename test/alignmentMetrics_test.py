@@ -0,0 +1,76 @@
+import json
+import pytest
+from Assignment9 import Alignment, AlignmentMetrics
+
+
+def matches(alignment, seq1, seq2):
+    return sum(a == b for a, b in zip(seq1, seq2))
+
+
+class TestAlignmentMetrics:
+    REF_SEQ = 'GATCGTGGCTCTAGA'
+    QUERIES = ['GATC', 'GGCT', 'CTAX']
+
+    def test_stages_and_counters(self, tmp_path):
+        # Arrange
+        pytest.importorskip('numpy')
+        ref_file, query_file, output = tmp_path / "reference.txt", tmp_path / "queries.txt", tmp_path / "output.tsv"
+        ref_file.write_text(self.REF_SEQ)
+        query_file.write_text('\n'.join(self.QUERIES + ['GATC']))
+        alignment = Alignment()
+
+        # Act
+        results = alignment.align_reads(pathReferenceSequence=str(ref_file), pathQuerySequence=str(query_file),
+                                        outputFile=str(output), outputFormat='tsv', engine='numpy', metrics=True)
+        metrics = alignment.getMetrics()
+
+        # Assert
+        assert results == Alignment().align_reads(referenceSequence=self.REF_SEQ, querySequence=self.QUERIES + ['GATC'], outputFile=False)
+        assert set(metrics.wallTime) == set(metrics.cpuTime) == {'reference', 'queries', 'alignment', 'results', 'output'}
+        assert all(seconds >= 0 for seconds in metrics.wallTime.values())
+        assert metrics.windowsScored == 3 * 12 and metrics.scoringCalls == 0
+        assert metrics.engines == {'GATC': 'numpy', 'GGCT': 'numpy', 'CTAX': 'numpy'}
+        assert (metrics.encodingCacheMisses, metrics.encodingCacheHits) == (1, 2)
+        assert metrics.resultCacheMisses == 3
+        assert metrics.bytesRead == len(self.REF_SEQ) + 19 and metrics.bytesWritten == len(output.read_text())
+        assert json.loads(json.dumps(metrics.asDict()))['windowsScored'] == 36
+
+    def test_disabled_by_default(self):
+        # Arrange
+        alignment = Alignment()
+
+        # Act
+        alignment.align_reads(referenceSequence=self.REF_SEQ, querySequence=self.QUERIES, outputFile=False)
+
+        # Assert
+        assert alignment.getMetrics() is None
+
+    def test_callback_and_accumulation(self):
+        # Arrange
+        collected, metrics = [], AlignmentMetrics()
+        alignment = Alignment()
+
+        # Act
+        alignment.align_reads(referenceSequence=self.REF_SEQ, querySequence=self.QUERIES, outputFile=False,
+                              alignmentFunction=matches, metrics=collected.append)
+        for _ in range(2):
+            alignment.align_reads(querySequence=self.QUERIES, outputFile=False, alignmentFunction=matches, metrics=metrics)
+
+        # Assert
+        assert collected[0].scoringCalls == collected[0].windowsScored == 3 * 12
+        assert collected[0].engines == dict.fromkeys(self.QUERIES, 'python')
+        assert (metrics.resultCacheHits, metrics.resultCacheMisses, metrics.windowsScored) == (6, 0, 0)
+        assert alignment.getMetrics() is metrics
+
+    def test_worker_counters(self):
+        # Arrange
+        alignment = Alignment(resultCacheSize=0, metrics=AlignmentMetrics())
+
+        # Act
+        alignment.align_reads(referenceSequence=self.REF_SEQ, querySequence=self.QUERIES, outputFile=False,
+                              engine='bitset', workers=2, queriesPerTask=1)
+        metrics = alignment.getMetrics()
+
+        # Assert
+        assert metrics.windowsScored == 3 * 12 and set(metrics.engines.values()) == {'bitset'}
+        assert 'alignment' in metrics.wallTime
@@ -0,0 +1,92 @@
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from Assignment9 import Alignment, RecordResult
+from server import AlignmentClient, AlignmentServer
+
+
+class TestAlignmentServer:
+    REF_SEQ = 'GATCGTGGCTCTAGA'
+    QUERIES = ['GATC', 'GGCT', 'CTAX', 'tagA']
+
+    @pytest.fixture
+    def server(self, tmp_path):
+        ref_file, fasta_file = tmp_path / "reference.txt", tmp_path / "records.fa"
+        ref_file.write_text(self.REF_SEQ)
+        fasta_file.write_text('>chr1 first\nGATCGTGG\n>chr2\nCTCTAGA\n')
+        server = AlignmentServer({'plain': str(ref_file), 'records': str(fasta_file)}, workers=2, queriesPerTask=1)
+        server.startInThread()
+        yield server
+        server.stop()
+
+    def test_same_results_of_align_reads(self, server):
+        # Arrange
+        expected = Alignment().align_reads(referenceSequence=self.REF_SEQ, querySequence=self.QUERIES, outputFile=False)
+
+        # Act
+        with AlignmentClient(server.address) as client:
+            results = client.align(self.QUERIES, 'plain')
+            records = client.align(['TAGA', 'GTGG'], 'records')
+            references = client.references()
+
+        # Assert
+        assert results == expected
+        assert [(result.record, result.recordPosition) for result in records] == [('chr2', 3), ('chr1', 4)]
+        assert all(isinstance(result, RecordResult) for result in records)
+        assert references == {'plain': {'length': 15, 'records': None}, 'records': {'length': 15, 'records': ['chr1', 'chr2']}}
+
+    def test_concurrent_clients_and_stats(self, server):
+        # Arrange
+        def request(i):
+            with AlignmentClient(server.address) as client:
+                return [client.align(self.QUERIES, 'plain') for _ in range(5)]
+
+        # Act
+        with ThreadPoolExecutor(4) as pool:
+            answers = list(pool.map(request, range(4)))
+        with AlignmentClient(server.address) as client:
+            stats = client.stats()
+
+        # Assert
+        assert all(answer == answers[0][0] for batch in answers for answer in batch)
+        assert (stats['requests'], stats['queries'], stats['errors'], stats['connections']) == (20, 80, 0, 5)
+        assert stats['references'] == {'plain': {'requests': 20, 'queries': 80}}
+        assert 0 < stats['latency']['p50'] <= stats['latency']['p95'] <= stats['latency']['max']
+        assert stats['throughput']['queriesPerSecond'] > 0
+
+    def test_unix_socket_and_formats(self, tmp_path):
+        # Arrange
+        path, output = str(tmp_path / "align.sock"), tmp_path / "output.tsv"
+        alignment = Alignment()
+        alignment.setReferenceSequence(self.REF_SEQ)
+        server = AlignmentServer({'phage': alignment}, address=path, warmEngines=['python', 'numpy'])
+        Alignment().align_reads(referenceSequence=self.REF_SEQ, querySequence=self.QUERIES, outputFile=str(output), outputFormat='tsv')
+
+        # Act
+        server.startInThread()
+        try:
+            with AlignmentClient(path) as client:
+                text = client.align(self.QUERIES, outputFormat='tsv')
+                named = client.align(self.QUERIES, 'phage')
+                ping = client.ping()
+                stats = client.stats()
+        finally:
+            server.stop()
+
+        # Assert
+        assert text == output.read_text() and ping > 0 and len(named) == 4
+        assert stats['references'] == {'phage': {'requests': 2, 'queries': 8}}
+
+    def test_errors(self, server):
+        # Act & Assert
+        with pytest.raises(ValueError, match='at least a reference'):
+            AlignmentServer({})
+
+        with AlignmentClient(server.address) as client:
+            with pytest.raises(ValueError, match='Unknown reference'):
+                client.align(self.QUERIES)
+            with pytest.raises(ValueError, match='Incorrect query sequence'):
+                client.align(['GANC'], 'plain')
+            with pytest.raises(ValueError, match='Unknown op'):
+                client.request({'op': 'shutdown'})
+            assert client.align(['GATC'], 'plain')[0][2] == 0
+            assert client.stats()['errors'] == 2
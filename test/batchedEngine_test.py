@@ -0,0 +1,70 @@
+import random
+import pytest
+import Assignment9
+from Assignment9 import Alignment
+
+np = pytest.importorskip('numpy')
+
+
+class TestBatchedEngine:
+    def test_same_results_as_python_engine(self):
+        # Arrange
+        rng = random.Random(13)
+        reference = ''.join(rng.choice('ACGTX-') for _ in range(700))
+        queries = [''.join(rng.choice('ACGTX-') for _ in range(rng.choice([1, 7, 20]))) for _ in range(60)]
+        queries += [reference[p:p+20] for p in rng.sample(range(680), 10)] + ['X' * 20, 'AAAAAAA']
+
+        # Act
+        results = Alignment().align_reads(referenceSequence=reference, querySequence=queries, outputFile=False, engine='batch')
+
+        # Assert
+        assert results == Alignment().align_reads(referenceSequence=reference, querySequence=queries, outputFile=False, engine='python')
+
+    def test_tiles_keep_leftmost_tie(self, monkeypatch):
+        # Arrange
+        monkeypatch.setattr(Assignment9, 'BATCH_TILE_BYTES', 64)
+        reference = 'CCCCCCCCAAAAAAAAAAAAAAAAA'
+
+        # Act
+        results = Alignment().align_reads(referenceSequence=reference, querySequence=['AAAA', 'CCCC', 'CAAA', 'GGGG'],
+                                          outputFile=False, engine='batch')
+
+        # Assert
+        assert [row[2:] for row in results] == [[8, 4], [0, 4], [7, 4], [0, -4]]
+
+    def test_query_blocks_are_bounded(self):
+        # Arrange
+        rng = random.Random(5)
+        reference = ''.join(rng.choice('ACGT') for _ in range(300))
+        queries = [''.join(rng.choice('ACGTX') for _ in range(16)) for _ in range(50)] + [reference[100:116]]
+        encoded = Assignment9._numpyEncode(reference)
+        tiles = list(Assignment9._batchedScoreTiles(encoded, queries, 4 * 16 * 5 * 8))
+
+        # Act
+        results = Assignment9._batchedBestOffsets(encoded, queries, 4 * 16 * 5 * 8)
+
+        # Assert
+        assert max(len(scores) for _, _, scores in tiles) == 8
+        assert sorted({first for first, _, _ in tiles}) == list(range(0, 51, 8))
+        assert results == [Alignment().find_best_alignment(reference, query, engine='python') for query in queries]
+
+    def test_groups_are_scored_together(self, monkeypatch):
+        # Arrange
+        calls = []
+        original = Assignment9._batchedBestOffsets
+        monkeypatch.setattr(Assignment9, '_batchedBestOffsets', lambda reference, queries, *args:
+                            calls.append(len(queries)) or original(reference, queries, *args))
+
+        # Act
+        Alignment().align_reads(referenceSequence='GATCGTGGCTCTAGA', querySequence=['GATC', 'CGTGT', 'GGCT', 'CTAX', 'GATC'],
+                                outputFile=False, engine='batch')
+
+        # Assert
+        assert sorted(calls) == [1, 3]
+
+    def test_find_best_alignment_and_errors(self):
+        # Act & Assert
+        assert Alignment().find_best_alignment('GATCGTGGCTCTAGA', 'CTAX', engine='batch') == (10, 2)
+
+        with pytest.raises(ValueError, match='should be higher'):
+            Alignment().align_reads(referenceSequence='GATC', querySequence=['GATCG'], outputFile=False, engine='batch')
@@ -0,0 +1,63 @@
+import json
+from Assignment9 import Alignment
+from benchmark import PRESETS, STAGES, compareResults, generateQueries, generateReference, main, runBenchmark
+
+
+class TestBenchmark:
+    def test_generators_are_seeded(self):
+        # Act
+        reference = generateReference(10_000, xDensity=0.01, gapDensity=0.02, seed=7)
+        queries = generateQueries(generateReference(1_000), 5, 50, xDensity=0.1, seed=8)
+
+        # Assert
+        assert reference == generateReference(10_000, xDensity=0.01, gapDensity=0.02, seed=7) != generateReference(10_000, seed=8)
+        assert (reference.count('X'), reference.count('-')) == (100, 200)
+        assert all(len(query) == 50 and query.count('X') == 5 for query in queries)
+        assert Alignment().checkSequenceValidity(reference) and queries == generateQueries(generateReference(1_000), 5, 50, xDensity=0.1, seed=8)
+
+    def test_every_stage_is_timed(self, tmp_path):
+        # Act
+        report = runBenchmark(2_000, 3, 8, repeat=1, outputFormat='tsv', directory=str(tmp_path))
+
+        # Assert
+        assert list(report['stages']) == STAGES
+        assert all(timing['seconds'] > 0 for timing in report['stages'].values())
+        assert list(tmp_path.iterdir()) == []
+
+    def test_pretty_print_formats_the_reference(self, tmp_path, monkeypatch):
+        # Arrange
+        references, prettyPrint = [], Alignment.prettyPrint
+        monkeypatch.setattr(Alignment, 'prettyPrint', lambda self, *args, **kwargs:
+                            references.append(self.getReferenceSequence()) or prettyPrint(self, *args, **kwargs))
+
+        # Act
+        runBenchmark(2_000, 3, 8, repeat=2, outputFormat='sam', stages=['prettyPrint'], directory=str(tmp_path))
+
+        # Assert
+        assert len(references) >= 2 and set(references) == {generateReference(2_000)}
+
+    def test_large_presets_scale_a_single_axis(self):
+        # Act
+        scaled = {name: [size != base for size, base in zip(sizes, PRESETS['medium'])] for name, sizes in PRESETS.items()
+                  if name.startswith(('large', 'many', 'long'))}
+
+        # Assert
+        assert scaled and all(sum(axes) == 1 for axes in scaled.values())
+
+    def test_regressions(self, tmp_path):
+        # Arrange
+        baseline = {'cases': {'small': {'stages': {'align_reads': {'seconds': 1.0}, 'readSequence': {'seconds': 0.001}}}}}
+        current = {'cases': {'small': {'stages': {'align_reads': {'seconds': 1.5}, 'readSequence': {'seconds': 0.003}}}}}
+        path, output = tmp_path / "baseline.json", tmp_path / "report.json"
+        path.write_text(json.dumps({'cases': {'tiny': {'stages': {'readSequence': {'seconds': 1e-9}}}}}))
+
+        # Act
+        comparisons = compareResults(current, baseline, tolerance=0.25)
+
+        # Assert
+        assert [(comparison['stage'], comparison['regression']) for comparison in comparisons] == \
+            [('align_reads', True), ('readSequence', False)]
+        assert not any(comparison['regression'] for comparison in compareResults(current, baseline, tolerance=0.6))
+        assert main(['--preset', 'tiny', '--repeat', '1', '--stages', 'readSequence', '--output', str(output),
+                     '--compare', str(path), '--min-seconds', '0']) == 1
+        assert list(json.loads(output.read_text())['cases']['tiny']['stages']) == ['readSequence']
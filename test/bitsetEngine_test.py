@@ -0,0 +1,63 @@
+import random
+import pytest
+import Assignment9
+from Assignment9 import Alignment
+
+
+class TestBitsetEngine:
+    @pytest.mark.parametrize("reference, query, expected_pos, expected_score", [
+        # Happy path tests
+        ("ACGTACGTACGT", "ACGT", 0, 4),
+        ("XTATATATATAT", "ATAT", 2, 4),
+        ("GCATGCATGCAT", "ATGX", 2, 2),
+
+        # Edge cases
+        ("AAAAA", "AAA", 0, 3),
+        ("XXXXX", "XX", 0, -2),
+        ("ACGTA", "ACGT", 0, 4)
+    ], ids=[
+        "standard_best_alignment",
+        "repeated_pattern_alignment",
+        "partial_match_alignment",
+        "multiple_best_positions",
+        "only_x",
+        "two_offsets"
+    ])
+    def test_bitset_engine_valid_inputs(self, reference, query, expected_pos, expected_score):
+        # Act & Assert
+        assert Alignment().find_best_alignment(reference, query, engine='bitset') == (expected_pos, expected_score)
+
+    def test_bitset_engine_matches_python_loop(self, random_sequence):
+        # Arrange
+        rng = random.Random(3)
+        alignment = Alignment()
+
+        # Act & Assert
+        for _ in range(200):
+            reference = random_sequence(rng, rng.randint(2, 80), rng.choice(['ACGTX-', 'AC', 'A-']))
+            query = random_sequence(rng, rng.randint(1, len(reference)-1), rng.choice(['ACGTX-', 'AC', 'A-']))
+
+            assert alignment.find_best_alignment(reference, query, engine='bitset') == \
+                alignment.find_best_alignment(reference, query, engine='python')
+
+    def test_bitset_offset_scores(self):
+        # Arrange
+        reference, query = "GCATG-ATGXAT", "ATGC"
+        encoded = Assignment9._BitsetReference(reference)
+
+        # Act & Assert
+        assert Assignment9._bitsetOffsetScores(encoded, query) == \
+            [Alignment().score_alignment(reference[i:i+len(query)], query) for i in range(len(reference)-len(query)+1)]
+
+    def test_auto_engine_without_numpy(self, monkeypatch):
+        # Arrange
+        monkeypatch.setattr(Assignment9, 'np', None)
+
+        # Act
+        results = Alignment().align_reads(referenceSequence="GCATG-ATGXAT", querySequence=["ATGC", "ATAT"], outputFile=False)
+
+        # Assert
+        assert results == [["ATG-", "ATGC", 2, 2], ["GCAT", "ATAT", 0, 0]]
+
+        with pytest.raises(ImportError, match='requires numpy'):
+            Alignment().find_best_alignment("ACGTACGT", "ACGT", engine='numpy')
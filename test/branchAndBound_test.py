@@ -0,0 +1,64 @@
+import random
+import pytest
+from Assignment9 import Alignment, _boundedScore
+
+
+def brute_force(reference, query):
+    scores = [Alignment().score_alignment(reference[i:i+len(query)], query) for i in range(len(reference) - len(query) + 1)]
+    return scores.index(max(scores)), max(scores)
+
+
+def custom_scoring(self, ref_sub, query):
+    return len([c for c in ref_sub if c in query])
+
+
+class TestBranchAndBound:
+    def test_same_results_as_full_scan(self):
+        # Arrange
+        rng = random.Random(14)
+        alignment = Alignment()
+
+        # Act & Assert
+        for _ in range(200):
+            reference = ''.join(rng.choice('ACGX-') for _ in range(rng.randint(6, 60)))
+            query = ''.join(rng.choice('ACGX-') for _ in range(rng.randint(1, 5)))
+            assert alignment.find_best_alignment(reference, query, engine='python') == brute_force(reference, query)
+            assert alignment.find_best_alignment(reference, query, engine='python', chunkSize=4) == brute_force(reference, query)
+
+    @pytest.mark.parametrize("threshold, expected", [
+        (float("-inf"), 1), (0, 1), (1, None), (4, None)
+    ], ids=["no_threshold", "below", "equal", "unreachable"])
+    def test_window_scoring_is_abandoned(self, threshold, expected):
+        # Act & Assert
+        assert _boundedScore("ACGX-", "ACGXA", threshold) == expected
+
+    def test_declared_maximum_stops_the_scan(self):
+        # Arrange
+        calls = []
+
+        def bounded_scoring(self, ref_sub, query):
+            calls.append(ref_sub)
+            return custom_scoring(self, ref_sub, query)
+        bounded_scoring.maxPositionScore = 1
+
+        # Act
+        result = Alignment().find_best_alignment("TTTTACGTTTTTT", "ACG", bounded_scoring)
+
+        # Assert
+        assert result == (4, 3)
+        assert calls == ["TTT", "TTT", "TTA", "TAC", "ACG"]
+        assert Alignment().find_best_alignment("TTTTACGTTTTTT", "ACG", custom_scoring) == result
+
+    def test_chunks_after_a_perfect_score_are_skipped(self, monkeypatch):
+        # Arrange
+        calls = []
+        original = Alignment._Alignment__scanWindows
+        monkeypatch.setattr(Alignment, '_Alignment__scanWindows', lambda self, reference, *args:
+                            calls.append(reference) or original(self, reference, *args))
+
+        # Act
+        result = Alignment().find_best_alignment("CCCCACGTTTTTTTTTTTTT", "ACGT", engine='bitset', chunkSize=4)
+
+        # Assert
+        assert result == (4, 4)
+        assert len(calls) == 2
@@ -0,0 +1,88 @@
+import gzip
+import io
+import os
+import subprocess
+import sys
+from Assignment9 import Alignment
+from cli import SMALL_REFERENCE_BYTES, _engine, main
+
+
+class TestCommandLine:
+    REF_SEQ = 'GATCGTGGCTCTAGA'
+    QUERIES = ['GATC', 'GGCT', 'CTAX', 'tagA']
+
+    def test_streams_files_and_stdin(self, tmp_path, capsys, monkeypatch):
+        # Arrange
+        ref_file, query_file, expected = tmp_path / "reference.txt", tmp_path / "queries.txt", tmp_path / "expected.sam"
+        ref_file.write_text(self.REF_SEQ)
+        query_file.write_text('\n'.join(self.QUERIES))
+        Alignment().align_reads(referenceSequence=self.REF_SEQ, querySequence=self.QUERIES, outputFile=str(expected), outputFormat='sam')
+        monkeypatch.setattr(sys, 'stdin', io.TextIOWrapper(io.BytesIO(('\n'.join(self.QUERIES) + '\n').encode())))
+
+        # Act
+        fromFile = main([str(ref_file), str(query_file), '--format', 'sam']), capsys.readouterr().out
+        fromStdin = main([str(ref_file), '--format', 'sam', '--engine', 'python']), capsys.readouterr().out
+
+        # Assert
+        assert fromFile == fromStdin == (0, expected.read_text())
+
+    def test_workers_and_hits(self, tmp_path):
+        # Arrange
+        ref_file, query_file, output = tmp_path / "reference.txt", tmp_path / "queries.txt", tmp_path / "output.tsv"
+        ref_file.write_text(self.REF_SEQ)
+        query_file.write_text('\n'.join(self.QUERIES))
+
+        # Act
+        status = main([str(ref_file), str(query_file), str(query_file), '--workers', '2', '--top-k', '2', '--output', str(output)])
+
+        # Assert
+        lines = output.read_text().splitlines()
+        assert status == 0 and len(lines) == 1 + 2 * len(self.QUERIES)
+        assert lines[1] == 'GATC\tGATC\t0\t4\t0:4,7:2'
+
+    def test_invalid_input(self, tmp_path, capsys, monkeypatch):
+        # Arrange
+        ref_file, query_file, blank_file = tmp_path / "reference.txt", tmp_path / "queries.txt", tmp_path / "blank.txt"
+        ref_file.write_text(self.REF_SEQ)
+        query_file.write_text('GATC\nGANC')
+        blank_file.write_text('GATC\n\nGGCT\n')
+        monkeypatch.setattr(sys, 'stdin', io.TextIOWrapper(io.BytesIO(b'GATC\n\nGGCT\n')))
+
+        # Act
+        invalid = main([str(ref_file), str(query_file)])
+        missing = main([str(tmp_path / "missing.txt"), str(query_file)])
+        blankFile = main([str(ref_file), str(blank_file)]), capsys.readouterr().err
+        blankStdin = main([str(ref_file)]), capsys.readouterr().err
+
+        # Assert
+        assert invalid == missing == 1
+        assert blankFile[0] == blankStdin[0] == 1
+        assert 'empty sequence at line 2, column 1' in blankFile[1] and 'empty sequence at line 2, column 1' in blankStdin[1]
+
+    def test_auto_engine_decides_on_decoded_length(self, tmp_path):
+        # Arrange
+        plain, small, large = tmp_path / "plain.txt", tmp_path / "small.txt.gz", tmp_path / "large.txt.gz"
+        plain.write_text(self.REF_SEQ)
+        small.write_bytes(gzip.compress(self.REF_SEQ.encode()))
+        large.write_bytes(gzip.compress(b'A' * (SMALL_REFERENCE_BYTES + 1)))
+
+        # Act & Assert
+        assert os.path.getsize(large) < SMALL_REFERENCE_BYTES
+        assert _engine('auto', str(plain)) == _engine('auto', str(small)) == 'bitset'
+        assert _engine('auto', str(large)) == 'auto' and _engine('numpy', str(plain)) == 'numpy'
+
+    def test_heavy_modules_are_not_imported(self, tmp_path):
+        # Arrange
+        ref_file, query_file = tmp_path / "reference.txt", tmp_path / "queries.txt"
+        ref_file.write_text(self.REF_SEQ)
+        query_file.write_text('\n'.join(self.QUERIES))
+        script = ('import sys, cli; status = cli.main(sys.argv[1:]); '
+                  'print(sorted({"numpy", "asyncio", "multiprocessing"} & set(sys.modules)), file=sys.stderr)')
+
+        # Act
+        run = subprocess.run([sys.executable, '-c', script, str(ref_file), str(query_file)], capture_output=True, text=True,
+                             cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+        # Assert
+        assert run.returncode == 0 and run.stdout.count('\n') == 5
+        assert run.stderr.strip() == '[]'
@@ -0,0 +1,43 @@
+import bz2
+import gzip
+import lzma
+import pytest
+from Assignment9 import Alignment, compressionOf
+
+COMPRESSORS = {'gzip': gzip.compress, 'bz2': bz2.compress, 'xz': lzma.compress}
+
+
+class TestCompressedInput:
+    REF_SEQ = 'GATCGTGGCTCTAGA'
+    QUERIES = ['GATC', 'GGCT', 'CTAX']
+
+    @pytest.mark.parametrize("compression", list(COMPRESSORS))
+    def test_readers(self, tmp_path, compression):
+        # Arrange
+        ref_file, query_file = tmp_path / "reference.dat", tmp_path / "queries.dat"
+        ref_file.write_bytes(COMPRESSORS[compression](b'gatcgtg\nGCTCTAGA\n'))
+        query_file.write_bytes(COMPRESSORS[compression]('\n'.join(self.QUERIES).encode()))
+        alignment = Alignment()
+
+        # Act & Assert
+        assert compressionOf(str(ref_file)) == compression
+        assert alignment.readSequence(str(ref_file)) == self.REF_SEQ
+        assert alignment.readQueryData(str(query_file)) == self.QUERIES
+        assert alignment.align_reads(pathReferenceSequence=str(ref_file), pathQuerySequence=str(query_file), outputFile=False,
+                                     chunkSize=4) == Alignment().align_reads(referenceSequence=self.REF_SEQ, querySequence=self.QUERIES,
+                                                                             outputFile=False)
+
+    def test_plain_and_errors(self, tmp_path):
+        # Arrange
+        plain, broken = tmp_path / "plain.txt", tmp_path / "broken.gz"
+        plain.write_text(self.REF_SEQ)
+        broken.write_bytes(gzip.compress(b'ACGT\nAC1T\n'))
+
+        # Act & Assert
+        assert compressionOf(str(plain)) is None
+
+        with pytest.raises(ValueError, match='at line 2, column 3'):
+            Alignment().readSequence(str(broken))
+
+        with pytest.raises(ValueError, match='cannot be memory mapped'):
+            Alignment().readSequence(str(broken), mapped=True)
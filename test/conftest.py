@@ -0,0 +1,11 @@
+import pytest
+
+
+@pytest.fixture
+def random_sequence():
+    """random_sequence(rng, length, alphabet='ACGTX-') draws a sequence of the given length from the alphabet"""
+
+    def build(rng, length, alphabet='ACGTX-'):
+        return ''.join(rng.choice(alphabet) for _ in range(length))
+
+    return build
@@ -0,0 +1,112 @@
+import gzip
+import random
+import pytest
+from Assignment9 import Alignment, RecordIndex, RecordResult, SequenceFormatError, ingestRecords
+
+FASTA = ">chr1 first record\nAAAAcc\nCC\r\n>chr2\nGGTT\nTTTT\n\n>empty\n>chr3\nACGTACGT\n"
+FASTQ = "@r1 read\nCCGG\n+\nIIII\n\n@r2\nttac\n+r2\nIIII\n"
+
+
+def best_inside_records(alignment, records, reference, query, scoringFunction=Alignment.score_alignment):
+    windows = [(pos, scoringFunction(alignment, reference[pos:pos+len(query)], query))
+               for start, stop in records.intervals(len(query)) for pos in range(start, stop)]
+    return max(windows, key=lambda window: (window[1], -window[0]))
+
+
+class TestFastaRecords:
+    @pytest.mark.parametrize("chunkSize", [1, 5, 1 << 20])
+    def test_records_and_random_access(self, tmp_path, chunkSize):
+        # Arrange
+        plain, compressed = tmp_path / "reference.fa", tmp_path / "reference.fa.gz"
+        plain.write_bytes(FASTA.encode())
+        compressed.write_bytes(gzip.compress(FASTA.encode()))
+
+        # Act
+        records = list(ingestRecords(str(plain), chunkSize=chunkSize))
+        sequence, index = Alignment().readRecords(str(compressed))
+
+        # Assert
+        assert [(name, data) for name, data, _ in records] == [('chr1', b'AAAACCCC'), ('chr2', b'GGTTTTTT'), ('empty', b''),
+                                                               ('chr3', b'ACGTACGT')]
+        assert sequence == 'AAAACCCCGGTTTTTTACGTACGT' and index.names == ['chr1', 'chr2', 'empty', 'chr3']
+        assert index.locate(8) == ('chr2', 0) and index.locate(16) == ('chr3', 0)
+        assert [index.fetch(name) for name in index.names] == ['AAAACCCC', 'GGTTTTTT', '', 'ACGTACGT']
+        assert RecordIndex(index.names, index.lengths, index.offsets, str(plain)).fetch(3) == 'ACGTACGT'
+
+    @pytest.mark.parametrize("engine", ['python', 'bitset', 'numpy', 'fft', 'batch'])
+    def test_no_window_spans_two_records(self, engine):
+        # Arrange
+        if engine not in ['python', 'bitset']:
+            pytest.importorskip('numpy')
+        rng = random.Random(20)
+        alignment = Alignment()
+
+        # Act & Assert
+        for _ in range(20):
+            lengths = [rng.randint(0, 15) for _ in range(rng.randint(1, 5))]
+            reference = ''.join(rng.choice('ACX') for _ in range(sum(lengths)))
+            query = ''.join(rng.choice('ACX') for _ in range(rng.randint(1, 6)))
+            records = RecordIndex([f'r{i}' for i in range(len(lengths))], lengths)
+            if len(reference) <= len(query) or not records.intervals(len(query)):
+                continue
+
+            expected = best_inside_records(alignment, records, reference, query)
+            assert alignment.find_best_alignment(reference, query, engine=engine, records=records) == expected
+            assert alignment.find_best_alignment(reference, query, engine=engine, records=records, chunkSize=3) == expected
+            assert alignment.find_top_alignments(reference, query, engine=engine, topK=1, records=records, chunkSize=4)[0] == expected
+
+    def test_align_reads(self, tmp_path):
+        # Arrange
+        reference, queries, output = tmp_path / "reference.fa", tmp_path / "queries.fq", tmp_path / "output.sam"
+        reference.write_text(FASTA)
+        queries.write_text(FASTQ)
+        alignment = Alignment()
+
+        # Act
+        results = alignment.align_reads(pathReferenceSequence=str(reference), pathQuerySequence=str(queries),
+                                        outputFile=str(output), outputFormat='sam')
+        streamed = list(alignment.iter_align_reads(querySequence=['CCGG'], chunkSize=2))
+        parallel = alignment.align_reads(querySequence=['CCGG', 'TTAC'], outputFile=False, workers=2, queriesPerTask=1)
+
+        # Assert
+        # the exact occurrence of TTAC spans chr2 and chr3
+        assert results == parallel == [['CCCC', 'CCGG', 4, 0], ['GTAC', 'TTAC', 18, 2]]
+        assert isinstance(results[0], RecordResult) and (results[1].record, results[1].recordPosition) == ('chr3', 2)
+        assert streamed == results[:1]
+        # SAM requires LN to be at least 1, the empty record is left out
+        assert output.read_text().splitlines()[1:5] == ['@SQ\tSN:chr1\tLN:8', '@SQ\tSN:chr2\tLN:8', '@SQ\tSN:chr3\tLN:8',
+                                                        '@PG\tID:Assignment9\tPN:Assignment9']
+        assert alignment.getRecordIndex().locate(16) == ('chr3', 0)
+        assert output.read_text().splitlines()[-1].startswith('q2\t0\tchr3\t3\t')
+
+    def test_set_reference_with_records(self):
+        # Arrange
+        alignment = Alignment()
+
+        # Act
+        alignment.setReferenceSequence('AAAACCCCGGTT', RecordIndex(['a', 'b'], [6, 6]))
+        results = alignment.align_reads(querySequence=['CCGG'], outputFile=False)
+
+        # Assert
+        assert (results[0].record, results[0].recordPosition, results[0][3]) == ('b', 0, 4)
+
+        with pytest.raises(ValueError, match='cover 10 bases'):
+            alignment.setReferenceSequence('AAAACCCCGGTT', RecordIndex(['a', 'b'], [6, 4]))
+
+    @pytest.mark.parametrize("content, line, column", [
+        (">chr1\nACGT\nACNT\n", 3, 3),
+        ("@r1\nACGT\nIIII\nIIII\n", 3, 1),
+        ("@r1\nACGT\n+\n", 4, 1),
+        ("@r1\n\n+\n\n", 2, 1),
+    ], ids=["fasta_invalid", "fastq_separator", "fastq_truncated", "fastq_empty_query"])
+    def test_errors(self, tmp_path, content, line, column):
+        # Arrange
+        test_file = tmp_path / "records.txt"
+        test_file.write_text(content)
+
+        # Act
+        with pytest.raises(SequenceFormatError) as error:
+            Alignment().readQueryData(str(test_file))
+
+        # Assert
+        assert (error.value.line, error.value.column) == (line, column)
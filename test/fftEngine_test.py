@@ -0,0 +1,79 @@
+import random
+import pytest
+import Assignment9
+from Assignment9 import Alignment
+
+np = pytest.importorskip('numpy')
+
+
+class TestFFTEngine:
+    @pytest.mark.parametrize("reference, query, expected_pos, expected_score", [
+        # Happy path tests
+        ("ACGTACGTACGT", "ACGT", 0, 4),
+        ("XTATATATATAT", "ATAT", 2, 4),
+        ("GCATGCATGCAT", "ATGX", 2, 2),
+
+        # Edge cases
+        ("AAAAA", "AAA", 0, 3),
+        ("XXXXX", "XX", 0, -2),
+        ("AC", "A", 0, 1)
+    ], ids=[
+        "standard_best_alignment",
+        "repeated_pattern_alignment",
+        "partial_match_alignment",
+        "multiple_best_positions",
+        "only_x",
+        "smallest_reference"
+    ])
+    def test_fft_engine_valid_inputs(self, reference, query, expected_pos, expected_score):
+        # Act
+        pos, score = Alignment().find_best_alignment(reference, query, engine='fft')
+
+        # Assert
+        assert (pos, score) == (expected_pos, expected_score)
+        assert type(pos) is int and type(score) is int
+
+    def test_fft_engine_matches_python_loop(self, random_sequence):
+        # Arrange
+        rng = random.Random(2)
+        alignment = Alignment()
+
+        # Act & Assert
+        for _ in range(100):
+            reference = random_sequence(rng, rng.randint(2, 300), rng.choice(['ACGTX-', 'ACGT', 'A-']))
+            query = random_sequence(rng, rng.randint(1, len(reference)-1), rng.choice(['ACGTX-', 'ACGT', 'A-']))
+
+            assert alignment.find_best_alignment(reference, query, engine='fft') == \
+                alignment.find_best_alignment(reference, query, engine='python')
+
+    def test_fft_engine_long_query_scores_are_exact(self, random_sequence):
+        # Arrange
+        rng = random.Random(3)
+        reference = random_sequence(rng, 20000, 'ACGT')
+        query = reference[7000:9000]
+
+        # Act & Assert
+        assert Alignment().find_best_alignment(reference, query, engine='fft') == (7000, 2000)
+        assert Alignment().find_best_alignment(reference, query, engine='fft') == \
+            Alignment().find_best_alignment(reference, query, engine='numpy')
+
+    def test_auto_engine_selects_fft_for_long_queries(self, monkeypatch):
+        # Arrange
+        calls = []
+        fft = Assignment9._ENGINES['fft']
+        monkeypatch.setitem(Assignment9._ENGINES, 'fft', (fft[0], lambda *args: calls.append(1) or fft[1](*args), fft[2]))
+        reference = 'ACGT' * 200
+
+        # Act
+        Alignment().find_best_alignment(reference, reference[:Assignment9.FFT_MIN_QUERY_LENGTH-1])
+        Alignment().find_best_alignment(reference, reference[:Assignment9.FFT_MIN_QUERY_LENGTH])
+
+        # Assert
+        assert len(calls) == 1
+
+    def test_align_reads_fft_engine(self):
+        # Act
+        results = Alignment().align_reads(referenceSequence="GCATG-ATGXAT", querySequence=["ATGC", "XXXX"], outputFile=False, engine='fft')
+
+        # Assert
+        assert results == [["ATG-", "ATGC", 2, 2], ["GCAT", "XXXX", 0, -4]]
@@ -0,0 +1,153 @@
+import os
+import random
+import pytest
+import Assignment9
+from Assignment9 import Alignment, IndexCache, KmerIndex, PackedSequence, SuffixArray
+
+np = pytest.importorskip('numpy')
+
+
+class TestIndexCache:
+    REF_SEQ = 'GATCGTGGCTCTAGA' * 4
+
+    def test_fingerprint_depends_only_on_content(self, tmp_path):
+        # Arrange
+        ref_file = tmp_path / "reference_sequence.txt"
+        ref_file.write_text(self.REF_SEQ[:20] + '\n' + self.REF_SEQ[20:].lower())
+        alignment = Alignment()
+
+        # Act
+        fingerprint = alignment.getReferenceFingerprint(self.REF_SEQ)
+
+        # Assert
+        assert alignment.getReferenceFingerprint(PackedSequence(self.REF_SEQ)) == fingerprint
+        assert alignment.getReferenceFingerprint(np.frombuffer(self.REF_SEQ.encode(), dtype=np.uint8)) == fingerprint
+        with alignment.readSequence(str(ref_file), mapped=True) as mapped:
+            assert alignment.getReferenceFingerprint(mapped) == fingerprint
+        assert alignment.getReferenceFingerprint(self.REF_SEQ + 'A') != fingerprint
+        assert Alignment().getReferenceFingerprint() is None
+
+    def test_artifacts_are_reused(self, tmp_path, monkeypatch):
+        # Arrange
+        queries = ['GATCGTGGCTCTAGAG', 'CTAX', 'CGTGT']
+        expected = Alignment().align_reads(referenceSequence=self.REF_SEQ, querySequence=queries, outputFile=False)
+        Alignment(str(tmp_path)).align_reads(referenceSequence=self.REF_SEQ, querySequence=queries, outputFile=False,
+                                             exactIndex=True, maxMismatches=0)
+        fingerprint = Alignment().getReferenceFingerprint(self.REF_SEQ)
+
+        # Assert
+        assert sorted(os.listdir(tmp_path / fingerprint)) == sorted(['suffix', f'kmer{Assignment9.KMER_SIZE}'])
+
+        # Act
+        for cls in [KmerIndex, SuffixArray]:
+            monkeypatch.setattr(cls, '__init__', lambda *args: pytest.fail('index rebuilt'))
+        results = Alignment(IndexCache(str(tmp_path))).align_reads(referenceSequence=self.REF_SEQ, querySequence=queries,
+                                                                   outputFile=False, exactIndex=True, maxMismatches=0)
+
+        # Assert
+        assert results == expected
+
+    def test_loaded_arrays_are_memory_mapped(self, tmp_path):
+        # Arrange
+        cache = IndexCache(str(tmp_path))
+        index = KmerIndex(self.REF_SEQ, k=4)
+        cache.store('fingerprint', 'kmer4', index.toArrays())
+
+        # Act
+        arrays = cache.load('fingerprint', 'kmer4')
+        loaded = KmerIndex.fromArrays(arrays)
+
+        # Assert
+        assert isinstance(arrays['keys'], np.memmap)
+        assert loaded.k == 4
+        assert list(loaded.lookup('GATC')) == list(index.lookup('GATC'))
+        assert cache.load('fingerprint', 'missing') is None
+        assert not [name for name in os.listdir(tmp_path) if name.startswith('.tmp')]
+
+    def test_lru_eviction(self, tmp_path):
+        # Arrange
+        cache = IndexCache(str(tmp_path), maxBytes=2000)
+        data = {'values': np.zeros(800, dtype=np.uint8)}
+
+        # Act
+        cache.store('a', 'numpy', data)
+        cache.store('b', 'numpy', data)
+        os.utime(tmp_path / 'a' / 'numpy', (1, 1))
+        os.utime(tmp_path / 'b' / 'numpy', (2, 2))
+        cache.load('a', 'numpy')
+        cache.store('c', 'numpy', data)
+
+        # Assert
+        assert cache.load('b', 'numpy') is None
+        assert cache.load('a', 'numpy') is not None
+        assert cache.load('c', 'numpy') is not None
+        assert not os.path.exists(tmp_path / 'b')
+
+    def test_parallel_workers_share_the_cache(self, tmp_path):
+        # Arrange
+        rng = random.Random(13)
+        reference = ''.join(rng.choice('ACGT') for _ in range(500))
+        queries = [reference[p:p+30] for p in range(0, 400, 40)]
+
+        # Act
+        results = Alignment(str(tmp_path)).align_reads(referenceSequence=reference, querySequence=queries, outputFile=False,
+                                                       workers=2, maxMismatches=1)
+
+        # Assert
+        assert results == Alignment().align_reads(referenceSequence=reference, querySequence=queries, outputFile=False)
+        assert os.listdir(tmp_path / Alignment().getReferenceFingerprint(reference)) == [f'kmer{Assignment9.KMER_SIZE}']
+
+    def test_chunks_are_not_cached(self, tmp_path, monkeypatch):
+        # Arrange
+        rng = random.Random(3)
+        reference = ''.join(rng.choice('ACGT') for _ in range(2_000))
+        queries = [reference[p:p+20] for p in range(0, 1_900, 100)]
+        expected = Alignment().align_reads(referenceSequence=reference, querySequence=queries, outputFile=False)
+        calls = []
+        original = Assignment9._referenceFingerprint
+        monkeypatch.setattr(Assignment9, '_referenceFingerprint', lambda reference: calls.append(len(reference)) or original(reference))
+
+        # Act
+        results = Alignment(str(tmp_path)).align_reads(referenceSequence=reference, querySequence=queries, outputFile=False,
+                                                       engine='numpy', chunkSize=100, maxMismatches=0)
+
+        # Assert
+        assert results == expected
+        assert calls == [len(reference)]
+        assert os.listdir(tmp_path / original(reference)) == [f'kmer{Assignment9.KMER_SIZE}']
+
+    def test_engine_encodings_are_not_cached(self, tmp_path, monkeypatch):
+        # Arrange
+        alignment = Alignment(str(tmp_path), resultCacheSize=0)
+        monkeypatch.setattr(Assignment9, '_referenceFingerprint', lambda reference: pytest.fail('reference fingerprinted'))
+
+        # Act
+        alignment.align_reads(referenceSequence=self.REF_SEQ, querySequence=['GATC', 'CTAX'], outputFile=False, engine='batch')
+        alignment.align_reads(referenceSequence=self.REF_SEQ, querySequence=['GATC', 'CTAX'], outputFile=False, engine='numpy',
+                              metrics=True)
+        metrics = alignment.getMetrics()
+
+        # Assert
+        assert os.listdir(tmp_path) == []
+        assert (metrics.encodingCacheMisses, metrics.encodingCacheHits) == (0, 2)
+
+    def test_eviction_tolerates_removed_fingerprints(self, tmp_path, monkeypatch):
+        # Arrange
+        cache = IndexCache(str(tmp_path), maxBytes=0)
+        cache.store('a', 'numpy', {'values': np.zeros(10, dtype=np.uint8)})
+        listdir = os.listdir
+
+        def racingListdir(path):
+            # another job removes the fingerprint right after the cache directory is listed
+            names = listdir(path)
+            if path == str(tmp_path) and os.path.exists(tmp_path / 'a'):
+                for name in listdir(tmp_path / 'a'):
+                    Assignment9.shutil.rmtree(tmp_path / 'a' / name)
+                os.rmdir(tmp_path / 'a')
+            return names
+
+        monkeypatch.setattr(Assignment9.os, 'listdir', racingListdir)
+
+        # Act & Assert
+        cache.evict()
+        assert not os.path.exists(tmp_path / 'a')
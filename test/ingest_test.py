@@ -0,0 +1,112 @@
+import random
+import pytest
+from Assignment9 import Alignment, PackedSequence, SequenceFormatError, ingestQueries, ingestRecords, ingestSequence
+
+
+class TestIngest:
+    @pytest.mark.parametrize("chunkSize", [1, 3, 7, 1 << 20])
+    def test_chunks_give_the_same_result(self, tmp_path, chunkSize):
+        # Arrange
+        rng = random.Random(18)
+        queries = [''.join(rng.choice('ACGTXacgtx-') for _ in range(rng.randint(1, 20))) for _ in range(30)]
+        test_file = tmp_path / "queries.txt"
+        test_file.write_bytes(('  \r\n'.join(queries) + '\n').encode())
+
+        # Act & Assert
+        assert list(ingestQueries(str(test_file), chunkSize=chunkSize)) == [query.upper() for query in queries]
+        assert ingestSequence(str(test_file), chunkSize=chunkSize) == ''.join(queries).upper().encode()
+
+    @pytest.mark.parametrize("content, line, column, character", [
+        ("ACGT\nACNT\n", 2, 3, 'N'),
+        ("ACGT\r\n  ACGT1", 2, 7, '1'),
+        ("ACGTÈ", 1, 5, 'È'),
+        ("A\n\nC\n", 2, 1, ''),
+    ], ids=["second_line", "crlf_and_indent", "non_ascii", "empty_line"])
+    @pytest.mark.parametrize("chunkSize", [2, 1 << 20])
+    def test_first_offending_line_and_column(self, tmp_path, content, line, column, character, chunkSize):
+        # Arrange
+        test_file = tmp_path / "queries.txt"
+        test_file.write_bytes(content.encode())
+
+        # Act
+        with pytest.raises(SequenceFormatError, match='Incorrect query sequence') as error:
+            list(ingestQueries(str(test_file), chunkSize=chunkSize))
+
+        # Assert
+        assert (error.value.line, error.value.column, error.value.character) == (line, column, character)
+
+        # Act & Assert
+        if character:
+            with pytest.raises(SequenceFormatError, match=f'at line {line}, column {column}'):
+                ingestSequence(str(test_file), chunkSize=chunkSize)
+
+    @pytest.mark.parametrize("content, line, column, character", [
+        ("ACG TACGT\nACGT\n", 1, 4, ' '),
+        ("  ACGT \r\nAC\t\tGT\n", 2, 3, '\t'),
+        ("ACGT\nA\rCGT\n", 2, 2, '\r'),
+        (">chr1\nACGT\nAC GT\n", 3, 3, ' '),
+    ], ids=["space", "tab_after_indent", "lone_carriage_return", "fasta"])
+    @pytest.mark.parametrize("chunkSize", [2, 1 << 20])
+    def test_whitespaces_inside_a_line(self, tmp_path, content, line, column, character, chunkSize):
+        # Arrange
+        test_file = tmp_path / "reference.txt"
+        test_file.write_bytes(content.encode())
+        reader = ingestRecords if content.startswith('>') else ingestSequence
+
+        # Act
+        with pytest.raises(SequenceFormatError) as error:
+            list(reader(str(test_file), chunkSize=chunkSize))
+
+        # Assert
+        assert (error.value.line, error.value.column, error.value.character) == (line, column, character)
+
+    def test_in_memory_and_mapped_references_agree(self, tmp_path):
+        # Arrange
+        ref_file = tmp_path / "reference.txt"
+        ref_file.write_text('ACG TACGT\nACGT\n')
+
+        # Act & Assert
+        for chunkSize in [None, 4]:
+            with pytest.raises(ValueError, match='Incorrect reference sequence passed'):
+                Alignment().align_reads(pathReferenceSequence=str(ref_file), querySequence=['ACGT'], outputFile=False, chunkSize=chunkSize)
+
+        # Arrange
+        ref_file.write_text(' ACGTACGT \r\n\tACGT\n')
+
+        # Act
+        results = [Alignment().align_reads(pathReferenceSequence=str(ref_file), querySequence=['GTAC'], outputFile=False, chunkSize=chunkSize)
+                   for chunkSize in [None, 4]]
+
+        # Assert
+        assert results[0] == results[1] == [['GTAC', 'GTAC', 2, 4]]
+
+    def test_readers(self, tmp_path):
+        # Arrange
+        ref_file, query_file = tmp_path / "reference.txt", tmp_path / "queries.txt"
+        ref_file.write_text("gatcgtggct\nCTAGA\n")
+        query_file.write_text("gatc\nCTAX\n")
+        alignment = Alignment()
+
+        # Act
+        packed = alignment.readSequence(str(ref_file), packed=True)
+        results = alignment.align_reads(pathReferenceSequence=str(ref_file), pathQuerySequence=str(query_file), outputFile=False)
+        info = alignment.getIngestInfo()
+
+        # Assert
+        assert isinstance(packed, PackedSequence) and str(packed) == "GATCGTGGCTCTAGA"
+        assert results == [['GATC', 'GATC', 0, 4], ['CTAG', 'CTAX', 10, 2]]
+        assert info['bytes'] == 2 * 17 + 10 and info['seconds'] > 0 and info['throughput'] > 0
+        assert Alignment().getIngestInfo() == {'bytes': 0, 'seconds': 0.0, 'throughput': 0.0}
+
+    def test_align_reads_errors(self, tmp_path):
+        # Arrange
+        ref_file, query_file = tmp_path / "reference.txt", tmp_path / "queries.txt"
+        ref_file.write_text("GATCGTGGCTCTAGA")
+        query_file.write_text("GATC\nCT A\n")
+
+        # Act & Assert
+        with pytest.raises(ValueError, match='Incorrect query sequence'):
+            Alignment().align_reads(pathReferenceSequence=str(ref_file), pathQuerySequence=str(query_file), outputFile=False)
+
+        with pytest.raises(ValueError, match='Incorrect query sequence'):
+            list(Alignment().iter_align_reads(pathReferenceSequence=str(ref_file), pathQuerySequence=str(query_file)))
@@ -0,0 +1,86 @@
+import pytest
+from Assignment9 import Alignment
+
+
+class TestIterAlignReads:
+    REF_SEQ = 'GATCGTGGCTCTAGA'
+    QUERIES = ['GATC', 'GGCT', 'CTAG', 'CTAX', 'CGTGT']
+
+    def test_same_results_as_align_reads(self):
+        # Act
+        expected = Alignment().align_reads(referenceSequence=self.REF_SEQ, querySequence=self.QUERIES, outputFile=False)
+        results = Alignment().iter_align_reads(referenceSequence=self.REF_SEQ, querySequence=iter(self.QUERIES))
+
+        # Assert
+        assert not isinstance(results, list)
+        assert list(results) == expected
+
+    def test_results_are_yielded_lazily(self):
+        # Arrange
+        consumed = []
+
+        def queries():
+            for query in self.QUERIES:
+                consumed.append(query)
+                yield query.lower()
+
+        # Act
+        results = Alignment().iter_align_reads(referenceSequence=self.REF_SEQ, querySequence=queries())
+        first = next(results)
+
+        # Assert
+        assert first == ['GATC', 'GATC', 0, 4]
+        assert consumed == ['GATC']
+
+    def test_query_file_and_incremental_output(self, tmp_path):
+        # Arrange
+        query_file = tmp_path / "query_sequences.txt"
+        query_file.write_text('\n'.join(self.QUERIES))
+        output_file = tmp_path / "output.txt"
+        alignment = Alignment()
+        alignment.setReferenceSequence(self.REF_SEQ)
+
+        # Act
+        results = alignment.iter_align_reads(pathQuerySequence=str(query_file), outputFile=str(output_file))
+        next(results)
+        next(results)
+        results.close()
+
+        # Assert
+        assert output_file.read_text() == (
+            "Reference sequence : GATCGTGGCTCTAGA\n\n"
+            "Portion of the reference sequence : GATC\nSequence queried : GATC\n"
+            "Position for the best alignment in the reference sequence : 0\nbest scoring obtained : 4\n\n\n"
+            "Portion of the reference sequence : GGCT\nSequence queried : GGCT\n"
+            "Position for the best alignment in the reference sequence : 6\nbest scoring obtained : 4\n\n\n"
+        )
+        assert alignment.getQuerySequence() is None
+
+    def test_stored_queries(self, capsys):
+        # Arrange
+        alignment = Alignment()
+        alignment.setReferenceSequence(self.REF_SEQ)
+        alignment.setQuerySequence(self.QUERIES)
+
+        # Act
+        results = list(alignment.iter_align_reads(outputFile=True))
+
+        # Assert
+        assert results == alignment.align_reads(outputFile=False)
+        assert capsys.readouterr().out.count("Sequence queried") == len(self.QUERIES)
+
+    def test_errors(self):
+        # Act & Assert
+        with pytest.raises(ValueError, match='Before using align read you should either set reference sequence'):
+            Alignment().iter_align_reads(querySequence=["ACGT"])
+
+        with pytest.raises(ValueError, match='Before using align read you should either set query sequence'):
+            Alignment().iter_align_reads(referenceSequence=self.REF_SEQ)
+
+        with pytest.raises(ValueError, match='Incorrect reference sequence passed'):
+            Alignment().iter_align_reads(referenceSequence="123", querySequence=["ACGT"])
+
+        results = Alignment().iter_align_reads(referenceSequence=self.REF_SEQ, querySequence=["ACGT", "123"])
+        assert next(results) == ['TCGT', 'ACGT', 2, 2]
+        with pytest.raises(ValueError, match='Incorrect query sequence'):
+            next(results)
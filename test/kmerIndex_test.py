@@ -0,0 +1,87 @@
+import random
+import pytest
+from Assignment9 import Alignment, KmerIndex
+
+np = pytest.importorskip('numpy')
+
+
+def mutate(rng, sequence, mismatches):
+    sequence = list(sequence)
+    for i in rng.sample(range(len(sequence)), mismatches):
+        sequence[i] = rng.choice('ACGTX-'.replace(sequence[i], ''))
+    return ''.join(sequence)
+
+
+class TestKmerIndex:
+    def test_lookup(self):
+        # Arrange
+        index = KmerIndex("ACGTACGXACGTT", k=4)
+
+        # Act & Assert
+        assert list(index.lookup("ACGT")) == [0, 8]
+        assert list(index.lookup("CGTA")) == [1]
+        assert list(index.lookup("ACGX")) == []
+        assert list(index.lookup("TTTT")) == []
+        assert len(index.keys) == 13 - 4 + 1 - 4
+
+    @pytest.mark.parametrize("k", [0, 32], ids=["too_short", "too_long"])
+    def test_invalid_k(self, k):
+        # Act & Assert
+        with pytest.raises(ValueError, match='k-mer length'):
+            KmerIndex("ACGT", k=k)
+
+    def test_candidates_contain_every_close_offset(self):
+        # Arrange
+        rng = random.Random(9)
+        reference = ''.join(rng.choice('ACGT') for _ in range(2000))
+        index = KmerIndex(reference, k=5)
+
+        # Act & Assert
+        for _ in range(50):
+            pos, mismatches = rng.randint(0, 1960), rng.randint(0, 3)
+            query = mutate(rng, reference[pos:pos+40], mismatches)
+            assert pos in index.candidates(query, 3)
+
+    def test_seeded_search_matches_full_scan(self):
+        # Arrange
+        rng = random.Random(10)
+        reference = ''.join(rng.choice('ACGT') for _ in range(3000)) + 'ACGT' * 20
+        queries = [mutate(rng, reference[p:p+rng.randint(30, 60)], rng.randint(0, 6)) for p in rng.sample(range(2900), 40)]
+        queries += [''.join(rng.choice('ACGTX') for _ in range(40)) for _ in range(5)] + ['ACGT' * 10, 'X' * 40]
+        alignment = Alignment()
+
+        # Act & Assert
+        for query in queries:
+            expected = alignment.find_best_alignment(reference, query, engine='python')
+            for maxMismatches in [0, 2, 4]:
+                assert alignment.find_best_alignment(reference, query, maxMismatches=maxMismatches) == expected
+
+    def test_seeded_search_skips_full_scan(self, monkeypatch):
+        # Arrange
+        rng = random.Random(11)
+        reference = ''.join(rng.choice('ACGT') for _ in range(5000))
+        alignment = Alignment()
+        alignment.find_best_alignment(reference, reference[:30], maxMismatches=1)
+        monkeypatch.setattr(Alignment, '_Alignment__scanWindows', lambda *args: pytest.fail('full scan used'))
+
+        # Act & Assert
+        assert alignment.find_best_alignment(reference, mutate(rng, reference[1234:1274], 2), maxMismatches=2) == (1234, 36)
+
+    def test_align_reads_seeded(self):
+        # Act
+        results = Alignment().align_reads(referenceSequence="GATCGTGGCTCTAGA" * 3, querySequence=["GATCGTGGCTCTAGA", "GGCTCTAGAGATCGTGG"],
+                                          outputFile=False, maxMismatches=0)
+
+        # Assert
+        assert results == [["GATCGTGGCTCTAGA", "GATCGTGGCTCTAGA", 0, 15], ["GGCTCTAGAGATCGTGG", "GGCTCTAGAGATCGTGG", 6, 17]]
+
+    def test_errors(self):
+        def custom_scoring(self, ref_sub, query):
+            return len([c for c in ref_sub if c in query])
+
+        # Act & Assert
+        with pytest.raises(ValueError, match='should not be negative'):
+            Alignment().find_best_alignment("ACGTACGT", "ACGT", maxMismatches=-1)
+
+        with pytest.raises(ValueError, match='supports only the default score_alignment'):
+            Alignment().find_best_alignment("ACGTACGT", "ACGT", custom_scoring, maxMismatches=1)
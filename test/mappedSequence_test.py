@@ -0,0 +1,125 @@
+import random
+import pytest
+from Assignment9 import Alignment, MappedSequence
+
+
+class TestMappedSequence:
+    @pytest.mark.parametrize("file_content", [
+        # Happy path tests
+        "ATCG",
+        "ATCG\nGCTA",
+        "  ATCG  \n  GCTA  ",
+        ' ATCGC-  \n XGTA',
+
+        # Edge cases
+        "atcg\r\ngcta\r\n",
+        "\n\nATCG\n\n\nGC\n",
+        ""
+    ], ids=["single_line", "multiple_lines", "multiple_lines_whitespace", "non_standard_characters",
+            "windows_newlines_lowercase", "empty_lines", "empty_file"])
+    def test_same_sequence_as_read_sequence(self, tmp_path, file_content):
+        # Arrange
+        test_file = tmp_path / "reference_sequence.txt"
+        test_file.write_bytes(file_content.encode())
+
+        # Act
+        with Alignment().readSequence(str(test_file), mapped=True) as mapped:
+            expected = Alignment().readSequence(str(test_file))
+
+            # Assert
+            assert len(mapped) == len(expected)
+            assert str(mapped) == expected
+            assert [mapped[i] for i in range(len(expected))] == list(expected)
+
+    def test_random_slices(self, tmp_path):
+        # Arrange
+        rng = random.Random(5)
+        lines = [''.join(rng.choice('ACGTX-') for _ in range(rng.randint(1, 20))) for _ in range(50)]
+        test_file = tmp_path / "reference_sequence.txt"
+        test_file.write_text('\n'.join(lines))
+        sequence = ''.join(lines)
+
+        # Act & Assert
+        with MappedSequence(str(test_file)) as mapped:
+            for _ in range(200):
+                start, stop = sorted(rng.randint(-10, len(sequence)+10) for _ in range(2))
+                assert mapped[start:stop] == sequence[start:stop]
+                assert mapped[stop:start:-3] == sequence[stop:start:-3]
+
+            assert list(mapped.chunks(7)) == [sequence[i:i+7] for i in range(0, len(sequence), 7)]
+
+    def test_chunked_alignment_matches_in_memory(self, tmp_path):
+        # Arrange
+        rng = random.Random(6)
+        reference = ''.join(rng.choice('ACGTX-') for _ in range(400))
+        test_file = tmp_path / "reference_sequence.txt"
+        test_file.write_text('\n'.join(reference[i:i+60] for i in range(0, len(reference), 60)))
+        queries = [''.join(rng.choice('ACGT') for _ in range(rng.randint(1, 30))) for _ in range(30)] + ['AAAA', reference[350:399]]
+        alignment = Alignment()
+
+        # Act & Assert
+        with MappedSequence(str(test_file)) as mapped:
+            for query in queries:
+                expected = alignment.find_best_alignment(reference, query, engine='python')
+                for engine in ['python', 'bitset', 'auto']:
+                    for chunkSize in [1, 7, 64, None]:
+                        assert alignment.find_best_alignment(mapped, query, engine=engine, chunkSize=chunkSize) == expected
+                        assert alignment.find_best_alignment(reference, query, engine=engine, chunkSize=chunkSize) == expected
+
+    def test_align_reads_chunked_path_reference(self, tmp_path):
+        # Arrange
+        ref_file = tmp_path / "reference_sequence.txt"
+        ref_file.write_text("ACGTAC\nGTACGT")
+        alignment = Alignment()
+
+        # Act
+        results = alignment.align_reads(pathReferenceSequence=str(ref_file), querySequence=["ACGT", "TGCA"], outputFile=False, chunkSize=2)
+
+        # Assert
+        assert isinstance(alignment.getReferenceSequence(), MappedSequence)
+        assert alignment.getReferenceSequence(packed=False) == "ACGTACGTACGT"
+        assert results == [["ACGT", "ACGT", 0, 4], ["CGTA", "TGCA", 1, 0]]
+
+    def test_align_reads_reuses_the_mapping(self, tmp_path):
+        # Arrange
+        ref_file = tmp_path / "reference_sequence.txt"
+        ref_file.write_text("ACGTAC\nGTACGT")
+        alignment = Alignment()
+
+        # Act
+        alignment.align_reads(pathReferenceSequence=str(ref_file), querySequence=["ACGT"], outputFile=False, chunkSize=2)
+        first = alignment.getReferenceSequence()
+        alignment.align_reads(pathReferenceSequence=str(ref_file), querySequence=["ACGT"], outputFile=False, chunkSize=2)
+        reused = alignment.getReferenceSequence()
+        ref_file.write_text("TTTTAC\nGTACGTA")
+        changed = alignment.align_reads(pathReferenceSequence=str(ref_file), querySequence=["ACGT"], outputFile=False, chunkSize=2)
+        second = alignment.getReferenceSequence()
+        alignment.align_reads(referenceSequence="ACGTA", querySequence=["ACGT"], outputFile=False)
+
+        # Assert
+        assert reused is first and second is not first and changed == [["ACGT", "ACGT", 4, 4]]
+        for mapped in [first, second]:
+            with pytest.raises(ValueError):
+                mapped[0]
+
+    def test_align_reads_invalid_mapped_reference(self, tmp_path):
+        # Arrange
+        ref_file = tmp_path / "reference_sequence.txt"
+        ref_file.write_text("ACGTAC\nGT1CGT")
+
+        # Act & Assert
+        with pytest.raises(ValueError, match='Incorrect reference sequence passed'):
+            Alignment().align_reads(pathReferenceSequence=str(ref_file), querySequence=["ACGT"], outputFile=False, chunkSize=4)
+
+    def test_pretty_print_mapped_reference(self, tmp_path, capsys):
+        # Arrange
+        ref_file = tmp_path / "reference_sequence.txt"
+        ref_file.write_text("ACGTAC\nGTACGT")
+        alignment = Alignment()
+        alignment.setReferenceSequence(MappedSequence(str(ref_file)))
+
+        # Act
+        alignment.prettyPrint([["ACGT", "ACGT", 0, 4]])
+
+        # Assert
+        assert capsys.readouterr().out.startswith("Reference sequence : ACGTACGTACGT\n\nPortion of the reference sequence : ACGT\n")
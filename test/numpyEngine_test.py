@@ -0,0 +1,77 @@
+import random
+import pytest
+from Assignment9 import Alignment
+
+np = pytest.importorskip('numpy')
+
+
+class TestNumpyEngine:
+    @pytest.mark.parametrize("reference, query, expected_pos, expected_score", [
+        # Happy path tests
+        ("ACGTACGTACGT", "ACGT", 0, 4),
+        ("XTATATATATAT", "ATAT", 2, 4),
+        ("GCATGCATGCAT", "ATGX", 2, 2),
+
+        # Edge cases
+        ("AAAAA", "AAA", 0, 3),
+        ("XXXXX", "XX", 0, -2),
+        ("ACG", "AC", 0, 2),
+        ("ACGTA", "ACGT", 0, 4)
+    ], ids=[
+        "standard_best_alignment",
+        "repeated_pattern_alignment",
+        "partial_match_alignment",
+        "multiple_best_positions",
+        "only_x",
+        "query_longer_than_offsets",
+        "two_offsets"
+    ])
+    def test_numpy_engine_valid_inputs(self, reference, query, expected_pos, expected_score):
+        # Act
+        pos, score = Alignment().find_best_alignment(reference, query, engine='numpy')
+
+        # Assert
+        assert (pos, score) == (expected_pos, expected_score)
+        assert type(pos) is int and type(score) is int
+
+    def test_numpy_engine_matches_python_loop(self, random_sequence):
+        # Arrange
+        rng = random.Random(9)
+        alignment = Alignment()
+
+        # Act & Assert
+        for _ in range(200):
+            reference = random_sequence(rng, rng.randint(2, 60), rng.choice(['ACGTX-', 'AC', 'A-']))
+            query = random_sequence(rng, rng.randint(1, len(reference)-1), rng.choice(['ACGTX-', 'AC', 'A-']))
+
+            assert alignment.find_best_alignment(reference, query, engine='numpy') == \
+                alignment.find_best_alignment(reference, query, engine='python')
+
+    def test_numpy_engine_non_ascii_reference(self):
+        # Act & Assert
+        assert Alignment().find_best_alignment("ÀCGTACGT", "CGTA", engine='numpy') == (1, 4)
+
+    def test_align_reads_uses_numpy_engine(self):
+        # Arrange
+        alignment = Alignment()
+
+        # Act
+        results = alignment.align_reads(referenceSequence="ACGTACGTACGT", querySequence=["ACGT", "TGCA"], outputFile=False, engine='numpy')
+
+        # Assert
+        assert results == alignment.align_reads(outputFile=False, engine='python')
+        assert results == [["ACGT", "ACGT", 0, 4], ["CGTA", "TGCA", 1, 0]]
+
+    def test_numpy_engine_errors(self):
+        def custom_scoring(self, ref_sub, query):
+            return len([c for c in ref_sub if c in query])
+
+        # Act & Assert
+        with pytest.raises(ValueError, match='supports only the default score_alignment'):
+            Alignment().find_best_alignment("ACGTACGT", "ACGT", custom_scoring, engine='numpy')
+
+        with pytest.raises(ValueError, match='Unknown engine'):
+            Alignment().find_best_alignment("ACGTACGT", "ACGT", engine='gpu')
+
+        with pytest.raises(ValueError, match='should not be empty'):
+            Alignment().find_best_alignment("ACGTACGT", "", engine='numpy')
@@ -0,0 +1,96 @@
+import random
+import pytest
+from Assignment9 import Alignment, PackedSequence
+
+
+class TestPackedSequence:
+    @pytest.mark.parametrize("sequence", [
+        # Happy path tests
+        "ACGT",
+        "GATCGTGGCTCTAGA",
+        "A-C-G-TXX",
+
+        # Edge cases
+        "",
+        "X",
+        "-",
+        "ACGTACGTA"
+    ], ids=[
+        "standard_sequence",
+        "reference_sequence",
+        "sequence_with_x_and_dash",
+        "empty_sequence",
+        "single_x",
+        "single_dash",
+        "not_multiple_of_four"
+    ])
+    def test_round_trip(self, sequence):
+        # Act
+        packed = PackedSequence(sequence)
+
+        # Assert
+        assert str(packed) == sequence
+        assert len(packed) == len(sequence)
+        assert packed == sequence
+        assert [packed[i] for i in range(len(sequence))] == list(sequence)
+
+    def test_round_trip_random_windows(self):
+        # Arrange
+        rng = random.Random(4)
+        sequence = ''.join(rng.choice('ACGTX-') for _ in range(500))
+        packed = PackedSequence(sequence)
+
+        # Act & Assert
+        for _ in range(200):
+            start = rng.randint(0, 499)
+            stop = rng.randint(start, 500)
+            assert str(packed[start:stop]) == sequence[start:stop]
+            assert str(packed[start:][:stop-start]) == sequence[start:stop]
+
+        assert str(packed[::-1]) == sequence[::-1]
+        assert packed[-1] == sequence[-1]
+
+    def test_compact_storage(self):
+        # Act
+        packed = PackedSequence('ACGT' * 1000)
+
+        # Assert
+        assert packed.nbytes() == 1000 + 500
+        assert packed[100:200].nbytes() == packed.nbytes()
+
+    @pytest.mark.parametrize("sequence", ["ACGN", "acgt", "ÀCGT"], ids=["unknown_base", "lowercase", "non_ascii"])
+    def test_invalid_sequence(self, sequence):
+        # Act & Assert
+        with pytest.raises(ValueError, match='Invalid sequence'):
+            PackedSequence(sequence)
+
+    def test_index_out_of_range(self):
+        # Act & Assert
+        with pytest.raises(IndexError):
+            PackedSequence('ACGT')[4]
+
+    def test_alignment_accepts_packed_reference(self):
+        # Arrange
+        alignment = Alignment()
+        packed = PackedSequence("GCATG-ATGXAT")
+
+        # Act
+        alignment.setReferenceSequence(packed)
+
+        # Assert
+        assert alignment.getReferenceSequence() is packed
+        assert alignment.getReferenceSequence(packed=False) == "GCATG-ATGXAT"
+        assert Alignment().getReferenceSequence(packed=True) is None
+
+        for engine in ['python', 'bitset', 'numpy', 'fft']:
+            if engine in ['numpy', 'fft']:
+                pytest.importorskip('numpy')
+            assert alignment.align_reads(querySequence=["ATGC"], outputFile=False, engine=engine) == [["ATG-", "ATGC", 2, 2]]
+
+    def test_align_reads_packed_reference_parameter(self):
+        # Act
+        results = Alignment().align_reads(referenceSequence=PackedSequence("ACGTACGTACGT"), querySequence=["ACGT", "TGCA"], outputFile=False)
+
+        # Assert
+        assert results == [["ACGT", "ACGT", 0, 4], ["CGTA", "TGCA", 1, 0]]
+        assert all(type(item[0]) is str for item in results)
@@ -0,0 +1,99 @@
+import random
+import pytest
+from multiprocessing import shared_memory
+from Assignment9 import Alignment, MappedSequence
+
+
+def custom_scoring(self, ref_sub, query):
+    return len([c for c in ref_sub if c in query])
+
+
+class TestParallelAlignReads:
+    @pytest.fixture
+    def data(self):
+        rng = random.Random(7)
+        reference = ''.join(rng.choice('ACGTX-') for _ in range(300))
+        queries = [''.join(rng.choice('ACGT') for _ in range(rng.randint(1, 20))) for _ in range(40)] + ['AAAA'] * 3
+        return reference, queries
+
+    @pytest.mark.parametrize("engine", ['auto', 'python', 'bitset', 'numpy', 'fft'])
+    def test_same_results_as_sequential(self, data, engine):
+        # Arrange
+        if engine in ['numpy', 'fft']:
+            pytest.importorskip('numpy')
+        reference, queries = data
+
+        # Act
+        expected = Alignment().align_reads(referenceSequence=reference, querySequence=queries, outputFile=False, engine=engine)
+        results = Alignment().align_reads(referenceSequence=reference, querySequence=queries, outputFile=False, engine=engine,
+                                          workers=2, queriesPerTask=7)
+
+        # Assert
+        assert results == expected
+
+    def test_custom_scoring_and_chunks(self, data):
+        # Arrange
+        reference, queries = data
+
+        # Act
+        expected = Alignment().align_reads(referenceSequence=reference, querySequence=queries, outputFile=False,
+                                           alignmentFunction=custom_scoring)
+        results = Alignment().align_reads(referenceSequence=reference, querySequence=queries, outputFile=False,
+                                          alignmentFunction=custom_scoring, workers=3, queriesPerTask=1, chunkSize=50)
+
+        # Assert
+        assert results == expected
+
+    def test_mapped_reference(self, data, tmp_path):
+        # Arrange
+        reference, queries = data
+        ref_file = tmp_path / "reference_sequence.txt"
+        ref_file.write_text('\n'.join(reference[i:i+70] for i in range(0, len(reference), 70)))
+
+        # Act
+        expected = Alignment().align_reads(referenceSequence=reference, querySequence=queries, outputFile=False)
+        with MappedSequence(str(ref_file)) as mapped:
+            results = Alignment().align_reads(referenceSequence=mapped, querySequence=queries, outputFile=False, workers=2)
+
+        # Assert
+        assert results == expected
+
+    def test_byte_identical_output(self, data, tmp_path):
+        # Arrange
+        reference, queries = data
+        sequential, parallel = tmp_path / "sequential.txt", tmp_path / "parallel.txt"
+
+        # Act
+        Alignment().align_reads(referenceSequence=reference, querySequence=queries, outputFile=str(sequential))
+        Alignment().align_reads(referenceSequence=reference, querySequence=queries, outputFile=str(parallel), workers=2)
+
+        # Assert
+        assert sequential.read_bytes() == parallel.read_bytes()
+
+    def test_shared_memory_released(self, data, monkeypatch):
+        # Arrange
+        reference, queries = data
+        created = []
+        original = shared_memory.SharedMemory
+
+        def tracking(*args, **kwargs):
+            created.append(original(*args, **kwargs))
+            return created[-1]
+
+        monkeypatch.setattr(shared_memory, 'SharedMemory', tracking)
+
+        # Act
+        Alignment().align_reads(referenceSequence=reference, querySequence=queries, outputFile=False, workers=2)
+
+        # Assert
+        assert len(created) == 1
+        with pytest.raises(FileNotFoundError):
+            original(name=created[0].name)
+
+    def test_invalid_queries_per_task(self, data):
+        # Arrange
+        reference, queries = data
+
+        # Act & Assert
+        with pytest.raises(ValueError, match='queriesPerTask'):
+            Alignment().align_reads(referenceSequence=reference, querySequence=queries, outputFile=False, workers=2, queriesPerTask=0)
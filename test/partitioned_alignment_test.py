@@ -0,0 +1,62 @@
+import random
+import pytest
+import Assignment9
+from Assignment9 import Alignment
+
+
+def custom_scoring(self, ref_sub, query):
+    return len([c for c in ref_sub if c in query])
+
+
+class TestPartitionedAlignment:
+    @pytest.mark.parametrize("engine", ['python', 'bitset', 'numpy', 'fft'])
+    def test_same_results_as_single_scan(self, engine):
+        # Arrange
+        if engine in ['numpy', 'fft']:
+            pytest.importorskip('numpy')
+        rng = random.Random(8)
+        alignment = Alignment()
+
+        # Act & Assert
+        for _ in range(10):
+            reference = ''.join(rng.choice('AC-') for _ in range(rng.randint(6, 120)))
+            query = ''.join(rng.choice('AC') for _ in range(rng.randint(1, len(reference) - 5)))
+            expected = alignment.find_best_alignment(reference, query, engine=engine)
+
+            for workers in [2, 3, 5]:
+                assert alignment.find_best_alignment(reference, query, engine=engine, workers=workers) == expected
+                assert alignment.find_best_alignment(reference, query, engine=engine, workers=workers, chunkSize=3) == expected
+
+    def test_leftmost_tie_across_partitions(self):
+        # Act & Assert
+        assert Alignment().find_best_alignment("CCCCCCCCAAAAAAAAAAAAAAAAA", "AAAA", engine='bitset', workers=4) == (8, 4)
+        assert Alignment().find_best_alignment("AAAAAAAAAAAAAAAAAAAAAAAAA", "AAAA", engine='bitset', workers=4) == (0, 4)
+
+    def test_executor_choice(self, monkeypatch):
+        # Arrange
+        pytest.importorskip('numpy')
+        used = []
+        for name in ['_threadPool', '_processPool']:
+            original = getattr(Assignment9, name)
+            monkeypatch.setattr(Assignment9, name, lambda *args, original=original, name=name: used.append(name) or original(*args))
+
+        # Act
+        Alignment().find_best_alignment("ACGTACGTACGT", "ACGT", engine='numpy', workers=2)
+        Alignment().find_best_alignment("ACGTACGTACGT", "ACGT", engine='bitset', workers=2)
+
+        # Assert
+        assert used == ['_threadPool', '_processPool']
+
+    def test_custom_scoring_and_align_reads(self):
+        # Act
+        expected = Alignment().align_reads(referenceSequence="ACGXACGXACGX", querySequence=["ACGT", "GX"], outputFile=False,
+                                           alignmentFunction=custom_scoring)
+        results = Alignment().align_reads(referenceSequence="ACGXACGXACGX", querySequence=["ACGT", "GX"], outputFile=False,
+                                          alignmentFunction=custom_scoring, partitionWorkers=3)
+
+        # Assert
+        assert results == expected == [["ACGX", "ACGT", 0, 3], ["GX", "GX", 2, 2]]
+
+    def test_too_few_offsets_are_not_partitioned(self):
+        # Act & Assert
+        assert Alignment().find_best_alignment("ACGTA", "CGT", workers=8) == (1, 3)
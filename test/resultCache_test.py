@@ -0,0 +1,101 @@
+from Assignment9 import Alignment
+
+
+def custom_scoring(self, ref_sub, query):
+    return len([c for c in ref_sub if c in query])
+
+
+class TestResultCache:
+    REF_SEQ = 'GATCGTGGCTCTAGA'
+    QUERIES = ['GATC', 'GGCT', 'CTAG']
+
+    def test_duplicates_are_aligned_once(self, monkeypatch):
+        # Arrange
+        calls = []
+        original = Alignment.find_best_alignment
+        monkeypatch.setattr(Alignment, 'find_best_alignment', lambda self, reference, query, **kwargs:
+                            calls.append(query) or original(self, reference, query, **kwargs))
+
+        # Act
+        results = Alignment().align_reads(referenceSequence=self.REF_SEQ, querySequence=self.QUERIES * 3 + ['gatc'], outputFile=False)
+
+        # Assert
+        assert sorted(calls) == sorted(self.QUERIES)
+        assert results == Alignment().align_reads(referenceSequence=self.REF_SEQ, querySequence=self.QUERIES, outputFile=False) * 3 + \
+            [['GATC', 'GATC', 0, 4]]
+
+    def test_add_queries_flow_reuses_results(self, monkeypatch):
+        # Arrange
+        temp = Alignment()
+        temp.align_reads(referenceSequence=self.REF_SEQ, querySequence=self.QUERIES, outputFile=None)
+        calls = []
+        original = Alignment.find_best_alignment
+        monkeypatch.setattr(Alignment, 'find_best_alignment', lambda self, reference, query, **kwargs:
+                            calls.append(query) or original(self, reference, query, **kwargs))
+
+        # Act
+        temp.setQuerySequence(temp.getQuerySequence() + ['CTAX', 'CGTGT'])
+        ris = temp.align_reads(outputFile=None)
+
+        # Assert
+        assert calls == ['CTAX', 'CGTGT']
+        assert ris[3] == ['CTAG', 'CTAX', 10, 2]
+        assert ris[4] == ['CGTGG', 'CGTGT', 3, 3]
+        assert temp.getResultCacheInfo() == {'hits': 3, 'misses': 5, 'size': 5, 'maxSize': 65536}
+
+    def test_invalidated_when_reference_changes(self):
+        # Arrange
+        alignment = Alignment()
+        alignment.align_reads(referenceSequence=self.REF_SEQ, querySequence=self.QUERIES, outputFile=False)
+
+        # Act
+        alignment.setReferenceSequence(self.REF_SEQ)
+        same = alignment.getResultCacheInfo()['size']
+        alignment.setReferenceSequence('CTAGGATC')
+        results = alignment.align_reads(outputFile=False)
+
+        # Assert
+        assert same == 3
+        assert results == [['GATC', 'GATC', 4, 4], ['GGAT', 'GGCT', 3, 2], ['CTAG', 'CTAG', 0, 4]]
+        assert alignment.getResultCacheInfo()['size'] == 3
+
+    def test_scoring_function_is_part_of_the_key(self):
+        # Arrange
+        alignment = Alignment()
+        alignment.setReferenceSequence("ACGXACGXACGX")
+
+        # Act
+        default = alignment.align_reads(querySequence=["ACGT"], outputFile=False)
+        custom = alignment.align_reads(querySequence=["ACGT"], outputFile=False, alignmentFunction=custom_scoring)
+
+        # Assert
+        assert default == [["ACGX", "ACGT", 0, 2]]
+        assert custom == [["ACGX", "ACGT", 0, 3]]
+
+    def test_lru_bound_and_streaming(self):
+        # Arrange
+        alignment = Alignment(resultCacheSize=2)
+        alignment.setReferenceSequence(self.REF_SEQ)
+
+        # Act
+        list(alignment.iter_align_reads(querySequence=self.QUERIES + ['GATC']))
+
+        # Assert
+        assert alignment.getResultCacheInfo() == {'hits': 0, 'misses': 4, 'size': 2, 'maxSize': 2}
+
+        # Act
+        list(alignment.iter_align_reads(querySequence=['CTAG', 'GATC']))
+
+        # Assert
+        assert alignment.getResultCacheInfo()['hits'] == 2
+
+    def test_disabled_cache(self):
+        # Arrange
+        alignment = Alignment(resultCacheSize=0)
+
+        # Act
+        alignment.align_reads(referenceSequence=self.REF_SEQ, querySequence=self.QUERIES * 2, outputFile=False)
+        alignment.align_reads(outputFile=False)
+
+        # Assert
+        assert alignment.getResultCacheInfo() == {'hits': 0, 'misses': 0, 'size': 0, 'maxSize': 0}
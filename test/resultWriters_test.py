@@ -0,0 +1,78 @@
+import gzip
+import io
+import json
+import pytest
+from Assignment9 import Alignment, JSONLinesWriter, SAMWriter, TSVWriter, TextWriter
+
+
+class TestResultWriters:
+    REF_SEQ = 'GATCGTGGCTCTAGA'
+    QUERIES = ['GATC', 'GGCT', 'CTAX']
+
+    def test_formats(self, tmp_path):
+        # Arrange
+        alignment = Alignment()
+        paths = {name: str(tmp_path / f"output.{name}") for name in ['tsv', 'jsonl', 'sam']}
+
+        # Act
+        for name, path in paths.items():
+            alignment.align_reads(referenceSequence=self.REF_SEQ, querySequence=self.QUERIES, outputFile=path, outputFormat=name)
+
+        # Assert
+        assert open(paths['tsv']).read().splitlines() == ['reference\tquery\tposition\tscore\thits', 'GATC\tGATC\t0\t4\t',
+                                                         'GGCT\tGGCT\t6\t4\t', 'CTAG\tCTAX\t10\t2\t']
+        assert [json.loads(line) for line in open(paths['jsonl'])][2] == {'reference': 'CTAG', 'query': 'CTAX', 'position': 10, 'score': 2}
+        assert open(paths['sam']).read().splitlines() == ['@HD\tVN:1.6\tSO:unsorted', '@SQ\tSN:reference\tLN:15', '@PG\tID:Assignment9\tPN:Assignment9',
+                                                         'q1\t0\treference\t1\t255\t4M\t*\t0\t0\tGATC\t*\tAS:i:4',
+                                                         'q2\t0\treference\t7\t255\t4M\t*\t0\t0\tGGCT\t*\tAS:i:4',
+                                                         'q3\t0\treference\t11\t255\t4M\t*\t0\t0\tCTAX\t*\tAS:i:2']
+
+    def test_hits(self):
+        # Arrange
+        result = ['ACGT', 'ACGT', 0, 4, [(0, 4), (5, 3)]]
+
+        # Act & Assert
+        assert TSVWriter(io.StringIO()).format(result) == 'ACGT\tACGT\t0\t4\t0:4,5:3\n'
+        assert json.loads(JSONLinesWriter(io.StringIO()).format(result))['hits'] == [[0, 4], [5, 3]]
+        assert SAMWriter(io.StringIO()).format(result).endswith('\tXA:Z:reference,1,4;reference,6,3;\n')
+        assert TextWriter(io.StringIO()).format(result).endswith('Alignments found (position, score) : (0, 4), (5, 3)\n\n\n')
+
+    def test_append_and_gzip(self, tmp_path):
+        # Arrange
+        path = str(tmp_path / "output.tsv.gz")
+
+        # Act
+        Alignment().align_reads(referenceSequence=self.REF_SEQ, querySequence=self.QUERIES[:1], outputFile=path, outputFormat='tsv')
+        Alignment().align_reads(referenceSequence=self.REF_SEQ, querySequence=self.QUERIES[1:], outputFile=path, outputFormat='tsv',
+                                appendOutput=True)
+
+        # Assert
+        with gzip.open(path, 'rt') as fp:
+            lines = fp.read().splitlines()
+        assert lines[0].startswith('reference') and len(lines) == 4
+
+    def test_incremental_writer(self, tmp_path):
+        # Arrange
+        path = tmp_path / "output.txt"
+        alignment = Alignment()
+        alignment.setReferenceSequence(self.REF_SEQ)
+
+        # Act
+        with TextWriter(str(path), alignment.getReferenceSequence(), bufferSize=10) as writer:
+            for query in self.QUERIES:
+                alignment.align_reads(querySequence=[query], outputFile=writer)
+            list(alignment.iter_align_reads(querySequence=['GATC'], outputFile=writer))
+            count = writer.count
+
+        # Assert
+        content = path.read_text()
+        assert count == 4
+        assert content.count('Reference sequence') == 1 and content.count('Sequence queried') == 4
+
+    def test_unknown_format(self):
+        # Act & Assert
+        with pytest.raises(ValueError, match='Unknown output format'):
+            Alignment().align_reads(referenceSequence=self.REF_SEQ, querySequence=self.QUERIES, outputFile=True, outputFormat='xml')
+
+        with pytest.raises(ValueError, match='Unknown output format'):
+            Alignment().iter_align_reads(referenceSequence=self.REF_SEQ, querySequence=self.QUERIES, outputFormat='xml')
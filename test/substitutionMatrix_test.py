@@ -0,0 +1,66 @@
+import random
+import pytest
+from Assignment9 import Alignment, SubstitutionMatrix
+
+np = pytest.importorskip('numpy')
+
+TRANSITIONS = SubstitutionMatrix({'AG': 0, 'GA': 0, 'CT': 0, 'TC': 0, 'XX': -2, '--': -3}, match=2)
+FLOATS = SubstitutionMatrix({'AG': 0.1, 'GA': 0.1, 'CT': 0.3, 'TC': 0.3, 'X-': -0.7}, match=1.5, mismatch=-0.9)
+
+
+class TestSubstitutionMatrix:
+    def test_default_matrix_is_score_alignment(self):
+        # Arrange
+        rng = random.Random(15)
+        alignment, matrix = Alignment(), SubstitutionMatrix()
+
+        # Act & Assert
+        for _ in range(50):
+            a = ''.join(rng.choice('ACGTX-') for _ in range(12))
+            b = ''.join(rng.choice('ACGTX-') for _ in range(12))
+            assert matrix(alignment, a, b) == alignment.score_alignment(a, b)
+
+    @pytest.mark.parametrize("matrix", [TRANSITIONS, FLOATS], ids=["integer", "float"])
+    @pytest.mark.parametrize("engine", ['numpy', 'fft', 'batch'])
+    def test_engines_match_python(self, matrix, engine):
+        # Arrange
+        rng = random.Random(16)
+        alignment = Alignment()
+
+        # Act & Assert
+        for _ in range(20):
+            reference = ''.join(rng.choice('ACGTX-') for _ in range(rng.randint(10, 80)))
+            query = ''.join(rng.choice('ACGTX-') for _ in range(rng.randint(1, 9)))
+            expected = alignment.find_best_alignment(reference, query, matrix, engine='python')
+            assert alignment.find_best_alignment(reference, query, matrix, engine=engine) == expected
+
+    def test_align_reads_with_a_matrix(self):
+        # Arrange
+        reference, queries = 'GATCGTGGCTCTAGA', ['GGTT', 'CTAG', 'AXCG']
+
+        # Act
+        expected = Alignment().align_reads(referenceSequence=reference, querySequence=queries, outputFile=False,
+                                           alignmentFunction=TRANSITIONS, engine='python')
+
+        # Assert
+        assert expected[0] == ['GGCT', 'GGTT', 6, 6]
+        for engine in ['auto', 'batch']:
+            assert Alignment().align_reads(referenceSequence=reference, querySequence=queries, outputFile=False,
+                                           alignmentFunction=TRANSITIONS, engine=engine) == expected
+        assert Alignment().align_reads(referenceSequence=reference, querySequence=queries, outputFile=False,
+                                       alignmentFunction=TRANSITIONS, workers=2, queriesPerTask=1) == expected
+
+    def test_value_semantics_and_errors(self):
+        # Act & Assert
+        assert SubstitutionMatrix({'AG': 0}) == SubstitutionMatrix({('A', 'G'): 0})
+        assert hash(SubstitutionMatrix()) == hash(SubstitutionMatrix(match=1))
+        assert TRANSITIONS.maxPositionScore == 2 and not FLOATS.integral
+
+        with pytest.raises(ValueError, match='Invalid pair'):
+            SubstitutionMatrix({'AN': 1})
+
+        with pytest.raises(TypeError, match='integers or floats'):
+            SubstitutionMatrix({'AG': '1'})
+
+        with pytest.raises(ValueError, match='supports only the default score_alignment scoring function$'):
+            Alignment().find_best_alignment('ACGTACGT', 'ACGT', TRANSITIONS, engine='bitset')
@@ -0,0 +1,64 @@
+import random
+import pytest
+from Assignment9 import Alignment, SuffixArray
+
+np = pytest.importorskip('numpy')
+
+
+class TestSuffixArray:
+    @pytest.mark.parametrize("reference", [
+        # Happy path tests
+        "GATCGTGGCTCTAGA",
+        "ACGTACGXACGTT",
+
+        # Edge cases
+        "A",
+        "AAAAAAAAAA",
+        "ACACACACAC-"
+    ], ids=["reference_sequence", "sequence_with_x", "single_base", "homopolymer", "periodic"])
+    def test_suffixes_are_sorted(self, reference):
+        # Act
+        suffixes = SuffixArray(reference).suffixes
+
+        # Assert
+        assert list(suffixes) == sorted(range(len(reference)), key=lambda i: reference[i:])
+
+    def test_find(self):
+        # Arrange
+        index = SuffixArray("ACGTACGXACGTT")
+
+        # Act & Assert
+        assert sorted(index.occurrences("ACG")) == [0, 4, 8]
+        assert index.find("ACGT") == 0
+        assert index.find("GTT") == 10
+        assert index.find("TTA") == -1
+        assert index.find("ACGTACGXACGTTA") == -1
+
+    def test_exact_path_matches_full_scan(self):
+        # Arrange
+        rng = random.Random(12)
+        reference = ''.join(rng.choice('ACGT') for _ in range(3000)) + 'ACGT' * 20 + 'XX'
+        queries = [reference[p:p+rng.randint(1, 50)] for p in rng.sample(range(3070), 60)]
+        queries += ['ACGT' * 5, 'AXGT', 'TTTTTTTTTTTTTTTTTTTT']
+        alignment = Alignment()
+
+        # Act & Assert
+        for query in queries:
+            assert alignment.find_best_alignment(reference, query, exactIndex=True) == alignment.find_best_alignment(reference, query)
+
+    def test_exact_hit_skips_full_scan(self, monkeypatch):
+        # Arrange
+        alignment = Alignment()
+        alignment.find_best_alignment("GATCGTGGCTCTAGA", "GAT", exactIndex=True)
+        monkeypatch.setattr(Alignment, '_Alignment__scanWindows', lambda *args: pytest.fail('full scan used'))
+
+        # Act & Assert
+        assert alignment.find_best_alignment("GATCGTGGCTCTAGA", "CTAG", exactIndex=True) == (10, 4)
+
+    def test_align_reads_exact_index(self):
+        # Act
+        results = Alignment().align_reads(referenceSequence="GATCGTGGCTCTAGA", querySequence=['GATC', 'GGCT', 'CTAX', 'CGTGT'],
+                                          outputFile=False, exactIndex=True)
+
+        # Assert
+        assert results == [['GATC', 'GATC', 0, 4], ['GGCT', 'GGCT', 6, 4], ['CTAG', 'CTAX', 10, 2], ['CGTGG', 'CGTGT', 3, 3]]
@@ -0,0 +1,68 @@
+import random
+import pytest
+from Assignment9 import Alignment, SubstitutionMatrix
+
+
+def all_hits(reference, query):
+    scores = [Alignment().score_alignment(reference[i:i+len(query)], query) for i in range(len(reference) - len(query) + 1)]
+    return sorted(enumerate(scores), key=lambda hit: (-hit[1], hit[0]))
+
+
+class TestTopAlignments:
+    @pytest.mark.parametrize("engine", ['python', 'bitset', 'numpy', 'fft', 'batch'])
+    def test_same_hits_as_full_sort(self, engine):
+        # Arrange
+        if engine not in ['python', 'bitset']:
+            pytest.importorskip('numpy')
+        rng = random.Random(17)
+        alignment = Alignment()
+
+        # Act & Assert
+        for _ in range(20):
+            reference = ''.join(rng.choice('ACX') for _ in range(rng.randint(10, 80)))
+            query = ''.join(rng.choice('ACX') for _ in range(rng.randint(1, 8)))
+            expected = all_hits(reference, query)
+
+            for topK in [1, 3, 100]:
+                assert alignment.find_top_alignments(reference, query, engine=engine, topK=topK) == expected[:topK]
+                assert alignment.find_top_alignments(reference, query, engine=engine, topK=topK, chunkSize=7) == expected[:topK]
+            assert alignment.find_top_alignments(reference, query, engine=engine, minScore=0) == [hit for hit in expected if hit[1] >= 0]
+            assert alignment.find_top_alignments(reference, query, engine=engine, topK=2, minScore=len(query) + 1) == []
+            assert alignment.find_top_alignments(reference, query, engine=engine, topK=1)[0] == \
+                alignment.find_best_alignment(reference, query, engine=engine)
+
+    def test_repetitive_read(self):
+        # Act
+        hits = Alignment().find_top_alignments("ACGTTACGTTACGTAACGT", "ACGT", topK=4)
+
+        # Assert
+        assert hits == [(0, 4), (5, 4), (10, 4), (15, 4)]
+
+    def test_matrix_scoring(self):
+        # Arrange
+        pytest.importorskip('numpy')
+        matrix = SubstitutionMatrix({'AG': 0.5, 'GA': 0.5})
+
+        # Act & Assert
+        assert Alignment().find_top_alignments("AAGGAGAA", "AA", matrix, engine='numpy', topK=3) == \
+            Alignment().find_top_alignments("AAGGAGAA", "AA", matrix, engine='python', topK=3) == [(0, 2.0), (6, 2.0), (1, 1.5)]
+
+    def test_align_reads_hits(self, tmp_path):
+        # Arrange
+        output = tmp_path / "output.txt"
+
+        # Act
+        results = Alignment().align_reads(referenceSequence="ACGTTACGTTACGTAACGT", querySequence=["ACGT", "TTAC"],
+                                          outputFile=str(output), topK=2)
+
+        # Assert
+        assert results == [["ACGT", "ACGT", 0, 4, [(0, 4), (5, 4)]], ["TTAC", "TTAC", 3, 4, [(3, 4), (8, 4)]]]
+        assert "Alignments found (position, score) : (0, 4), (5, 4)" in output.read_text()
+
+    def test_errors(self):
+        # Act & Assert
+        with pytest.raises(ValueError, match='Either topK or minScore'):
+            Alignment().find_top_alignments("ACGTACGT", "ACGT")
+
+        with pytest.raises(ValueError, match='at least 1'):
+            Alignment().find_top_alignments("ACGTACGT", "ACGT", topK=0)